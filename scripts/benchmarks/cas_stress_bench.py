@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+cas_stress_bench.py -- Lost-update check for the compare-and-swap writers under contention.
+
+Starts --workers processes behind a barrier. Each commits --updates mutations
+to one backlog story through backlog_manager.transact and --updates counter
+increments to STATE.json through the state command's _mutate_state, so every
+commit races every other worker. Afterwards checks that no update was lost
+(history length, counter and revision all equal workers x updates), that the
+change feed has one entry per revision with no holes, and that no commit
+marker or temp file was left behind. Prints a Markdown table and exits 1 on
+any lost update.
+
+Usage:
+    python scripts/benchmarks/cas_stress_bench.py [--workers 8] [--updates 50]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "skills" / "shared" / "scripts"))
+sys.path.insert(0, str(ROOT / "skills" / "shared" / "scripts" / "commands"))
+sys.path.insert(0, str(ROOT / "skills" / "backlog" / "scripts"))
+import backlog_manager
+import jsoncodec
+from state import _mutate_state
+
+STORY = "US-001"
+
+
+def _backlog_worker(path: str, worker: int, updates: int, barrier) -> None:
+    barrier.wait()
+    for n in range(updates):
+        def mutate(data, n=n):
+            story = next(s for s in data["stories"] if s["id"] == STORY)
+            story["history"].append({"by": f"worker-{worker}", "n": n})
+        backlog_manager.transact(path, mutate, lambda data, _: [{"op": "edited", "id": STORY, "by": "bench"}])
+
+
+def _state_worker(path: str, worker: int, updates: int, barrier) -> None:
+    barrier.wait()
+    for _ in range(updates):
+        def mutate(state):
+            state["counter"] += 1
+            state["by_worker"][str(worker)] = state["by_worker"].get(str(worker), 0) + 1
+        _mutate_state(path, mutate)
+
+
+def setup(tmp: str) -> tuple[str, str]:
+    backlog = backlog_manager.create_empty_backlog()
+    backlog["stories"].append({"id": STORY, "title": "Contended story", "status": "Draft", "history": []})
+    backlog_path = os.path.join(tmp, "backlog.json")
+    backlog_manager.save_backlog(backlog_path, backlog)
+    state_path = os.path.join(tmp, "STATE.json")
+    with open(state_path, "w", encoding="utf-8") as f:
+        jsoncodec.dump({"revision": 0, "counter": 0, "by_worker": {}}, f)
+    return backlog_path, state_path
+
+
+def race(target, path: str, workers: int, updates: int) -> float:
+    barrier = multiprocessing.Barrier(workers + 1)
+    procs = [multiprocessing.Process(target=target, args=(path, w, updates, barrier)) for w in range(workers)]
+    for proc in procs:
+        proc.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for proc in procs:
+        proc.join()
+    if any(proc.exitcode for proc in procs):
+        sys.exit(f"a worker crashed writing {path}")
+    return time.perf_counter() - start
+
+
+def check_backlog(path: str, expected: int) -> list[str]:
+    problems = []
+    data = backlog_manager.load_backlog(path)
+    history = data["stories"][0]["history"]
+    revision = data["metadata"]["revision"]
+    if len(history) != expected:
+        problems.append(f"backlog: {len(history)} of {expected} history entries survived")
+    if revision != expected + 1:
+        problems.append(f"backlog: revision {revision}, expected {expected + 1}")
+    seqs = [entry["seq"] for entry in backlog_manager.iter_changes(path, 0)]
+    if seqs != list(range(1, revision + 1)):
+        problems.append(f"change feed: {len(seqs)} entries for {revision} revisions")
+    return problems
+
+
+def check_state(path: str, workers: int, updates: int) -> list[str]:
+    with open(path, "rb") as f:
+        state = jsoncodec.load(f)
+    problems = []
+    if state["counter"] != workers * updates or state["revision"] != workers * updates:
+        problems.append(f"STATE.json: counter {state['counter']}, revision {state['revision']}, "
+                        f"expected {workers * updates}")
+    short = {w: c for w, c in state["by_worker"].items() if c != updates}
+    if short:
+        problems.append(f"STATE.json: per-worker counts off: {short}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--updates", type=int, default=50, help="Commits per worker and document")
+    args = parser.parse_args()
+    expected = args.workers * args.updates
+
+    print(f"{args.workers} processes x {args.updates} commits per document\n")
+    print("| document | commits | seconds | commits/s | lost |")
+    print("|---|---|---|---|---|")
+    with tempfile.TemporaryDirectory() as tmp:
+        backlog_path, state_path = setup(tmp)
+        problems = []
+        for label, target, path, check in (
+            ("backlog.json", _backlog_worker, backlog_path, lambda: check_backlog(backlog_path, expected)),
+            ("STATE.json", _state_worker, state_path, lambda: check_state(state_path, args.workers, args.updates)),
+        ):
+            seconds = race(target, path, args.workers, args.updates)
+            found = check()
+            problems += found
+            print(f"| {label} | {expected} | {seconds:.2f} | {expected / seconds:.0f} | {'yes' if found else 'no'} |")
+        leftovers = [name for name in os.listdir(tmp) if name.endswith(".commit") or name.startswith(".tmp_")]
+        if leftovers:
+            problems.append(f"left behind: {', '.join(sorted(leftovers))}")
+
+    for problem in problems:
+        print(f"\nFAIL {problem}")
+    if problems:
+        sys.exit(1)
+    print("\nno lost updates")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+json_codec_bench.py -- Load/dump timings for backlog.json under each jsoncodec backend.
+
+Builds synthetic backlogs (metadata + stories with ACs and history, shaped like
+backlog_manager output) and times decode, compact encode and indented encode
+for every installed backend. Prints a Markdown table.
+
+Usage:
+    python scripts/benchmarks/json_codec_bench.py [--sizes 1000,10000] [--repeat 5]
+"""
+
+import argparse
+import importlib
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "skills" / "shared" / "scripts"))
+import jsoncodec
+
+STATUSES = ["Draft", "Ready", "In Progress", "In Review", "Done"]
+WORDS = ("user admin report export invoice search filter login session token "
+         "dashboard chart upload download notify email audit role permission").split()
+
+
+def _text(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def make_backlog(count: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    stamp = "2026-01-01T00:00:00+00:00"
+    stories = []
+    for i in range(1, count + 1):
+        sid = f"US-{i:03d}"
+        stories.append({
+            "id": sid,
+            "title": _text(rng, 6).capitalize(),
+            "feature_area": f"Feature {i % 25}",
+            "priority": rng.choice(["Must", "Should", "Could"]),
+            "role": "operator",
+            "want": _text(rng, 14),
+            "benefit": _text(rng, 10),
+            "acceptance_criteria": [
+                {"id": f"AC-{i:03d}.{k}", "given": _text(rng, 6), "when": _text(rng, 5), "then": _text(rng, 8)}
+                for k in range(1, rng.randint(2, 5))
+            ],
+            "notes": _text(rng, 20),
+            "dependencies": [f"US-{rng.randint(1, i - 1):03d}"] if i > 1 and rng.random() < 0.4 else [],
+            "status": rng.choice(STATUSES),
+            "created_at": stamp,
+            "updated_at": stamp,
+            "created_by": "po",
+            "history": [{"action": "created", "by": "po", "at": stamp}],
+        })
+    return {
+        "metadata": {"version": "1.0", "revision": count, "created_at": stamp, "updated_at": stamp,
+                     "id_high_water": count},
+        "stories": stories,
+        "questions": [],
+    }
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000", help="Comma-separated story counts")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the best is reported")
+    args = parser.parse_args()
+
+    print("| backend | stories | load ms | dump ms (compact) | dump ms (indent=2) | compact KB | indented KB |")
+    print("|---|---|---|---|---|---|---|")
+    for size in (int(s) for s in args.sizes.split(",")):
+        backlog = make_backlog(size)
+        for backend in jsoncodec.BACKENDS:
+            os.environ["AGENCY_JSON_BACKEND"] = backend
+            codec = importlib.reload(jsoncodec)
+            if codec.BACKEND != backend:
+                continue  # not installed
+            compact = codec.dumps(backlog).encode("utf-8")
+            pretty = codec.dumps(backlog, pretty=True).encode("utf-8")
+            load = _best(lambda: codec.loads(compact), args.repeat)
+            dump = _best(lambda: codec.dumps(backlog), args.repeat)
+            dump_pretty = _best(lambda: codec.dumps(backlog, pretty=True), args.repeat)
+            print(f"| {backend} | {size} | {load * 1000:.1f} | {dump * 1000:.1f} | {dump_pretty * 1000:.1f} "
+                  f"| {len(compact) / 1024:.0f} | {len(pretty) / 1024:.0f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+scraper_bench.py -- Fetch engine of the API doc scraper against a local fixture site.
+
+Serves --pages generated documentation pages from http.server on localhost,
+each answered after --latency seconds, with every --throttle-every'th request
+answered 429 + Retry-After; pages carry an ETag and answer 304 to a matching
+If-None-Match. Builds the corpus the old way (one worker, 2 requests/s, i.e.
+the former fixed 0.5s delay, no cache), then with the concurrent engine on a
+cold cache, a warm cache (conditional GETs) and --resume from a complete
+checkpoint. Checks every corpus is identical and in CATEGORY_PRIORITY order,
+and prints a Markdown table of wall time and requests served.
+
+Needs the scraper's dependencies (requests, beautifulsoup4, lxml).
+
+Usage:
+    python scripts/benchmarks/scraper_bench.py [--pages 60] [--latency 0.05] [--concurrency 8] [--rate 20]
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "skills" / "api-doc-scraper" / "scripts"))
+import scrape_api_docs
+
+PAGE = """<html><head><title>{title}</title></head><body>
+<nav><a href="/">Home</a></nav>
+<main><h1>{title}</h1>
+<p>{title} is documented here with enough text to pass the main content check of the scraper.</p>
+<pre><code class="language-bash">curl https://api.example.com/{slug}</code></pre>
+<table><tr><th>Field</th><th>Type</th></tr><tr><td>id</td><td>string</td></tr></table>
+</main></body></html>"""
+
+
+class FixtureSite(BaseHTTPRequestHandler):
+    latency = 0.0
+    throttle_every = 0
+    lock = threading.Lock()
+    served = 0
+
+    def do_GET(self):
+        with self.lock:
+            FixtureSite.served += 1
+            n = FixtureSite.served
+        time.sleep(self.latency)
+        if self.throttle_every and n % self.throttle_every == 0:
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        slug = self.path.strip("/")
+        body = PAGE.format(title=slug.replace("-", " ").title(), slug=slug).encode()
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def nav_map(base: str, pages: int) -> list[dict]:
+    entries = [
+        {"title": f"Page {i}", "url": f"{base}/page-{i}", "category": scrape_api_docs.CATEGORY_PRIORITY[i % 10]}
+        for i in range(pages)
+    ]
+    random.Random(0).shuffle(entries)
+    return entries
+
+
+def run(entries: list[dict], **engine) -> tuple[str, float, int]:
+    FixtureSite.served = 0
+    start = time.perf_counter()
+    corpus = scrape_api_docs.build_corpus(entries, timeout=10, max_pages=len(entries), **engine)
+    return corpus, time.perf_counter() - start, FixtureSite.served
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds before the site answers")
+    parser.add_argument("--throttle-every", type=int, default=25, help="Answer every Nth request with 429 (0: never)")
+    parser.add_argument("--concurrency", type=int, default=scrape_api_docs.DEFAULT_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=20.0, help="Requests per second per host for the concurrent run")
+    args = parser.parse_args()
+
+    FixtureSite.latency = args.latency
+    FixtureSite.throttle_every = args.throttle_every
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureSite)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    entries = nav_map(f"http://127.0.0.1:{server.server_port}", args.pages)
+
+    print(f"{args.pages} pages, {args.latency * 1000:.0f} ms latency, 429 every {args.throttle_every} requests\n")
+    print("| engine | seconds | requests | pages/s |")
+    print("|---|---|---|---|")
+    corpora = []
+    with tempfile.TemporaryDirectory() as tmp:
+        concurrent = {"concurrency": args.concurrency, "rate": args.rate,
+                      "cache_dir": os.path.join(tmp, "cache"), "checkpoint_path": os.path.join(tmp, "checkpoint.json")}
+        for label, engine in (
+            ("sequential, 0.5 s apart", {"concurrency": 1, "rate": 2.0, "burst": 1}),
+            (f"{args.concurrency} workers, {args.rate:g}/s per host, cold cache", concurrent),
+            ("same, warm cache (conditional GET)", concurrent),
+            ("same, --resume from a complete checkpoint", {**concurrent, "resume": True}),
+        ):
+            corpus, seconds, served = run(entries, **engine)
+            corpora.append(corpus)
+            print(f"| {label} | {seconds:.2f} | {served} | {args.pages / seconds:.1f} |")
+    server.shutdown()
+
+    order = [line for line in corpora[1].splitlines() if line.startswith("## ")]
+    identical = all(corpus == corpora[0] for corpus in corpora)
+    print(f"\nidentical corpora: {identical}; section order: {', '.join(h[3:] for h in order)}")
+
+
+if __name__ == "__main__":
+    main()
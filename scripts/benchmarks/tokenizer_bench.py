@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+tokenizer_bench.py -- Throughput and accuracy of the chars and bpe tokenizer backends.
+
+Counts tokens over the markdown files under --root with each backend and
+prints a Markdown table: MB/s on a cold run, MB/s with the content-hash cache
+warm, total tokens, and how far the chars heuristic lands from the BPE count.
+
+The bpe backend needs a local vocab (e.g. cl100k_base.tiktoken). Without
+--vocab, a small byte-level vocab is trained from the corpus itself, which is
+enough to measure the encoder's throughput but not model-accurate counts.
+
+Usage:
+    python scripts/benchmarks/tokenizer_bench.py [--root .] [--vocab cl100k_base.tiktoken] [--merges 1000]
+"""
+
+import argparse
+import base64
+import glob
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "skills" / "shared" / "scripts"))
+import tokenizer
+
+
+def read_corpus(root: str) -> list[str]:
+    texts = []
+    for path in sorted(glob.glob(os.path.join(root, "**", "*.md"), recursive=True)):
+        try:
+            with open(path, encoding="utf-8") as f:
+                texts.append(f.read())
+        except (OSError, UnicodeDecodeError):
+            continue
+    return texts
+
+
+def train_vocab(texts: list[str], merges: int, top_words: int = 5000) -> dict:
+    """Byte-level BPE ranks: the 256 bytes, then `merges` learned pairs."""
+    freq = Counter(m.group().encode("utf-8") for t in texts for m in tokenizer.SPLIT_PATTERN.finditer(t))
+    words = [([w[i:i + 1] for i in range(len(w))], n) for w, n in freq.most_common(top_words)]
+    ranks = {bytes([b]): b for b in range(256)}
+    for _ in range(merges):
+        pairs = Counter()
+        for parts, n in words:
+            for a, b in zip(parts, parts[1:]):
+                pairs[a, b] += n
+        if not pairs:
+            break
+        (a, b), _ = pairs.most_common(1)[0]
+        ranks[a + b] = len(ranks)
+        for parts, _ in words:
+            i = 0
+            while i < len(parts) - 1:
+                if parts[i] == a and parts[i + 1] == b:
+                    parts[i:i + 2] = [a + b]
+                i += 1
+    return ranks
+
+
+def write_vocab(ranks: dict, path: str) -> None:
+    with open(path, "wb") as f:
+        for token, rank in sorted(ranks.items(), key=lambda kv: kv[1]):
+            f.write(base64.b64encode(token) + b" " + str(rank).encode() + b"\n")
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--root", default=str(Path(__file__).resolve().parents[2]), help="Corpus directory (*.md)")
+    parser.add_argument("--vocab", help="tiktoken-format vocab file; trained from the corpus if omitted")
+    parser.add_argument("--merges", type=int, default=1000, help="Merges to learn when training a vocab")
+    args = parser.parse_args()
+
+    texts = read_corpus(args.root)
+    mb = sum(len(t.encode("utf-8")) for t in texts) / 1e6
+    print(f"corpus: {len(texts)} files, {mb:.2f} MB\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vocab = args.vocab
+        if not vocab:
+            vocab = os.path.join(tmp, "trained.tiktoken")
+            ranks, secs = timed(lambda: train_vocab(texts, args.merges))
+            write_vocab(ranks, vocab)
+            print(f"trained {len(ranks)}-token vocab in {secs:.1f}s (throughput only, not model-accurate)\n")
+        tokenizer.COUNT_CACHE_DIR = tmp  # never touch the user's cache
+
+        print("| backend | encoder | cold MB/s | cached MB/s | tokens | chars/4 error |")
+        print("|---|---|---|---|---|---|")
+        totals = {}
+        for backend in tokenizer.BACKENDS:
+            tokenizer.configure(backend, vocab if backend == "bpe" else None)
+            encoder = type(tokenizer._encoder).__name__ if tokenizer._encoder else "-"
+            counts, cold = timed(lambda: tokenizer.count_batch(texts))
+            _, warm = timed(lambda: tokenizer.count_batch(texts))
+            totals[backend] = sum(counts)
+            error = ""
+            if backend == "bpe":
+                error = f"{(totals['chars'] - totals['bpe']) / totals['bpe'] * 100:+.1f}%"
+            print(f"| {backend} | {encoder} | {mb / cold:.1f} | {mb / warm:.1f} | {totals[backend]} | {error} |")
+
+
+if __name__ == "__main__":
+    main()
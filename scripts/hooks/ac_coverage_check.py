@@ -22,6 +22,12 @@ import subprocess
 import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "skills" / "shared" / "scripts"))
+try:
+    import jsoncodec
+except ImportError:
+    import json as jsoncodec
+
 
 def extract_keywords_from_ac(ac_text):
     """
@@ -58,52 +64,66 @@ def extract_keywords_from_ac(ac_text):
 
 def get_stories_from_backlog(backlog_script, backlog_path, status):
     """
-    Query stories from backlog using backlog_manager.py.
+    Stream stories from backlog using backlog_manager.py (NDJSON output).
     Falls back to direct JSON parsing if script execution fails.
     """
-    stories = []
-
     # Try using the backlog_manager.py script
+    yielded = False
     if os.path.exists(backlog_script):
+        proc = None
         try:
-            result = subprocess.run(
-                ['python3', backlog_script, 'list', '--status', status, '--format', 'json'],
-                capture_output=True,
+            proc = subprocess.Popen(
+                [sys.executable, backlog_script, 'list', backlog_path,
+                 '--status', status, '--format', 'ndjson',
+                 '--fields', 'id,title,acceptance_criteria'],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
                 text=True,
-                timeout=10
+                encoding='utf-8'
             )
-
-            if result.returncode == 0:
-                data = json.loads(result.stdout)
-                if 'stories' in data:
-                    return data['stories']
-                elif isinstance(data, list):
-                    return data
+            # Stories are yielded while the script is still writing
+            for line in proc.stdout:
+                if not line.strip():
+                    continue
+                item = jsoncodec.loads(line)
+                if item.get('end') is True and 'count' in item:
+                    return
+                yielded = True
+                yield item
+            raise EOFError("backlog_manager.py exited before the end of its story stream")
         except Exception as e:
-            # Fall back to direct JSON parsing
-            pass
+            # Fall back to direct JSON parsing unless stories were already streamed;
+            # a stream cut short must not pass for a complete (and clean) report
+            if yielded:
+                raise RuntimeError(f"Backlog stream broke after {backlog_script} started listing stories: {e}") from e
+        finally:
+            if proc is not None:
+                proc.stdout.close()
+                try:
+                    proc.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    proc.wait()
 
     # Fall back to direct JSON parsing
     if os.path.exists(backlog_path):
         try:
-            with open(backlog_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(backlog_path, 'rb') as f:
+                data = jsoncodec.load(f)
 
             if 'stories' in data:
                 stories = data['stories']
             elif isinstance(data, list):
                 stories = data
             else:
-                return []
+                return
 
             # Filter by status if needed
             filtered = [s for s in stories if s.get('status', '').lower() == status.lower()]
-            return filtered if filtered else stories
+            yield from (filtered if filtered else stories)
 
         except Exception as e:
-            return []
-
-    return stories
+            return
 
 
 def search_in_code(keywords, src_dir):
@@ -147,19 +167,10 @@ def check_ac_coverage(backlog_script, backlog_path, src_dir, status):
     """
     Main function to check acceptance criteria coverage.
     """
-    stories = get_stories_from_backlog(backlog_script, backlog_path, status)
-
-    if not stories:
-        return {
-            "status": "no_stories",
-            "message": f"No stories found with status '{status}'",
-            "stories": [],
-            "summary": "No stories to check"
-        }
-
     coverage_results = []
 
-    for story in stories:
+    # Each story is checked as soon as it is streamed from the backlog
+    for story in get_stories_from_backlog(backlog_script, backlog_path, status):
         story_id = story.get('id', story.get('title', 'Unknown'))
         title = story.get('title', 'Unknown')
         acs = story.get('acceptance_criteria', [])
@@ -197,6 +208,14 @@ def check_ac_coverage(backlog_script, backlog_path, src_dir, status):
             "uncovered_acs": uncovered_acs
         })
 
+    if not coverage_results:
+        return {
+            "status": "no_stories",
+            "message": f"No stories found with status '{status}'",
+            "stories": [],
+            "summary": "No stories to check"
+        }
+
     # Determine overall status
     total_stories = len(coverage_results)
     stories_with_gaps = len([s for s in coverage_results if len(s['uncovered_acs']) > 0])
@@ -241,7 +260,11 @@ def main():
         }), file=sys.stderr)
         sys.exit(1)
 
-    result = check_ac_coverage(args.backlog_script, args.backlog_path, args.src, args.status)
+    try:
+        result = check_ac_coverage(args.backlog_script, args.backlog_path, args.src, args.status)
+    except RuntimeError as e:
+        print(json.dumps({"error": str(e)}), file=sys.stderr)
+        sys.exit(1)
     print(json.dumps(result, indent=2))
 
 
@@ -20,6 +20,12 @@ import sys
 import os
 import re
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "skills", "shared", "scripts"))
+try:
+    import jsoncodec
+except ImportError:
+    import json as jsoncodec
+
 def find_project_root(current_path):
     """Find project root by looking for agent_docs/agency/STATE.json upward."""
     current = current_path if os.path.isdir(current_path) else os.path.dirname(current_path)
@@ -164,8 +170,8 @@ state_path = os.path.join(project_root, "agent_docs", "agency", "STATE.json")
 state_data = {}
 if os.path.exists(state_path):
     try:
-        with open(state_path, 'r') as f:
-            state_data = json.load(f)
+        with open(state_path, 'rb') as f:
+            state_data = jsoncodec.load(f)
     except (json.JSONDecodeError, IOError):
         # If STATE.json is malformed, allow
         sys.exit(0)
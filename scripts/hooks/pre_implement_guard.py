@@ -11,6 +11,12 @@ import sys
 import os
 import re
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "skills", "shared", "scripts"))
+try:
+    import jsoncodec
+except ImportError:
+    import json as jsoncodec
+
 def find_project_root(current_path):
     """Find project root by looking for agent_docs/agency/STATE.json upward."""
     current = current_path if os.path.isdir(current_path) else os.path.dirname(current_path)
@@ -30,8 +36,8 @@ def get_docs_path(project_root):
     state_path = os.path.join(project_root, "agent_docs", "agency", "STATE.json")
     if os.path.exists(state_path):
         try:
-            with open(state_path, 'r') as f:
-                state = json.load(f)
+            with open(state_path, 'rb') as f:
+                state = jsoncodec.load(f)
             dp = state.get("docs_path")
             if dp and os.path.isdir(dp):
                 return dp
@@ -7,6 +7,21 @@ Markdown corpus file. Runs outside the LLM context window to save tokens.
 
 Usage:
     python scrape_api_docs.py <nav-map.json> --output <corpus.md> [--timeout 15] [--max-pages 50]
+        [--concurrency 8] [--rate 4] [--burst 4] [--retries 3]
+        [--cache-dir <dir> | --no-cache] [--checkpoint <path>] [--resume]
+
+Pages are fetched on a thread pool through one pooled requests.Session. Each
+host gets a token bucket (--rate requests per second, bursts of --burst), and
+a 429/503 with Retry-After pauses that host for every worker. The corpus
+keeps CATEGORY_PRIORITY order regardless of which page finishes first.
+
+Responses are cached on disk (default ~/.cache/agency/api-doc-scraper): each
+URL's ETag/Last-Modified are replayed as a conditional GET, and the markdown
+extracted from a page is stored under the hash of its HTML, so a 304 or an
+unchanged body is never parsed again. Progress is checkpointed after every
+page (<output>.checkpoint.json) and the checkpoint is removed once the corpus
+is written; --resume skips the pages it lists as done, provided it was
+written for the same nav map.
 
 nav-map.json format:
     [
@@ -19,15 +34,22 @@ Valid categories: overview, auth, endpoints, models, errors, rate-limits, webhoo
 """
 
 import argparse
+import hashlib
 import json
+import os
 import re
 import sys
+import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 from urllib.parse import urljoin, urlparse
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
     from bs4 import BeautifulSoup, Tag
 except ImportError:
     print(
@@ -55,6 +77,19 @@ HEADERS = {
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
 }
 
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE = 4.0  # requests per second per host
+DEFAULT_BURST = 4
+DEFAULT_RETRIES = 3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE = 0.5
+MAX_RETRY_DELAY = 60.0  # longer Retry-After values are capped to this
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "agency", "api-doc-scraper",
+)
+
 
 # ---------------------------------------------------------------------------
 # HTML extraction helpers
@@ -213,7 +248,11 @@ def html_to_markdown(soup: BeautifulSoup) -> str:
 
 def extract_content(soup: BeautifulSoup, url: str, title: str, category: str) -> str:
     """Extract page content with a category-appropriate heading."""
-    md = html_to_markdown(soup)
+    return page_section(html_to_markdown(soup), url, title, category)
+
+
+def page_section(md: str, url: str, title: str, category: str) -> str:
+    """Wrap a page's converted markdown in its corpus heading and source line."""
     heading_map = {
         "auth": "Authentication",
         "errors": "Error Handling",
@@ -230,10 +269,113 @@ def extract_content(soup: BeautifulSoup, url: str, title: str, category: str) ->
 # Fetching
 # ---------------------------------------------------------------------------
 
-def fetch_page(url: str, timeout: int = 15) -> BeautifulSoup | None:
+class HostRateLimiter:
+    """Token bucket per host, shared by all fetch workers.
+
+    Each host refills at `rate` tokens per second up to `burst`; a request
+    takes one token. pause() empties a host's bucket until a deadline, so a
+    Retry-After seen by one worker holds back every worker on that host.
+    A rate of 0 disables limiting (pauses still apply).
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._lock = threading.Lock()
+        self._hosts: dict[str, list[float]] = {}  # host -> [tokens, last refill, paused until]
+
+    def _bucket(self, host: str, now: float) -> list[float]:
+        bucket = self._hosts.setdefault(host, [float(self.burst), now, 0.0])
+        if self.rate > 0:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        return bucket
+
+    def acquire(self, host: str) -> None:
+        """Block until a request to host is allowed."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                bucket = self._bucket(host, now)
+                if now >= bucket[2] and (self.rate <= 0 or bucket[0] >= 1):
+                    bucket[0] -= 1
+                    return
+                wait = max(bucket[2] - now, (1 - bucket[0]) / self.rate if self.rate > 0 else 0)
+            time.sleep(wait)
+
+    def pause(self, host: str, seconds: float) -> None:
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._bucket(host, now)
+            bucket[0] = min(bucket[0], 0.0)
+            bucket[2] = max(bucket[2], now + seconds)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(float(value), MAX_RETRY_DELAY)
+    try:
+        delay = parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+    return min(max(delay, 0.0), MAX_RETRY_DELAY)
+
+
+def make_session(concurrency: int = DEFAULT_CONCURRENCY) -> requests.Session:
+    """Session whose connection pool has room for every worker."""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=max(1, concurrency), pool_maxsize=max(1, concurrency))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch(url: str, timeout: int = 15, session: requests.Session | None = None,
+          limiter: HostRateLimiter | None = None, retries: int = DEFAULT_RETRIES,
+          headers: dict | None = None) -> requests.Response | None:
+    """GET a URL and return the final response, or None if it never arrived.
+
+    429 and 5xx responses and connection errors are retried up to `retries`
+    times, waiting for Retry-After when the server sends one and backing off
+    exponentially otherwise.
+    """
+    client = session or requests
+    host = urlparse(url).netloc
+    for attempt in range(retries + 1):
+        if limiter:
+            limiter.acquire(host)
+        delay = min(BACKOFF_BASE * 2 ** attempt, MAX_RETRY_DELAY)
+        try:
+            resp = client.get(url, headers={**HEADERS, **(headers or {})}, timeout=timeout, allow_redirects=True)
+        except requests.RequestException as e:
+            if attempt == retries:
+                print(f"  WARN: Failed to fetch {url}: {e}", file=sys.stderr)
+                return None
+            time.sleep(delay)
+            continue
+        if resp.status_code in RETRY_STATUSES and attempt < retries:
+            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            if retry_after is not None and limiter:
+                limiter.pause(host, retry_after)
+            else:
+                time.sleep(delay if retry_after is None else retry_after)
+            continue
+        return resp
+    return None
+
+
+def fetch_page(url: str, timeout: int = 15, session: requests.Session | None = None,
+               limiter: HostRateLimiter | None = None, retries: int = DEFAULT_RETRIES) -> BeautifulSoup | None:
     """Fetch a URL and return parsed BeautifulSoup, or None on failure."""
+    resp = fetch(url, timeout, session, limiter, retries)
+    if resp is None:
+        return None
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=timeout, allow_redirects=True)
         resp.raise_for_status()
         return BeautifulSoup(resp.text, "lxml")
     except Exception as e:
@@ -242,11 +384,138 @@ def fetch_page(url: str, timeout: int = 15) -> BeautifulSoup | None:
 
 
 # ---------------------------------------------------------------------------
-# Corpus assembly
+# Response cache and crawl checkpoint
 # ---------------------------------------------------------------------------
 
-def build_corpus(nav_map: list[dict], timeout: int, max_pages: int) -> str:
-    """Fetch all pages and assemble into a structured Markdown corpus."""
+def _write_atomic(path: Path, text: str) -> None:
+    """Write via a temp file in the same directory, then rename over path."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class PageCache:
+    """On-disk cache shared by runs.
+
+    responses/<url hash>.json   ETag, Last-Modified and HTML hash of a URL's last 200
+    pages/<html hash>.md        markdown converted from that HTML
+
+    Workers only ever write whole files through renames, so concurrent
+    writers and interrupted runs never leave a partial entry.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def _response_path(self, url: str) -> Path:
+        return self.directory / "responses" / f"{hashlib.sha256(url.encode()).hexdigest()[:32]}.json"
+
+    def response(self, url: str) -> dict | None:
+        try:
+            with open(self._response_path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def markdown(self, html_hash: str) -> str | None:
+        try:
+            with open(self.directory / "pages" / f"{html_hash}.md", "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def store(self, url: str, resp: requests.Response, html_hash: str, md: str) -> None:
+        page = self.directory / "pages" / f"{html_hash}.md"
+        if not page.exists():
+            _write_atomic(page, md)
+        _write_atomic(self._response_path(url), json.dumps({
+            "url": url,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "html_hash": html_hash,
+        }))
+
+
+def nav_map_hash(nav_map: list[dict]) -> str:
+    return hashlib.sha256(json.dumps(nav_map, sort_keys=True).encode()).hexdigest()
+
+
+def load_checkpoint(path: Path, nav_hash: str) -> dict:
+    """Read a checkpoint, ignoring one written for a different nav map."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return {"nav_map": nav_hash, "pages": {}}
+    if checkpoint.get("nav_map") != nav_hash:
+        print(f"  WARN: {path} was written for a different nav map; starting over", file=sys.stderr)
+        return {"nav_map": nav_hash, "pages": {}}
+    checkpoint.setdefault("pages", {})
+    return checkpoint
+
+
+def _fetch_entry(entry: dict, timeout: int, session: requests.Session, limiter: HostRateLimiter,
+                 retries: int, cache: PageCache | None, done: dict | None) -> tuple[str, str, str] | None:
+    """Fetch and convert one nav-map entry (runs on a worker thread).
+
+    Returns (html hash, markdown, how) or None on failure, how being
+    "resumed" (done in the checkpoint), "not_modified" (304),
+    "unchanged" (same HTML as cached) or "converted".
+    """
+    url = entry["url"]
+    if cache and done and done.get("html_hash"):
+        md = cache.markdown(done["html_hash"])
+        if md is not None:
+            return done["html_hash"], md, "resumed"
+
+    cached = cache.response(url) if cache else None
+    cached_md = cache.markdown(cached["html_hash"]) if cached else None
+    headers = {}
+    if cached_md is not None:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    resp = fetch(url, timeout, session, limiter, retries, headers)
+    if resp is None:
+        return None
+    if resp.status_code == 304 and cached_md is not None:
+        return cached["html_hash"], cached_md, "not_modified"
+    try:
+        resp.raise_for_status()
+    except Exception as e:
+        print(f"  WARN: Failed to fetch {url}: {e}", file=sys.stderr)
+        return None
+
+    html_hash = hashlib.sha256(resp.content).hexdigest()
+    md = cache.markdown(html_hash) if cache else None
+    how = "unchanged"
+    if md is None:
+        md = html_to_markdown(BeautifulSoup(resp.text, "lxml"))
+        how = "converted"
+    if cache:
+        cache.store(url, resp, html_hash, md)
+    return html_hash, md, how
+
+
+def build_corpus(nav_map: list[dict], timeout: int, max_pages: int,
+                 concurrency: int = DEFAULT_CONCURRENCY, rate: float = DEFAULT_RATE,
+                 burst: int = DEFAULT_BURST, retries: int = DEFAULT_RETRIES,
+                 cache_dir: str | None = None, checkpoint_path: str | None = None,
+                 resume: bool = False) -> str:
+    """Fetch all pages and assemble into a structured Markdown corpus.
+
+    With cache_dir, pages are fetched conditionally and only converted when
+    their HTML changed. With checkpoint_path, each finished page is recorded
+    as it completes; resume skips the ones already recorded as done.
+    """
     # Sort by category priority
     priority = {cat: i for i, cat in enumerate(CATEGORY_PRIORITY)}
     sorted_entries = sorted(nav_map, key=lambda e: priority.get(e.get("category", "other"), 99))
@@ -260,31 +529,72 @@ def build_corpus(nav_map: list[dict], timeout: int, max_pages: int) -> str:
         )
         sorted_entries = sorted_entries[:max_pages]
 
-    sections: dict[str, list[str]] = {}
     stats = {"total": len(sorted_entries), "fetched": 0, "failed": 0}
-
-    for i, entry in enumerate(sorted_entries, 1):
-        url = entry["url"]
-        title = entry.get("title", "")
-        category = entry.get("category", "other")
-
-        print(f"  [{i}/{stats['total']}] Fetching: {title or url} ({category})", file=sys.stderr)
-
-        soup = fetch_page(url, timeout)
-        if not soup:
-            stats["failed"] += 1
-            continue
-        stats["fetched"] += 1
-
-        content = extract_content(soup, url, title, category)
-
-        if category not in sections:
-            sections[category] = []
-        sections[category].append(content)
-
-        # Polite delay between requests
-        if i < stats["total"]:
-            time.sleep(0.5)
+    limiter = HostRateLimiter(rate, burst)
+    cache = PageCache(cache_dir) if cache_dir else None
+    checkpoint_file = Path(checkpoint_path) if checkpoint_path else None
+    nav_hash = nav_map_hash(nav_map)
+    if checkpoint_file and resume:
+        checkpoint = load_checkpoint(checkpoint_file, nav_hash)
+    else:
+        checkpoint = {"nav_map": nav_hash, "pages": {}}
+    done_pages = checkpoint["pages"]
+    outcomes = dict.fromkeys(("resumed", "not_modified", "unchanged", "converted"), 0)
+    pages: list[str | None] = [None] * len(sorted_entries)
+
+    def record(i: int, result) -> None:
+        entry = sorted_entries[i]
+        if result:
+            html_hash, md, how = result
+            pages[i] = page_section(md, entry["url"], entry.get("title", ""), entry.get("category", "other"))
+            outcomes[how] += 1
+            done_pages[entry["url"]] = {"html_hash": html_hash, "status": "done"}
+        else:
+            done_pages[entry["url"]] = {"status": "failed"}
+        stats["fetched" if result else "failed"] += 1
+        status = result[2].replace("_", " ").capitalize() if result else "Failed"
+        print(f"  [{stats['fetched'] + stats['failed']}/{stats['total']}] {status}: "
+              f"{entry.get('title') or entry['url']} ({entry.get('category', 'other')})", file=sys.stderr)
+
+    def save_checkpoint() -> None:
+        if checkpoint_file:
+            _write_atomic(checkpoint_file, json.dumps(checkpoint))
+
+    # The pool is shut down by hand: on Ctrl-C, leaving a `with` block would
+    # wait for every queued page to be fetched and then drop them all
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    with make_session(concurrency) as session:
+        futures = {
+            pool.submit(_fetch_entry, entry, timeout, session, limiter, retries, cache,
+                        done_pages.get(entry["url"]) if resume else None): i
+            for i, entry in enumerate(sorted_entries)
+        }
+        recorded = set()
+        try:
+            for future in as_completed(futures):
+                recorded.add(future)
+                record(futures[future], future.result())
+                # Written from this thread only, after every page, so an
+                # interrupt loses at most the pages in flight
+                save_checkpoint()
+        except BaseException:
+            pool.shutdown(wait=True, cancel_futures=True)
+            # Pages that were in flight have finished by now; keep them for --resume
+            for future, i in futures.items():
+                if (future not in recorded and future.done() and not future.cancelled()
+                        and not future.exception()):
+                    record(i, future.result())
+            save_checkpoint()
+            raise
+        pool.shutdown()
+
+    print("  Pages: " + ", ".join(f"{n} {how.replace('_', ' ')}" for how, n in outcomes.items()), file=sys.stderr)
+
+    # Completion order does not matter: pages go back in nav-map priority order
+    sections: dict[str, list[str]] = {}
+    for entry, content in zip(sorted_entries, pages):
+        if content:
+            sections.setdefault(entry.get("category", "other"), []).append(content)
 
     # Assemble corpus
     corpus_parts = []
@@ -329,6 +639,21 @@ def main():
     parser.add_argument("--output", "-o", required=True, help="Output corpus Markdown file path")
     parser.add_argument("--timeout", type=int, default=15, help="HTTP request timeout in seconds (default: 15)")
     parser.add_argument("--max-pages", type=int, default=50, help="Maximum pages to fetch (default: 50)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Pages fetched in parallel (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help=f"Requests per second per host, 0 for no limit (default: {DEFAULT_RATE})")
+    parser.add_argument("--burst", type=int, default=DEFAULT_BURST,
+                        help=f"Requests a host may receive back to back (default: {DEFAULT_BURST})")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help=f"Retries for 429/5xx responses and connection errors (default: {DEFAULT_RETRIES})")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"Response and converted-page cache (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true", help="Fetch and convert every page unconditionally")
+    parser.add_argument("--checkpoint", help="Crawl checkpoint file, removed once the corpus is written "
+                                             "(default: <output>.checkpoint.json)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip pages the checkpoint lists as done (their markdown comes from the cache)")
     args = parser.parse_args()
 
     nav_map_path = Path(args.nav_map)
@@ -354,12 +679,17 @@ def main():
             entry["title"] = ""
 
     print(f"Scraping {len(nav_map)} pages...", file=sys.stderr)
-    corpus = build_corpus(nav_map, args.timeout, args.max_pages)
+    checkpoint = args.checkpoint or f"{args.output}.checkpoint.json"
+    corpus = build_corpus(nav_map, args.timeout, args.max_pages,
+                          args.concurrency, args.rate, args.burst, args.retries,
+                          None if args.no_cache else args.cache_dir, checkpoint, args.resume)
 
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     with open(output_path, "w", encoding="utf-8") as f:
         f.write(corpus)
+    # The crawl is complete; the checkpoint only matters to an interrupted one
+    Path(checkpoint).unlink(missing_ok=True)
 
     # Print stats to stdout for Claude to capture
     line_count = corpus.count("\n") + 1
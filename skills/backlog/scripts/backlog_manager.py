@@ -21,32 +21,70 @@ Commands:
              --caller <po|pm|tl|dev|qa>
 
     list     <backlog_path> [--status <status>] [--feature <area>] [--priority <priority>]
-             [--format <json|table|summary>] [--fields <field1,field2,...>]
-             [--limit <N>] [--offset <N>]
+             [--format <json|table|summary|ndjson>] [--fields <field1,field2,...>]
+             [--limit <N>] [--offset <N>] [--after <US-XXX>] [--include-archived]
 
-    get      <backlog_path> --id <US-XXX>
+    get      <backlog_path> --id <US-XXX>  (falls back to the archive)
+
+    changes  <backlog_path> --since <seq> [--limit <N>] [--fields <field1,field2,...>]
+             (stories created/edited/transitioned/deleted/archived after seq)
+
+    search   <backlog_path> --query <text> [--in <field1,field2,...>] [--status <status>]
+             [--feature <area>] [--priority <priority>] [--limit <K>] [--rebuild]
+             (BM25-ranked full-text search over title, want, benefit, notes, ACs)
 
     delete   <backlog_path> --id <US-XXX> --caller <po|pm|tl|dev|qa>
 
     init     <backlog_path>  (creates empty backlog structure)
 
-    render   <backlog_path> --output <BACKLOG.md path>  (generates markdown summary)
+    render   <backlog_path> --output <BACKLOG.md path> [--max-nodes <N>]  (generates markdown summary)
 
-    stats    <backlog_path>  (returns aggregate counts by status, priority, feature)
+    stats    <backlog_path> [--all] [--verify [--repair]]
+             (returns aggregate counts by status, priority, feature)
+
+    archive  <backlog_path> --caller <po|pm> [--older-than-days <N>] [--before <ISO-8601>]
+             [--dry-run]  (moves Done/Cancelled stories to the gzip archive)
 
     question <backlog_path> --text <question_text> --caller <po|pm|tl|dev|qa>
              [--id <Q-XXX>] [--answer <answer_text>] [--resolve]
 
-    next-id  <backlog_path>  (returns next available US-XXX id)
+    next-id  <backlog_path>  (returns next available US-XXX id, without reserving it)
+
+    reserve-ids  <backlog_path> --count <N> --caller <po|pm>
+             (atomically reserves N consecutive ids)
+
+    batch-create <backlog_path> --input <stories.json|-> --caller <po|pm>
+             (validates every story, then creates them all in one write)
+
+    import   <backlog_path> --input <file.jsonl|file.csv|-> --caller <po|pm>
+             [--format <jsonl|csv>] [--mode <upsert|create>] [--dry-run]
+             (streams rows, reports per-row errors, commits accepted rows at once)
+
+    export   <backlog_path> [--output <file.jsonl|file.csv>] [--format <jsonl|csv>]
+             [--fields <field1,field2,...>] [--status <status>] [--feature <area>]
+             [--priority <priority>] [--include-archived]
 """
 
 import argparse
+import csv
+import gzip
+import heapq
+import itertools
 import json
+import math
 import os
+import re
 import sys
-from datetime import datetime, timezone
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "shared" / "scripts"))
+import casfile
+import jsoncodec
+from casfile import ConflictError
+
 # --- Access Control ---
 
 PERMISSIONS = {
@@ -55,6 +93,7 @@ PERMISSIONS = {
     "status": ["po", "pm", "tl", "dev", "qa"],
     "delete": ["po", "pm"],
     "question": ["po", "pm", "tl", "dev", "qa"],
+    "archive": ["po", "pm"],
 }
 
 VALID_STATUSES = [
@@ -72,6 +111,24 @@ VALID_STATUSES = [
 
 VALID_PRIORITIES = ["Must", "Should", "Could", "Won't"]
 
+# Stories in these statuses never change again and can move to the archive tier
+TERMINAL_STATUSES = ["Done", "Cancelled"]
+IN_FLIGHT_STATUSES = ["In Progress", "In Review", "In Testing"]
+ARCHIVE_SUFFIX = ".archive.jsonl.gz"
+ARCHIVE_DEFAULT_DAYS = 14
+INDEX_SUFFIX = ".index.json"
+INDEX_COMPACT_ENTRIES = 200
+CHANGES_SUFFIX = ".changes.jsonl"
+CHANGES_MAX_BYTES = 4 * 1024 * 1024
+CHANGES_MAX_PER_ENTRY = 1000
+IMPORT_MAX_REPORTED_ERRORS = 100
+RENDER_MAX_NODES = 80
+RENDER_MAX_CYCLE_EDGES = 2000
+# Searchable fields and their BM25 weight
+SEARCH_FIELDS = {"title": 3.0, "want": 2.0, "benefit": 1.0, "acceptance_criteria": 1.5, "notes": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
 
 def check_permission(command: str, caller: str) -> bool:
     if command not in PERMISSIONS:
@@ -81,35 +138,597 @@ def check_permission(command: str, caller: str) -> bool:
 
 # --- Backlog I/O ---
 
+# Optimistic concurrency (see skills/shared/scripts/casfile.py): every write
+# bumps metadata.revision and commits only if the on-disk revision is still the
+# one that was loaded. transact() re-applies the mutation to the fresh document
+# on conflict, which is safe for the commutative operations agents run in
+# parallel (status changes, history appends, edits of different stories).
+
 
 def load_backlog(path: str) -> dict:
     p = Path(path)
     if not p.exists():
         return create_empty_backlog()
+    with open(p, "rb") as f:
+        return jsoncodec.load(f)
+
+
+def load_metadata(path: str) -> dict:
+    """Parse only the leading metadata object, without decoding any story."""
+    p = Path(path)
+    if not p.exists():
+        return create_empty_backlog()["metadata"]
+    decoder = json.JSONDecoder()
+    buf = ""
     with open(p, "r", encoding="utf-8") as f:
-        return json.load(f)
+        while True:
+            chunk = f.read(65536)
+            buf += chunk
+            match = re.match(r'\s*\{\s*"metadata"\s*:\s*', buf)
+            if not match:
+                break
+            try:
+                return decoder.raw_decode(buf, match.end())[0]
+            except json.JSONDecodeError:
+                if not chunk:
+                    break
+    return load_backlog(path)["metadata"]
+
 
+def iter_stories(path: str):
+    """Yield stories one at a time, holding only a small read buffer in memory.
 
-def save_backlog(path: str, data: dict):
+    Decodes the stories array element by element. Falls back to a full load
+    if the document does not start with metadata followed by stories.
+    """
     p = Path(path)
-    p.parent.mkdir(parents=True, exist_ok=True)
-    data["metadata"]["updated_at"] = datetime.now(timezone.utc).isoformat()
-    with open(p, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    if not p.exists():
+        return
+    decoder = json.JSONDecoder()
+    ws = re.compile(r"[\s,]*")
+    with open(p, "r", encoding="utf-8") as f:
+        buf = f.read(65536)
+        head = re.match(r'\s*\{\s*"metadata"\s*:\s*', buf)
+        idx = head.end() if head else 0
+        stage = "metadata" if head else "fallback"
+        while stage != "fallback":
+            try:
+                if stage == "metadata":
+                    _, idx = decoder.raw_decode(buf, idx)
+                    key = re.compile(r'\s*,\s*"stories"\s*:\s*\[').match(buf, idx)
+                    if not key:
+                        stage = "fallback"
+                        break
+                    idx, stage = key.end(), "stories"
+                    continue
+                idx = ws.match(buf, idx).end()
+                if buf.startswith("]", idx):
+                    return
+                if idx >= len(buf):
+                    raise json.JSONDecodeError("need more data", buf, idx)
+                story, idx = decoder.raw_decode(buf, idx)
+                yield story
+                if idx > 65536:
+                    buf, idx = buf[idx:], 0
+            except json.JSONDecodeError:
+                chunk = f.read(65536)
+                if not chunk:
+                    stage = "fallback"
+                    break
+                buf += chunk
+    if stage == "fallback":
+        yield from load_backlog(path)["stories"]
+
+
+def save_backlog(path: str, data: dict, changes: list[dict] = None, prepare=None):
+    """Compare-and-swap write: raises ConflictError if the file moved on since load.
+
+    On success the new revision and ``changes`` are appended to the change feed
+    while the commit marker is still held, so feed entries land in order.
+    ``prepare`` is passed to casfile.save.
+    """
+    casfile.save(path, data, "metadata", prepare=prepare,
+                 on_commit=lambda: _append_changes(path, data, changes or []))
+
+
+def transact(path: str, mutate, changes=None, prepare=None):
+    """Load, mutate and save the backlog, rebasing the mutation on conflict.
+
+    ``mutate(data)`` must derive everything it writes from ``data`` so it can be
+    re-applied to a fresher document. Its return value is passed through.
+    ``changes(data, result)`` describes the mutation for the change feed, and
+    ``prepare(data, result)`` runs under the commit marker before the replace.
+    """
+    return casfile.transact(
+        path, load_backlog, mutate,
+        lambda p, data, result: save_backlog(
+            p, data, changes(data, result) if changes else None,
+            (lambda: prepare(data, result)) if prepare else None),
+    )
+
+
+# --- Change feed ---
+#
+# Every committed revision appends one line to backlog.changes.jsonl:
+# {"seq": <revision>, "at": ..., "changes": [{"op", "id", "by", ...}]}.
+# Ops are created, edited, status_change, deleted and archived. Entries for
+# stories that still exist carry a snapshot without history. Revisions that
+# touch no story (questions, counter repair) are logged with an empty list,
+# so the sequence has no holes. The feed keeps roughly the newest
+# CHANGES_MAX_BYTES. A revision with more than CHANGES_MAX_PER_ENTRY changes
+# (a bulk import) is logged as {"seq", "at", "changes": [], "truncated": N}
+# and acts as a gap. A consumer whose cursor is older than the oldest
+# retained entry, or behind a truncated one, is told to reset, meaning
+# reload a full snapshot.
+
+REMOVAL_OPS = ("deleted", "archived")
+_SEQ_RE = re.compile(r'\{"seq":\s*(\d+)')
+
+
+def changes_path(backlog_path: str) -> Path:
+    p = Path(backlog_path)
+    return p.with_name(p.stem + CHANGES_SUFFIX)
+
+
+def _append_changes(backlog_path: str, data: dict, changes: list[dict]):
+    wanted = set()
+    if len(changes) <= CHANGES_MAX_PER_ENTRY:
+        wanted = {c["id"] for c in changes if c["op"] not in REMOVAL_OPS}
+    stories = {s["id"]: s for s in data["stories"] if s["id"] in wanted} if wanted else {}
+    records = []
+    for change in changes:
+        record = dict(change)
+        if change["id"] in stories:
+            record["story"] = {k: v for k, v in stories[change["id"]].items() if k != "history"}
+        records.append(record)
+    entry = {"seq": data["metadata"]["revision"], "at": data["metadata"]["updated_at"], "changes": records}
+    if len(records) > CHANGES_MAX_PER_ENTRY:
+        entry["changes"], entry["truncated"] = [], len(records)
+    p = changes_path(backlog_path)
+    try:
+        if p.exists() and p.stat().st_size > CHANGES_MAX_BYTES:
+            _trim_changes(p)
+        with open(p, "a", encoding="utf-8") as f:
+            f.write(jsoncodec.dumps(entry) + "\n")
+    except OSError:
+        pass  # a missing entry shows up as a gap; consumers reset
+
+
+def _trim_changes(p: Path):
+    """Keep the newest half of the feed (by size). Called under the commit marker."""
+    with open(p, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    kept, size = [], 0
+    for line in reversed(lines):
+        size += len(line)
+        if size > CHANGES_MAX_BYTES // 2:
+            break
+        kept.append(line)
+    fd, tmp = tempfile.mkstemp(dir=p.parent, prefix=".tmp_", suffix=".jsonl")
+    os.chmod(tmp, casfile.target_mode(p))
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.writelines(reversed(kept))
+    os.replace(tmp, p)
+
+
+def iter_changes(backlog_path: str, since: int):
+    """Yield feed entries with seq > since, in order, stopping at the first gap
+    or truncated (bulk) entry.
+
+    The first yielded entry may start after since + 1 if the feed was trimmed;
+    callers compare against since to detect that.
+    """
+    p = changes_path(backlog_path)
+    if not p.exists():
+        return
+    expected = None
+    with open(p, "r", encoding="utf-8") as f:
+        for line in f:
+            match = _SEQ_RE.match(line)
+            if not match or int(match.group(1)) <= since:
+                continue
+            seq = int(match.group(1))
+            if expected is not None and seq != expected:
+                return
+            try:
+                entry = jsoncodec.loads(line)
+            except json.JSONDecodeError:
+                return  # torn tail
+            if entry.get("truncated"):
+                return
+            yield entry
+            expected = seq + 1
 
 
 def create_empty_backlog() -> dict:
     return {
         "metadata": {
             "version": "1.0",
+            "revision": 0,
             "created_at": datetime.now(timezone.utc).isoformat(),
             "updated_at": datetime.now(timezone.utc).isoformat(),
+            "id_high_water": 0,
+            "aggregates": recount_aggregates([]),
         },
         "stories": [],
         "questions": [],
     }
 
 
+# --- Aggregate counters ---
+#
+# metadata.aggregates is a materialized view of the counts `stats` reports.
+# Every mutation removes the story's old contribution and adds the new one,
+# so readers get the counts from the metadata header alone. `stats --verify`
+# checks the block against a full recount.
+
+
+def recount_aggregates(stories: list[dict]) -> dict:
+    agg = {"total": 0, "by_status": {}, "by_priority": {}, "by_feature": {}, "in_flight": 0, "blocked": 0}
+    for s in stories:
+        _count_story(agg, s, 1)
+    return agg
+
+
+def _bump(counter: dict, key: str, delta: int):
+    n = counter.get(key, 0) + delta
+    if n:
+        counter[key] = n
+    else:
+        counter.pop(key, None)
+
+
+def _count_story(agg: dict, story: dict, delta: int):
+    """Add (delta=1) or remove (delta=-1) a story's contribution to the aggregates."""
+    status = story.get("status", "Unknown")
+    agg["total"] += delta
+    _bump(agg["by_status"], status, delta)
+    _bump(agg["by_priority"], story.get("priority", "Unknown"), delta)
+    _bump(agg["by_feature"], story.get("feature_area", "Uncategorized"), delta)
+    if status in IN_FLIGHT_STATUSES:
+        agg["in_flight"] += delta
+    if status == "Blocked":
+        agg["blocked"] += delta
+
+
+def _aggregates(data: dict) -> dict:
+    """Return the maintained aggregate block, building it for older backlogs.
+
+    Call before mutating stories so a freshly built block reflects the old state.
+    """
+    meta = data["metadata"]
+    if "aggregates" not in meta:
+        meta["aggregates"] = recount_aggregates(data["stories"])
+    return meta["aggregates"]
+
+
+# --- Archive tier ---
+#
+# Terminal stories are moved out of backlog.json into a gzip JSON Lines file
+# next to it (backlog.archive.jsonl.gz). Each archive run appends a new gzip
+# member, so archiving never rewrites old entries. Readers only open the
+# archive when explicitly asked to (list --include-archived, stats --all, or
+# a get miss). If the same id appears more than once, the last entry wins,
+# and a story still present in backlog.json always shadows its archived copy.
+
+
+def archive_path(backlog_path: str) -> Path:
+    p = Path(backlog_path)
+    return p.with_name(p.stem + ARCHIVE_SUFFIX)
+
+
+def iter_archived(backlog_path: str):
+    """Yield archived stories one line at a time."""
+    p = archive_path(backlog_path)
+    if not p.exists():
+        return
+    with gzip.open(p, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield jsoncodec.loads(line)
+
+
+def load_archived(backlog_path: str, exclude_ids: set = None) -> dict:
+    """Return archived stories keyed by id (last entry wins), skipping exclude_ids."""
+    archived = {}
+    for story in iter_archived(backlog_path):
+        if exclude_ids and story["id"] in exclude_ids:
+            continue
+        archived[story["id"]] = story
+    return archived
+
+
+# --- Search index ---
+#
+# An inverted index over SEARCH_FIELDS lives next to the backlog
+# (backlog.index.json). Each posting list is a single string of " id:tf"
+# entries. Only the query's own terms get decoded, and a story can be removed
+# from a list with a substring cut, which keeps both load and update cheap on
+# large backlogs. Each doc entry keeps the story's field lengths (for BM25),
+# its filterable fields and the terms it was indexed under.
+#
+# The index is stamped with the backlog revision it reflects. Mutations never
+# rewrite it. `search` replays the change feed entries newer than the stamp
+# and persists the index once more than INDEX_COMPACT_ENTRIES were applied.
+# If the feed cannot bridge the gap, only the stories whose updated_at
+# changed are re-tokenized. Only active stories are indexed.
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have i in is it its of on or so "
+    "that the then this to was when will with".split()
+)
+
+
+def index_path(backlog_path: str) -> Path:
+    p = Path(backlog_path)
+    return p.with_name(p.stem + INDEX_SUFFIX)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens without stopwords; a trailing plural 's' is folded."""
+    tokens = []
+    for t in _TOKEN_RE.findall(text.lower()):
+        if t in _STOPWORDS or (len(t) == 1 and not t.isdigit()):
+            continue
+        if len(t) > 3 and t.endswith("s") and not t.endswith("ss"):
+            t = t[:-1]
+        tokens.append(t)
+    return tokens
+
+
+def _field_text(story: dict, field: str) -> str:
+    value = story.get(field) or ""
+    if field == "acceptance_criteria":
+        parts = []
+        for ac in value:
+            parts.extend(ac.values() if isinstance(ac, dict) else [ac])
+        return " ".join(str(part) for part in parts)
+    return str(value)
+
+
+def create_empty_index() -> dict:
+    return {
+        "version": 1,
+        "revision": -1,
+        "docs": {},
+        "field_lengths": {f: 0 for f in SEARCH_FIELDS},
+        "postings": {f: {} for f in SEARCH_FIELDS},
+    }
+
+
+def load_index(backlog_path: str):
+    """Return the persisted index, or None if it is missing or unreadable."""
+    p = index_path(backlog_path)
+    if not p.exists():
+        return None
+    try:
+        with open(p, "rb") as f:
+            idx = jsoncodec.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return idx if idx.get("version") == 1 else None
+
+
+def _save_index(backlog_path: str, idx: dict):
+    # The index is derived data: a failed write only costs a reconcile later
+    p = index_path(backlog_path)
+    tmp = None
+    try:
+        fd, tmp = tempfile.mkstemp(dir=p.parent, prefix=".tmp_", suffix=".json")
+        os.chmod(tmp, casfile.target_mode(p))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(jsoncodec.dumps(idx))
+        os.replace(tmp, p)
+    except OSError:
+        if tmp and os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def _index_remove(idx: dict, story_id: str):
+    doc = idx["docs"].pop(story_id, None)
+    if not doc:
+        return
+    needle = f" {story_id}:"
+    for field, terms in doc["terms"].items():
+        postings = idx["postings"][field]
+        for term in terms.split():
+            plist = postings.get(term, "")
+            i = plist.find(needle)
+            if i < 0:
+                continue
+            j = plist.find(" ", i + 1)
+            plist = plist[:i] + (plist[j:] if j >= 0 else "")
+            if plist:
+                postings[term] = plist
+            else:
+                del postings[term]
+        idx["field_lengths"][field] -= doc["len"][field]
+
+
+def _index_add(idx: dict, story: dict, pending: dict = None):
+    """Index one story. With ``pending``, posting entries are buffered per
+    (field, term) for `_flush_pending` instead of being appended one by one.
+    """
+    sid = story["id"]
+    _index_remove(idx, sid)
+    doc = {k: story.get(k) for k in ("title", "status", "priority", "feature_area", "updated_at")}
+    doc["len"], doc["terms"] = {}, {}
+    for field in SEARCH_FIELDS:
+        tokens = tokenize(_field_text(story, field))
+        tf = {}
+        for t in tokens:
+            tf[t] = tf.get(t, 0) + 1
+        postings = idx["postings"][field]
+        for t, n in tf.items():
+            if pending is None:
+                postings[t] = postings.get(t, "") + f" {sid}:{n}"
+            else:
+                pending.setdefault((field, t), []).append(f" {sid}:{n}")
+        doc["len"][field] = len(tokens)
+        doc["terms"][field] = " ".join(tf)
+        idx["field_lengths"][field] += len(tokens)
+    idx["docs"][sid] = doc
+
+
+def _flush_pending(idx: dict, pending: dict):
+    for (field, term), entries in pending.items():
+        postings = idx["postings"][field]
+        postings[term] = postings.get(term, "") + "".join(entries)
+    pending.clear()
+
+
+def _replay_changes(backlog_path: str, idx: dict) -> int:
+    """Apply change feed entries newer than the index; return how many were applied."""
+    applied = 0
+    for entry in iter_changes(backlog_path, idx["revision"]):
+        if entry["seq"] != idx["revision"] + 1:
+            break
+        for change in entry["changes"]:
+            if change["op"] in REMOVAL_OPS or "story" not in change:
+                _index_remove(idx, change["id"])
+            else:
+                _index_add(idx, change["story"])
+        idx["revision"] = entry["seq"]
+        applied += 1
+    return applied
+
+
+def refresh_index(backlog_path: str, rebuild: bool = False) -> dict:
+    """Return an index matching the backlog's current revision.
+
+    Replays the change feed first; if the backlog is still ahead (feed gap,
+    missing or rebuilt index), reconciles against the stories themselves.
+    """
+    revision = casfile.read_revision(backlog_path, "metadata")
+    idx = None if rebuild else load_index(backlog_path)
+    if idx is None:
+        idx = create_empty_index()
+    applied = _replay_changes(backlog_path, idx) if idx["revision"] >= 0 else 0
+    if idx["revision"] == revision:
+        if applied > INDEX_COMPACT_ENTRIES:
+            _save_index(backlog_path, idx)
+        return idx
+
+    seen = set()
+    pending = {}
+    for story in iter_stories(backlog_path):
+        seen.add(story["id"])
+        doc = idx["docs"].get(story["id"])
+        if doc is None or doc.get("updated_at") != story.get("updated_at"):
+            _index_add(idx, story, pending)
+    _flush_pending(idx, pending)
+    for sid in [sid for sid in idx["docs"] if sid not in seen]:
+        _index_remove(idx, sid)
+    idx["revision"] = revision
+    _save_index(backlog_path, idx)
+    return idx
+
+
+def search_index(idx: dict, query: str, fields: list[str], filters: dict, limit: int):
+    """BM25 over the selected fields (weighted by SEARCH_FIELDS).
+
+    Returns (top results, total number of matching stories).
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    docs = idx["docs"]
+    n_docs = len(docs)
+    scores, matched = {}, {}
+    for field in fields:
+        weight = SEARCH_FIELDS[field]
+        avg_len = (idx["field_lengths"][field] / n_docs) if n_docs else 0
+        postings = idx["postings"][field]
+        for term in terms:
+            entries = postings.get(term, "").split()
+            if not entries:
+                continue
+            idf = math.log(1 + (n_docs - len(entries) + 0.5) / (len(entries) + 0.5))
+            for entry in entries:
+                sid, tf = entry.rsplit(":", 1)
+                tf = int(tf)
+                norm = 1 - BM25_B + BM25_B * (docs[sid]["len"][field] / avg_len if avg_len else 0)
+                scores[sid] = scores.get(sid, 0.0) + weight * idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+                matched.setdefault(sid, set()).add(field)
+
+    candidates = [
+        sid for sid in scores
+        if all(not want or docs[sid].get(key) == want for key, want in filters.items())
+    ]
+    top = heapq.nlargest(limit, candidates, key=lambda sid: (scores[sid], -_story_num(sid)))
+    results = [
+        {
+            "id": sid,
+            "title": docs[sid]["title"],
+            "status": docs[sid]["status"],
+            "priority": docs[sid]["priority"],
+            "feature_area": docs[sid]["feature_area"],
+            "score": round(scores[sid], 4),
+            "matched": sorted(matched[sid]),
+        }
+        for sid in top
+    ]
+    return results, len(candidates)
+
+
+def _story_num(story_id: str) -> int:
+    if story_id.startswith("US-"):
+        try:
+            return int(story_id.replace("US-", ""))
+        except ValueError:
+            pass
+    return 0
+
+
+# --- ID allocation ---
+#
+# metadata.id_high_water is the largest US number ever issued: created,
+# reserved or archived. It only grows, so IDs are never handed out twice,
+# even after a delete. `reserve-ids` and `batch-create` advance it inside a
+# compare-and-swap transaction, so concurrent writers get disjoint blocks.
+
+
+def _high_water(data: dict) -> int:
+    """Return the maintained high-water mark, deriving it for older backlogs."""
+    meta = data["metadata"]
+    if "id_high_water" not in meta:
+        nums = [_story_num(s["id"]) for s in data["stories"]]
+        nums.append(meta.get("archive", {}).get("high_water", 0))
+        meta["id_high_water"] = max(nums, default=0)
+    return meta["id_high_water"]
+
+
+def _format_id(num: int) -> str:
+    return f"US-{num:03d}"
+
+
+def _new_story(story_id: str, fields: dict, caller: str) -> dict:
+    now = datetime.now(timezone.utc).isoformat()
+    return {
+        "id": story_id,
+        "title": fields["title"],
+        "feature_area": fields["feature_area"],
+        "priority": fields["priority"],
+        "role": fields["role"],
+        "want": fields["want"],
+        "benefit": fields["benefit"],
+        "acceptance_criteria": fields["acceptance_criteria"],
+        "notes": fields.get("notes") or "",
+        "dependencies": fields["dependencies"],
+        "status": "Draft",
+        "created_at": now,
+        "updated_at": now,
+        "created_by": caller,
+        "history": [
+            {
+                "action": "created",
+                "by": caller,
+                "at": now,
+            }
+        ],
+    }
+
+
 # --- Commands ---
 
 
@@ -119,7 +738,13 @@ def cmd_init(args):
         print(json.dumps({"error": "Backlog already exists", "path": str(p)}))
         sys.exit(1)
     data = create_empty_backlog()
-    save_backlog(args.backlog_path, data)
+    index_path(args.backlog_path).unlink(missing_ok=True)
+    changes_path(args.backlog_path).unlink(missing_ok=True)
+    try:
+        save_backlog(args.backlog_path, data)
+    except ConflictError:
+        print(json.dumps({"error": "Backlog already exists", "path": str(p)}))
+        sys.exit(1)
     print(json.dumps({"success": True, "path": str(p)}))
 
 
@@ -128,12 +753,6 @@ def cmd_create(args):
         print(json.dumps({"error": f"Permission denied: {args.caller} cannot create user stories. Only po, pm can."}))
         sys.exit(1)
 
-    data = load_backlog(args.backlog_path)
-
-    if any(s["id"] == args.id for s in data["stories"]):
-        print(json.dumps({"error": f"Story {args.id} already exists"}))
-        sys.exit(1)
-
     ac = []
     if args.ac:
         ac = json.loads(args.ac)
@@ -142,75 +761,522 @@ def cmd_create(args):
     if args.depends:
         depends = [d.strip() for d in args.depends.split(",")]
 
-    story = {
-        "id": args.id,
-        "title": args.title,
-        "feature_area": args.feature,
-        "priority": args.priority,
-        "role": args.role,
-        "want": args.want,
-        "benefit": args.benefit,
-        "acceptance_criteria": ac,
-        "notes": args.notes or "",
-        "dependencies": depends,
-        "status": "Draft",
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat(),
-        "created_by": args.caller,
-        "history": [
-            {
-                "action": "created",
-                "by": args.caller,
-                "at": datetime.now(timezone.utc).isoformat(),
-            }
-        ],
-    }
+    def mutate(data):
+        if any(s["id"] == args.id for s in data["stories"]):
+            print(json.dumps({"error": f"Story {args.id} already exists"}))
+            sys.exit(1)
 
-    data["stories"].append(story)
-    save_backlog(args.backlog_path, data)
+        story = _new_story(args.id, {
+            "title": args.title,
+            "feature_area": args.feature,
+            "priority": args.priority,
+            "role": args.role,
+            "want": args.want,
+            "benefit": args.benefit,
+            "acceptance_criteria": ac,
+            "notes": args.notes,
+            "dependencies": depends,
+        }, args.caller)
+
+        _count_story(_aggregates(data), story, 1)
+        data["metadata"]["id_high_water"] = max(_high_water(data), _story_num(args.id))
+        data["stories"].append(story)
+        return story
+
+    story = transact(args.backlog_path, mutate,
+                     changes=lambda data, _: [{"op": "created", "id": args.id, "by": args.caller}])
     print(json.dumps({"success": True, "id": story["id"]}))
 
 
-def cmd_edit(args):
-    if not check_permission("edit", args.caller):
-        print(json.dumps({"error": f"Permission denied: {args.caller} cannot edit user stories. Only po, pm, tl can."}))
+BATCH_REQUIRED_FIELDS = ["title", "role", "want", "benefit", "feature_area", "priority"]
+
+
+def _normalize_batch_item(item, index: int, errors: list) -> dict:
+    """Validate one batch-create entry and map it onto story field names."""
+    if not isinstance(item, dict):
+        errors.append({"index": index, "error": "Entry must be an object"})
+        return None
+    fields = dict(item)
+    if "feature" in fields:
+        fields["feature_area"] = fields.pop("feature")
+    missing = [f for f in BATCH_REQUIRED_FIELDS if not fields.get(f)]
+    if missing:
+        errors.append({"index": index, "error": f"Missing fields: {missing}"})
+    if fields.get("priority") and fields["priority"] not in VALID_PRIORITIES:
+        errors.append({"index": index, "error": f"Invalid priority '{fields['priority']}'. Valid: {VALID_PRIORITIES}"})
+
+    ac = fields.pop("ac", fields.get("acceptance_criteria", []))
+    if isinstance(ac, str):
+        try:
+            ac = json.loads(ac)
+        except json.JSONDecodeError as e:
+            errors.append({"index": index, "error": f"Invalid AC JSON: {e}"})
+            ac = []
+    if not isinstance(ac, list):
+        errors.append({"index": index, "error": "Acceptance criteria must be a JSON array"})
+        ac = []
+    fields["acceptance_criteria"] = ac
+
+    depends = fields.pop("depends", fields.get("dependencies", []))
+    if isinstance(depends, str):
+        depends = [d.strip() for d in depends.split(",") if d.strip()]
+    fields["dependencies"] = list(depends)
+    return fields
+
+
+def cmd_batch_create(args):
+    if not check_permission("create", args.caller):
+        print(json.dumps({"error": f"Permission denied: {args.caller} cannot create user stories. Only po, pm can."}))
         sys.exit(1)
 
-    data = load_backlog(args.backlog_path)
-    story = next((s for s in data["stories"] if s["id"] == args.id), None)
-    if not story:
-        print(json.dumps({"error": f"Story {args.id} not found"}))
+    if args.input == "-":
+        raw = sys.stdin.read()
+    else:
+        with open(args.input, "r", encoding="utf-8") as f:
+            raw = f.read()
+    try:
+        items = json.loads(raw)
+    except json.JSONDecodeError as e:
+        print(json.dumps({"error": f"Invalid input JSON: {e}"}))
+        sys.exit(1)
+    if not isinstance(items, list):
+        print(json.dumps({"error": "Input JSON must be an array of story objects"}))
         sys.exit(1)
 
-    changes = {}
-    for field in ["title", "role", "want", "benefit", "priority", "notes", "feature"]:
-        val = getattr(args, field, None)
-        if val is not None:
-            key = "feature_area" if field == "feature" else field
-            changes[key] = val
-            story[key] = val
+    # Everything that does not depend on the backlog is checked before loading it
+    errors = []
+    batch = [_normalize_batch_item(item, i, errors) for i, item in enumerate(items)]
+    refs, explicit = {}, {}
+    for i, fields in enumerate(batch):
+        if fields is None:
+            continue
+        for key, seen in (("ref", refs), ("id", explicit)):
+            if fields.get(key):
+                if fields[key] in seen:
+                    errors.append({"index": i, "error": f"Duplicate {key} '{fields[key]}' in batch"})
+                seen[fields[key]] = i
+    if errors:
+        print(json.dumps({"error": "Batch validation failed, nothing was written", "errors": errors}))
+        sys.exit(1)
 
-    if args.ac:
-        ac = json.loads(args.ac)
-        changes["acceptance_criteria"] = ac
-        story["acceptance_criteria"] = ac
+    def mutate(data):
+        active = {s["id"] for s in data["stories"]}
+        # Explicit IDs are claimed first so the allocator never hands them out again
+        reserved = active | set(explicit)
+        next_num = _high_water(data) + 1
+        ids = []
+        for fields in batch:
+            if fields.get("id"):
+                ids.append(fields["id"])
+                continue
+            while _format_id(next_num) in reserved:
+                next_num += 1
+            ids.append(_format_id(next_num))
+            next_num += 1
+        if len(set(ids)) != len(ids):
+            print(json.dumps({"error": "Batch validation failed, nothing was written",
+                              "errors": [{"error": f"Duplicate story IDs allocated: {ids}"}]}))
+            sys.exit(1)
+        by_ref = {fields["ref"]: ids[i] for i, fields in enumerate(batch) if fields.get("ref")}
+        known = active | set(ids)
+        archived = None
+
+        errors = []
+        dependencies = []
+        for i, fields in enumerate(batch):
+            if fields.get("id") and fields["id"] in active:
+                errors.append({"index": i, "error": f"Story {fields['id']} already exists"})
+            resolved = []
+            for dep in fields["dependencies"]:
+                dep = by_ref.get(dep, dep)
+                if dep == ids[i]:
+                    errors.append({"index": i, "error": "A story cannot depend on itself"})
+                elif dep not in known:
+                    if archived is None:
+                        archived = set(load_archived(args.backlog_path))
+                    if dep not in archived:
+                        errors.append({"index": i, "error": f"Unknown dependency {dep}"})
+                resolved.append(dep)
+            dependencies.append(resolved)
+        if errors:
+            print(json.dumps({"error": "Batch validation failed, nothing was written", "errors": errors}))
+            sys.exit(1)
 
-    if args.depends is not None:
-        depends = [d.strip() for d in args.depends.split(",")] if args.depends else []
-        changes["dependencies"] = depends
-        story["dependencies"] = depends
+        agg = _aggregates(data)
+        high_water = _high_water(data)
+        for story_id, fields, depends in zip(ids, batch, dependencies):
+            story = _new_story(story_id, {**fields, "dependencies": depends}, args.caller)
+            _count_story(agg, story, 1)
+            data["stories"].append(story)
+            high_water = max(high_water, _story_num(story_id))
+        data["metadata"]["id_high_water"] = high_water
+        return ids
+
+    ids = transact(args.backlog_path, mutate, changes=lambda data, ids: [
+        {"op": "created", "id": story_id, "by": args.caller} for story_id in ids
+    ])
+    print(json.dumps({"success": True, "created": len(ids), "ids": ids}))
+
+
+# --- Bulk import / export ---
+#
+# `import` streams JSON Lines or CSV rows, so the input file is never loaded
+# as a whole. Row-level problems (bad JSON, unknown status, missing fields
+# for a new story, unknown dependency) reject only that row. The report keeps
+# the first IMPORT_MAX_REPORTED_ERRORS errors and counts the rest. Explicit
+# ids and dependencies are canonicalized ("US-1" is US-001), and ids that do
+# not parse as US-<number> reject the row. Rows with an existing id update
+# only the fields they carry, and a status change is recorded the way
+# `status` records it. Rows without an id get one from the allocator, which
+# skips every explicit id in the import. A dependency only counts when the
+# row it points at is accepted. In CSV, list fields are encoded as follows:
+# acceptance_criteria is a JSON array (or one criterion per line) and
+# dependencies is comma-separated. An empty cell means "not provided".
+#
+# All accepted rows are applied in one transaction, so an import commits
+# completely or not at all. That needs the whole backlog in memory anyway,
+# so normalized rows are staged in memory too rather than in bounded
+# batches: about 65 MB for 50k rows, next to about 115 MB for the resulting
+# 50k-story backlog.
+
+IMPORT_FIELDS = ["title", "role", "want", "benefit", "feature_area", "priority",
+                 "acceptance_criteria", "notes", "dependencies", "status"]
+IMPORT_ALIASES = {"feature": "feature_area", "ac": "acceptance_criteria", "depends": "dependencies"}
+
+
+def _detect_format(path: str, fmt: str) -> str:
+    if fmt:
+        return fmt
+    return "csv" if str(path).lower().endswith(".csv") else "jsonl"
+
+
+def _read_import_rows(path: str, fmt: str):
+    """Yield (row number, row dict or None, error or None), one row at a time."""
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8", newline="")
+    try:
+        if fmt == "csv":
+            for n, row in enumerate(csv.DictReader(f), start=1):
+                yield n, {k: v for k, v in row.items() if k and v not in (None, "")}, None
+            return
+        for n, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = jsoncodec.loads(line)
+            except json.JSONDecodeError as e:
+                yield n, None, f"Invalid JSON: {e}"
+                continue
+            if isinstance(row, dict):
+                yield n, row, None
+            else:
+                yield n, None, "Row must be a JSON object"
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _normalize_import_row(row: dict) -> tuple:
+    """Map an import row onto story fields. Returns (id or None, fields, error or None)."""
+    fields = {}
+    for key, value in row.items():
+        key = IMPORT_ALIASES.get(key, key)
+        if key in IMPORT_FIELDS:
+            fields[key] = value
+
+    ac = fields.get("acceptance_criteria")
+    if isinstance(ac, str):
+        if ac.lstrip().startswith("["):
+            try:
+                ac = json.loads(ac)
+            except json.JSONDecodeError as e:
+                return None, None, f"Invalid AC JSON: {e}"
+        else:
+            ac = [line.strip() for line in ac.splitlines() if line.strip()]
+        fields["acceptance_criteria"] = ac
+    if ac is not None and not isinstance(ac, list):
+        return None, None, "Acceptance criteria must be a JSON array"
+    if isinstance(fields.get("dependencies"), str):
+        fields["dependencies"] = [d.strip() for d in fields["dependencies"].split(",") if d.strip()]
+    if fields.get("priority") and fields["priority"] not in VALID_PRIORITIES:
+        return None, None, f"Invalid priority '{fields['priority']}'. Valid: {VALID_PRIORITIES}"
+    if fields.get("status") and fields["status"] not in VALID_STATUSES:
+        return None, None, f"Invalid status '{fields['status']}'. Valid: {VALID_STATUSES}"
+    if fields.get("dependencies"):
+        deps = [_story_num(str(d)) for d in fields["dependencies"]]
+        if min(deps) <= 0:
+            return None, None, f"Invalid dependency IDs: {fields['dependencies']}"
+        fields["dependencies"] = [_format_id(d) for d in deps]
+    story_id = row.get("id")
+    if not story_id:
+        return None, fields, None
+    num = _story_num(str(story_id))
+    if num <= 0:
+        return None, None, f"Invalid story ID '{story_id}'. Expected US-<number>"
+    return _format_id(num), fields, None
+
+
+def cmd_import(args):
+    if not check_permission("create", args.caller):
+        print(json.dumps({"error": f"Permission denied: {args.caller} cannot import user stories. Only po, pm can."}))
+        sys.exit(1)
 
-    story["updated_at"] = datetime.now(timezone.utc).isoformat()
-    story.setdefault("history", []).append(
-        {
-            "action": "edited",
-            "by": args.caller,
-            "changes": list(changes.keys()),
-            "at": datetime.now(timezone.utc).isoformat(),
-        }
-    )
+    started = time.monotonic()
+    errors, rejected, rows = [], 0, 0
+
+    def reject(report: list, row: int, story_id, message: str):
+        if len(report) < IMPORT_MAX_REPORTED_ERRORS:
+            report.append({"row": row, "id": story_id, "error": message})
+
+    # Parse and validate row by row; only normalized rows are kept
+    staged = []
+    for n, row, error in _read_import_rows(args.input, _detect_format(args.input, args.format)):
+        rows += 1
+        story_id, fields = (row or {}).get("id"), None
+        if error is None:
+            canonical, fields, error = _normalize_import_row(row)
+            story_id = story_id if error else canonical
+        if error:
+            rejected += 1
+            reject(errors, n, story_id, error)
+            continue
+        staged.append((n, story_id, fields))
+
+    def mutate(data):
+        report, failed = [], 0
+        positions = {s["id"]: i for i, s in enumerate(data["stories"])}
+        agg = _aggregates(data)
+        high_water = _high_water(data)
+        now = datetime.now(timezone.utc).isoformat()
+
+        # Pass 1: decide what each row is. A row whose id an earlier row of
+        # this import creates updates that new story and stands or falls with it.
+        plan = []  # [row, id, fields, index of the row creating id or None, accepted]
+        creators = {}
+        for n, story_id, fields in staged:
+            if story_id in positions:
+                if args.mode == "create":
+                    failed += 1
+                    reject(report, n, story_id, f"Story {story_id} already exists")
+                    continue
+                plan.append([n, story_id, fields, None, True])
+            elif story_id in creators:
+                plan.append([n, story_id, fields, creators[story_id], True])
+            else:
+                missing = [f for f in BATCH_REQUIRED_FIELDS if not fields.get(f)]
+                if missing:
+                    failed += 1
+                    reject(report, n, story_id, f"Missing fields for a new story: {missing}")
+                    continue
+                if story_id:
+                    creators[story_id] = len(plan)
+                plan.append([n, story_id, fields, None, True])
+
+        # Pass 2: dependencies may point at existing, archived or accepted
+        # imported stories. Rejecting a row can orphan rows that depend on it,
+        # so repeat until nothing else is rejected.
+        archived = None
+        rejecting = True
+        while rejecting:
+            rejecting = False
+            known = set(positions) | {sid for sid, i in creators.items() if plan[i][4]}
+            for entry in plan:
+                n, story_id, fields, creator, accepted = entry
+                if not accepted:
+                    continue
+                deps = fields.get("dependencies", [])
+                unknown = [d for d in deps if d not in known]
+                if unknown:
+                    if archived is None:
+                        archived = set(load_archived(args.backlog_path))
+                    unknown = [d for d in unknown if d not in archived]
+                if creator is not None and not plan[creator][4]:
+                    problem = f"Story {story_id} was rejected earlier in this import"
+                elif unknown or (story_id and story_id in deps):
+                    problem = f"Unknown or self dependency: {unknown or [story_id]}"
+                else:
+                    continue
+                entry[4] = False
+                failed += 1
+                reject(report, n, story_id, problem)
+                rejecting = True
+
+        # Pass 3: apply. Explicit IDs of accepted rows are reserved before any
+        # ID is allocated, so an allocated ID can never collide with one
+        reserved = set(positions) | {sid for sid, i in creators.items() if plan[i][4]}
+        created, updated, ops = [], [], []
+        for n, story_id, fields, _, accepted in plan:
+            if not accepted:
+                continue
+            if story_id in positions:
+                story = data["stories"][positions[story_id]]
+                changed = [k for k, v in fields.items() if story.get(k) != v]
+                if not changed:
+                    continue
+                old_status = story["status"]
+                _count_story(agg, story, -1)
+                story.update(fields)
+                _count_story(agg, story, 1)
+                story["updated_at"] = now
+                history = story.setdefault("history", [])
+                # A status change is recorded the way `status` records it
+                if "status" in changed:
+                    changed.remove("status")
+                    history.append({"action": "status_change", "by": args.caller,
+                                    "from": old_status, "to": story["status"], "at": now})
+                if changed:
+                    history.append({"action": "imported", "by": args.caller, "changes": changed, "at": now})
+                if story_id not in created:
+                    if story_id not in updated:
+                        updated.append(story_id)
+                    if old_status != story["status"]:
+                        ops.append({"op": "status_change", "id": story_id, "by": args.caller,
+                                    "from": old_status, "to": story["status"]})
+                    if changed:
+                        ops.append({"op": "edited", "id": story_id, "by": args.caller})
+                continue
+
+            if story_id is None:
+                high_water += 1
+                while _format_id(high_water) in reserved:
+                    high_water += 1
+                story_id = _format_id(high_water)
+            high_water = max(high_water, _story_num(story_id))
+            story = _new_story(story_id, {
+                **fields,
+                "acceptance_criteria": fields.get("acceptance_criteria", []),
+                "dependencies": fields.get("dependencies", []),
+            }, args.caller)
+            story["status"] = fields.get("status", "Draft")
+            story["history"][0]["action"] = "imported"
+            _count_story(agg, story, 1)
+            positions[story_id] = len(data["stories"])
+            data["stories"].append(story)
+            created.append(story_id)
+            ops.append({"op": "created", "id": story_id, "by": args.caller})
+
+        data["metadata"]["id_high_water"] = high_water
+        return created, updated, report, failed, ops
+
+    if args.dry_run:
+        created, updated, report, failed, _ = mutate(load_backlog(args.backlog_path))
+    elif staged:
+        created, updated, report, failed, _ = transact(args.backlog_path, mutate,
+                                                       changes=lambda data, result: result[4])
+    else:
+        created, updated, report, failed = [], [], [], 0
+
+    for item in report:
+        reject(errors, item["row"], item["id"], item["error"])
+    errors.sort(key=lambda e: e["row"])
+    rejected += failed
+    print(json.dumps({
+        "success": True,
+        "dry_run": args.dry_run,
+        "rows": rows,
+        "created": len(created),
+        "updated": len(updated),
+        "rejected": rejected,
+        "errors": errors,
+        "errors_truncated": rejected > len(errors),
+        "seconds": round(time.monotonic() - started, 3),
+    }))
+
+
+def cmd_export(args):
+    fields = [f.strip() for f in args.fields.split(",")] if args.fields else LIST_DEFAULT_FIELDS
+    to_stdout = not args.output or args.output == "-"
+    fmt = _detect_format("" if to_stdout else args.output, args.format)
+    out = sys.stdout if to_stdout else open(args.output, "w", encoding="utf-8", newline="")
+    count = 0
+    try:
+        if fmt == "csv":
+            writer = csv.DictWriter(out, fieldnames=fields)
+            writer.writeheader()
+            for story in _iter_listed(args):
+                row = {}
+                for f in fields:
+                    value = story.get(f, "")
+                    if f == "dependencies":
+                        value = ",".join(value)
+                    elif isinstance(value, (list, dict)):
+                        value = json.dumps(value, ensure_ascii=False)
+                    row[f] = value
+                writer.writerow(row)
+                count += 1
+        else:
+            for story in _iter_listed(args):
+                out.write(jsoncodec.dumps(_pick_fields(story, fields)) + "\n")
+                count += 1
+    finally:
+        if not to_stdout:
+            out.close()
+    if not to_stdout:
+        print(json.dumps({"success": True, "exported": count, "format": fmt, "path": args.output}))
+
+
+def cmd_reserve_ids(args):
+    if not check_permission("create", args.caller):
+        print(json.dumps({"error": f"Permission denied: {args.caller} cannot reserve story IDs. Only po, pm can."}))
+        sys.exit(1)
+    if args.count < 1:
+        print(json.dumps({"error": "--count must be at least 1"}))
+        sys.exit(1)
+
+    def mutate(data):
+        start = _high_water(data) + 1
+        data["metadata"]["id_high_water"] = start + args.count - 1
+        return [_format_id(n) for n in range(start, start + args.count)]
+
+    ids = transact(args.backlog_path, mutate)
+    print(json.dumps({"success": True, "ids": ids}))
+
+
+def cmd_edit(args):
+    if not check_permission("edit", args.caller):
+        print(json.dumps({"error": f"Permission denied: {args.caller} cannot edit user stories. Only po, pm, tl can."}))
+        sys.exit(1)
+
+    def mutate(data):
+        story = next((s for s in data["stories"] if s["id"] == args.id), None)
+        if not story:
+            print(json.dumps({"error": f"Story {args.id} not found"}))
+            sys.exit(1)
 
-    save_backlog(args.backlog_path, data)
+        agg = _aggregates(data)
+        _count_story(agg, story, -1)
+        changes = {}
+        for field in ["title", "role", "want", "benefit", "priority", "notes", "feature"]:
+            val = getattr(args, field, None)
+            if val is not None:
+                key = "feature_area" if field == "feature" else field
+                changes[key] = val
+                story[key] = val
+
+        if args.ac:
+            ac = json.loads(args.ac)
+            changes["acceptance_criteria"] = ac
+            story["acceptance_criteria"] = ac
+
+        if args.depends is not None:
+            depends = [d.strip() for d in args.depends.split(",")] if args.depends else []
+            changes["dependencies"] = depends
+            story["dependencies"] = depends
+
+        _count_story(agg, story, 1)
+        story["updated_at"] = datetime.now(timezone.utc).isoformat()
+        story.setdefault("history", []).append(
+            {
+                "action": "edited",
+                "by": args.caller,
+                "changes": list(changes.keys()),
+                "at": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+        return changes
+
+    changes = transact(args.backlog_path, mutate, changes=lambda data, result: [
+        {"op": "edited", "id": args.id, "by": args.caller, "fields": list(result.keys())}
+    ])
     print(json.dumps({"success": True, "id": args.id, "changes": list(changes.keys())}))
 
 
@@ -223,26 +1289,32 @@ def cmd_status(args):
         print(json.dumps({"error": f"Invalid status '{args.status}'. Valid: {VALID_STATUSES}"}))
         sys.exit(1)
 
-    data = load_backlog(args.backlog_path)
-    story = next((s for s in data["stories"] if s["id"] == args.id), None)
-    if not story:
-        print(json.dumps({"error": f"Story {args.id} not found"}))
-        sys.exit(1)
+    def mutate(data):
+        story = next((s for s in data["stories"] if s["id"] == args.id), None)
+        if not story:
+            print(json.dumps({"error": f"Story {args.id} not found"}))
+            sys.exit(1)
 
-    old_status = story["status"]
-    story["status"] = args.status
-    story["updated_at"] = datetime.now(timezone.utc).isoformat()
-    story.setdefault("history", []).append(
-        {
-            "action": "status_change",
-            "by": args.caller,
-            "from": old_status,
-            "to": args.status,
-            "at": datetime.now(timezone.utc).isoformat(),
-        }
-    )
+        agg = _aggregates(data)
+        old_status = story["status"]
+        _count_story(agg, story, -1)
+        story["status"] = args.status
+        _count_story(agg, story, 1)
+        story["updated_at"] = datetime.now(timezone.utc).isoformat()
+        story.setdefault("history", []).append(
+            {
+                "action": "status_change",
+                "by": args.caller,
+                "from": old_status,
+                "to": args.status,
+                "at": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+        return old_status
 
-    save_backlog(args.backlog_path, data)
+    old_status = transact(args.backlog_path, mutate, changes=lambda data, old_status: [
+        {"op": "status_change", "id": args.id, "by": args.caller, "from": old_status, "to": args.status}
+    ])
     print(json.dumps({"success": True, "id": args.id, "old_status": old_status, "new_status": args.status}))
 
 
@@ -260,30 +1332,105 @@ def _pick_fields(story: dict, fields: list[str]) -> dict:
     return {k: story.get(k, "-") for k in fields}
 
 
-def cmd_list(args):
-    data = load_backlog(args.backlog_path)
-    stories = data["stories"]
+def _list_matches(story: dict, args) -> bool:
+    if args.status and story["status"] != args.status:
+        return False
+    if args.feature and story.get("feature_area") != args.feature:
+        return False
+    if args.priority and story.get("priority") != args.priority:
+        return False
+    return True
 
-    if args.status:
-        stories = [s for s in stories if s["status"] == args.status]
-    if args.feature:
-        stories = [s for s in stories if s.get("feature_area") == args.feature]
-    if args.priority:
-        stories = [s for s in stories if s.get("priority") == args.priority]
 
-    total = len(stories)
+def _cursor_key(story_id: str) -> tuple:
+    """Order used by the --after cursor: US number, then the id for non-US ids."""
+    return _story_num(story_id), story_id
 
-    if args.offset:
-        stories = stories[args.offset:]
+
+def _iter_listed(args):
+    """Stream stories for `list`: active file first, then (optionally) the archive."""
+    after = _cursor_key(args.after) if args.after else None
+    active_ids = set()
+    sources = [("active", iter_stories(args.backlog_path))]
+    if args.include_archived:
+        sources.append(("archive", iter_archived(args.backlog_path)))
+    for source, stories in sources:
+        for s in stories:
+            if source == "active":
+                if args.include_archived:
+                    active_ids.add(s["id"])
+            elif s["id"] in active_ids:
+                continue
+            else:
+                active_ids.add(s["id"])
+            if after is not None and _cursor_key(s["id"]) <= after:
+                continue
+            if _list_matches(s, args):
+                yield s
+
+
+def _cursor_page(stories, skip: int, limit: int) -> tuple[list, bool]:
+    """The page of a stream in cursor order, and whether stories follow it.
+
+    Stories arrive in file order (active file, then archive, explicit ids in
+    any order), so a page cut from the stream itself would let the next
+    cursor pass over lower-numbered stories still to come. Only skip + limit
+    + 1 stories are held at a time.
+    """
+    picked = heapq.nsmallest(skip + limit + 1, stories, key=lambda s: _cursor_key(s["id"]))
+    return picked[skip:skip + limit], len(picked) > skip + limit
+
+
+def _list_ndjson(args, fields: list[str]):
+    """One JSON story per line, flushed as produced, then a cursor trailer line.
+
+    Without --limit, stories stream in file order. With --limit, the page is
+    the next stories in cursor order and next_after resumes right after it.
+    """
+    skip = args.offset or 0
     if args.limit:
-        stories = stories[: args.limit]
+        page, has_more = _cursor_page(_iter_listed(args), skip, args.limit)
+    else:
+        page, has_more = itertools.islice(_iter_listed(args), skip, None), False
+    count = 0
+    last_id = None
+    for s in page:
+        sys.stdout.write(jsoncodec.dumps(_pick_fields(s, fields)) + "\n")
+        sys.stdout.flush()
+        count += 1
+        last_id = s["id"]
+    print(json.dumps({"end": True, "count": count, "next_after": last_id if has_more else None}))
 
+
+def cmd_list(args):
     custom_fields = None
     if args.fields:
         custom_fields = [f.strip() for f in args.fields.split(",")]
 
     fmt = args.format or "summary"
 
+    if fmt == "ndjson":
+        _list_ndjson(args, custom_fields or LIST_DEFAULT_FIELDS)
+        return
+
+    # Keep only the requested page in memory; count the rest while streaming
+    total = 0
+    start = args.offset or 0
+    stop = start + args.limit if args.limit else None
+    stories = []
+    if args.after and args.limit:
+        def counted():
+            nonlocal total
+            for s in _iter_listed(args):
+                total += 1
+                yield s
+        stories, _ = _cursor_page(counted(), start, args.limit)
+    else:
+        for s in _iter_listed(args):
+            if total >= start and (stop is None or total < stop):
+                stories.append(s)
+            total += 1
+
     if fmt == "json":
         fields = custom_fields or LIST_DEFAULT_FIELDS
         projected = [_pick_fields(s, fields) for s in stories]
@@ -304,33 +1451,112 @@ def cmd_list(args):
 
 
 def cmd_stats(args):
+    if args.verify:
+        _verify_stats(args)
+        return
+
+    if args.all:
+        data = load_backlog(args.backlog_path)
+        active_ids = {s["id"] for s in data["stories"]}
+        stories = data["stories"] + list(load_archived(args.backlog_path, active_ids).values())
+        print(json.dumps(recount_aggregates(stories)))
+        return
+
+    # O(1) path: read the maintained counters from the metadata header only
+    meta = load_metadata(args.backlog_path)
+    if "aggregates" in meta:
+        result = dict(meta["aggregates"])
+    else:
+        result = recount_aggregates(load_backlog(args.backlog_path)["stories"])
+    if meta.get("archive"):
+        result["archived"] = meta["archive"]["count"]
+        if "aggregates" in meta["archive"]:
+            result["archived_by_status"] = meta["archive"]["aggregates"]["by_status"]
+            result["archived_by_priority"] = meta["archive"]["aggregates"]["by_priority"]
+    print(json.dumps(result))
+
+
+def _verify_stats(args):
     data = load_backlog(args.backlog_path)
-    stories = data["stories"]
-    by_status = {}
-    by_priority = {}
-    by_feature = {}
-    for s in stories:
-        st = s.get("status", "Unknown")
-        by_status[st] = by_status.get(st, 0) + 1
-        pr = s.get("priority", "Unknown")
-        by_priority[pr] = by_priority.get(pr, 0) + 1
-        fa = s.get("feature_area", "Uncategorized")
-        by_feature[fa] = by_feature.get(fa, 0) + 1
+    stored = data["metadata"].get("aggregates")
+    recount = recount_aggregates(data["stories"])
+    mismatches = [k for k in recount if stored is None or stored.get(k) != recount[k]]
+
+    repaired = False
+    if mismatches and args.repair:
+        def mutate(data):
+            data["metadata"]["aggregates"] = recount_aggregates(data["stories"])
+        transact(args.backlog_path, mutate)
+        repaired = True
+
+    print(json.dumps({
+        "consistent": not mismatches,
+        "mismatches": mismatches,
+        "stored": stored,
+        "recount": recount,
+        "repaired": repaired,
+    }))
+
+
+def cmd_search(args):
+    fields = list(SEARCH_FIELDS)
+    if args.in_fields:
+        fields = [f.strip() for f in args.in_fields.split(",")]
+        invalid = [f for f in fields if f not in SEARCH_FIELDS]
+        if invalid:
+            print(json.dumps({"error": f"Invalid search fields {invalid}. Valid: {list(SEARCH_FIELDS)}"}))
+            sys.exit(1)
+
+    idx = refresh_index(args.backlog_path, rebuild=args.rebuild)
+    filters = {"status": args.status, "feature_area": args.feature, "priority": args.priority}
+    results, total = search_index(idx, args.query, fields, filters, args.limit)
+    print(json.dumps({"query": args.query, "results": results, "count": total}))
+
+
+def cmd_changes(args):
+    current = casfile.read_revision(args.backlog_path, "metadata")
+    fields = [f.strip() for f in args.fields.split(",")] if args.fields else None
+    out, seq, more = [], args.since, False
+    reset = args.since > current
+    if not reset and args.since < current:
+        for entry in iter_changes(args.backlog_path, args.since):
+            if entry["seq"] != seq + 1:
+                break
+            if args.limit and seq - args.since >= args.limit:
+                more = True
+                break
+            for change in entry["changes"]:
+                record = {"seq": entry["seq"], "at": entry["at"], **change}
+                if "story" in record and fields:
+                    record["story"] = _pick_fields(record["story"], fields)
+                out.append(record)
+            seq = entry["seq"]
+        # Cursor predates the retained feed, or the feed has a hole
+        reset = not more and seq < current
     print(json.dumps({
-        "total": len(stories),
-        "by_status": by_status,
-        "by_priority": by_priority,
-        "by_feature": by_feature,
+        "since": args.since,
+        "seq": seq if not reset else current,
+        "current": current,
+        "reset": reset,
+        "more": more,
+        "changes": out if not reset else [],
     }))
 
 
 def cmd_get(args):
     data = load_backlog(args.backlog_path)
     story = next((s for s in data["stories"] if s["id"] == args.id), None)
-    if not story:
+    if story:
+        print(json.dumps({"story": story}))
+        return
+    archived = None
+    for s in iter_archived(args.backlog_path):
+        if s["id"] == args.id:
+            archived = s
+    if not archived:
         print(json.dumps({"error": f"Story {args.id} not found"}))
         sys.exit(1)
-    print(json.dumps({"story": story}))
+    print(json.dumps({"story": archived, "archived": True}))
 
 
 def cmd_delete(args):
@@ -338,17 +1564,292 @@ def cmd_delete(args):
         print(json.dumps({"error": f"Permission denied: {args.caller} cannot delete stories. Only po, pm can."}))
         sys.exit(1)
 
-    data = load_backlog(args.backlog_path)
-    idx = next((i for i, s in enumerate(data["stories"]) if s["id"] == args.id), None)
-    if idx is None:
-        print(json.dumps({"error": f"Story {args.id} not found"}))
-        sys.exit(1)
+    def mutate(data):
+        idx = next((i for i, s in enumerate(data["stories"]) if s["id"] == args.id), None)
+        if idx is None:
+            print(json.dumps({"error": f"Story {args.id} not found"}))
+            sys.exit(1)
+        _count_story(_aggregates(data), data["stories"][idx], -1)
+        return data["stories"].pop(idx)
 
-    removed = data["stories"].pop(idx)
-    save_backlog(args.backlog_path, data)
+    removed = transact(args.backlog_path, mutate,
+                       changes=lambda data, _: [{"op": "deleted", "id": args.id, "by": args.caller}])
     print(json.dumps({"success": True, "deleted": removed["id"]}))
 
 
+def cmd_archive(args):
+    if not check_permission("archive", args.caller):
+        print(json.dumps({"error": f"Permission denied: {args.caller} cannot archive stories. Only po, pm can."}))
+        sys.exit(1)
+
+    if args.before:
+        cutoff = datetime.fromisoformat(args.before)
+        if cutoff.tzinfo is None:
+            cutoff = cutoff.replace(tzinfo=timezone.utc)
+    else:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=args.older_than_days)
+
+    data = load_backlog(args.backlog_path)
+    candidates = [
+        s for s in data["stories"]
+        if s["status"] in TERMINAL_STATUSES
+        and datetime.fromisoformat(s.get("updated_at") or s["created_at"]) < cutoff
+    ]
+    ids = [s["id"] for s in candidates]
+    apath = archive_path(args.backlog_path)
+
+    if args.dry_run or not candidates:
+        print(json.dumps({
+            "success": True, "dry_run": args.dry_run, "archived": len(ids), "ids": ids,
+            "archive_path": str(apath), "cutoff": cutoff.isoformat(),
+        }))
+        return
+
+    stamps = {s["id"]: s.get("updated_at") for s in candidates}
+
+    def mutate(data):
+        agg = _aggregates(data)
+        kept, moved = [], []
+        for s in data["stories"]:
+            # Only drop stories that are unchanged since they were selected
+            if s["id"] in stamps and stamps[s["id"]] == s.get("updated_at"):
+                _count_story(agg, s, -1)
+                moved.append(s)
+            else:
+                kept.append(s)
+        meta = data["metadata"].setdefault("archive", {"file": apath.name, "count": 0, "high_water": 0})
+        if "aggregates" not in meta:  # archives written before the counters were kept
+            active_ids = {s["id"] for s in data["stories"]}
+            meta["aggregates"] = recount_aggregates(
+                load_archived(args.backlog_path, active_ids).values() if meta["count"] else [])
+        for s in moved:
+            _count_story(meta["aggregates"], s, 1)
+        data["stories"] = kept
+        meta["count"] += len(moved)
+        meta["high_water"] = max([meta["high_water"]] + [_story_num(s["id"]) for s in moved])
+        meta["last_archived_at"] = datetime.now(timezone.utc).isoformat()
+        return moved, len(kept)
+
+    def append_archive(data, result):
+        # Runs under the commit marker, so archive runs append one at a time and
+        # only the stories this revision removes are written. The member lands
+        # before backlog.json is replaced: a crash in between leaves a harmless
+        # duplicate (the active copy shadows it), and a failed replace cuts the
+        # member off again.
+        if not result[0]:
+            return None
+        size = apath.stat().st_size if apath.exists() else 0
+        with gzip.open(apath, "at", encoding="utf-8") as f:
+            for s in result[0]:
+                f.write(jsoncodec.dumps(s) + "\n")
+
+        def undo():
+            with open(apath, "r+b") as f:
+                f.truncate(size)
+        return undo
+
+    moved, remaining = transact(args.backlog_path, mutate, changes=lambda data, result: [
+        {"op": "archived", "id": s["id"], "by": args.caller} for s in result[0]
+    ], prepare=append_archive)
+    moved = [s["id"] for s in moved]
+    print(json.dumps({
+        "success": True, "archived": len(moved), "ids": moved,
+        "archive_path": str(apath), "active_remaining": remaining,
+    }))
+
+
+# --- Dependency map ---
+#
+# BACKLOG.md's Mermaid map shows the transitive reduction of the dependency
+# graph: an edge A --> C is dropped when A already reaches C through other
+# edges. Cycles are condensed into strongly connected components first, and
+# edges between components are reduced exactly. Inside a component, edges are
+# dropped greedily while every member still reaches every other one. This
+# pass is skipped for components with more than RENDER_MAX_CYCLE_EDGES
+# edges. Nodes are defined once, inside a `subgraph` per feature_area. If the
+# map would exceed the node budget, the largest features are collapsed into a
+# single node each (and the graph reduced again) until it fits.
+
+
+def _strongly_connected(nodes: list, adj: dict) -> list[list]:
+    """Tarjan's algorithm, iterative. Components come out in reverse topological order."""
+    index, low, on_stack, stack, comps = {}, {}, set(), [], []
+    counter = 0
+    for root in nodes:
+        if root in index:
+            continue
+        work = [(root, iter(adj.get(root, ())))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(adj.get(child, ()))))
+                    advanced = True
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                low[work[-1][0]] = min(low[work[-1][0]], low[node])
+            if low[node] == index[node]:
+                comp = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    comp.append(member)
+                    if member == node:
+                        break
+                comps.append(comp)
+    return comps
+
+
+def _prune_cycle_edges(edges: list[tuple]) -> list[tuple]:
+    """Greedily drop edges of one strongly connected component while it stays connected."""
+    if len(edges) > RENDER_MAX_CYCLE_EDGES:
+        return edges
+    kept = list(edges)
+    for edge in list(edges):
+        rest = [e for e in kept if e != edge]
+        adj = {}
+        for u, v in rest:
+            adj.setdefault(u, []).append(v)
+        seen, todo = {edge[0]}, [edge[0]]
+        while todo and edge[1] not in seen:
+            for nxt in adj.get(todo.pop(), ()):
+                if nxt not in seen:
+                    seen.add(nxt)
+                    todo.append(nxt)
+        if edge[1] in seen:
+            kept = rest
+    return kept
+
+
+def _transitive_reduction(nodes: list, edges: list[tuple]) -> list[tuple]:
+    """Return the edges of the transitive reduction (see the section comment for cycles)."""
+    adj = {}
+    for u, v in edges:
+        adj.setdefault(u, []).append(v)
+    comps = _strongly_connected(nodes, adj)
+    comp_of = {n: i for i, comp in enumerate(comps) for n in comp}
+
+    children = [set() for _ in comps]
+    for u, v in edges:
+        if comp_of[u] != comp_of[v]:
+            children[comp_of[u]].add(comp_of[v])
+
+    # Descendant bitsets; Tarjan order guarantees children are done first
+    desc = [0] * len(comps)
+    for c in range(len(comps)):
+        for d in children[c]:
+            desc[c] |= (1 << d) | desc[d]
+
+    kept_pairs = set()
+    for c, ch in enumerate(children):
+        for d in ch:
+            if not any(w != d and (desc[w] >> d) & 1 for w in ch):
+                kept_pairs.add((c, d))
+
+    inside = {}
+    for u, v in edges:
+        if comp_of[u] == comp_of[v]:
+            inside.setdefault(comp_of[u], []).append((u, v))
+    kept_inside = {e for comp_edges in inside.values() for e in _prune_cycle_edges(comp_edges)}
+
+    kept, seen = [], set()
+    for u, v in edges:
+        cu, cv = comp_of[u], comp_of[v]
+        if cu == cv:
+            if (u, v) in kept_inside:
+                kept.append((u, v))
+        elif (cu, cv) in kept_pairs and (cu, cv) not in seen:
+            seen.add((cu, cv))
+            kept.append((u, v))
+    return kept
+
+
+def _mermaid_id(key: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_]", "_", key)
+
+
+def _mermaid_label(text: str) -> str:
+    return str(text).replace('"', "#quot;")
+
+
+def render_dependency_map(stories: list[dict], max_nodes: int = RENDER_MAX_NODES) -> tuple:
+    """Build the Mermaid dependency map. Returns (markdown lines, stats dict)."""
+    feature_of = {s["id"]: s.get("feature_area", "Uncategorized") for s in stories}
+    edges = list(dict.fromkeys((s["id"], d) for s in stories for d in s.get("dependencies", [])))
+    nodes = list(dict.fromkeys(n for edge in edges for n in edge))
+    stats = {"nodes_before": len(nodes), "edges_before": len(edges)}
+    if not edges:
+        return [], {**stats, "nodes_after": 0, "edges_after": 0, "collapsed_features": []}
+
+    members = {}
+    for n in nodes:
+        if n in feature_of:
+            members.setdefault(feature_of[n], []).append(n)
+
+    # Collapse the largest features until the map fits the node budget
+    collapsed = []
+    unit = {n: n for n in nodes}
+    node_count = len(nodes)
+    for feature in sorted(members, key=lambda f: -len(members[f])):
+        if node_count <= max_nodes:
+            break
+        if len(members[feature]) < 2:
+            continue
+        collapsed.append(feature)
+        for n in members[feature]:
+            unit[n] = f"feature:{feature}"
+        node_count -= len(members[feature]) - 1
+
+    unit_edges = list(dict.fromkeys((unit[u], unit[v]) for u, v in edges if unit[u] != unit[v]))
+    unit_nodes = list(dict.fromkeys(unit[n] for n in nodes))
+    reduced = _transitive_reduction(unit_nodes, unit_edges)
+    stats.update({
+        "nodes_after": len(unit_nodes),
+        "edges_after": len(reduced),
+        "collapsed_features": collapsed,
+    })
+
+    lines = ["```mermaid", "graph LR"]
+    clusters = {}
+    for u in unit_nodes:
+        feature = u[len("feature:"):] if u.startswith("feature:") else feature_of.get(u)
+        clusters.setdefault(feature, []).append(u)
+
+    def node_def(u: str) -> str:
+        if u.startswith("feature:"):
+            feature = u[len("feature:"):]
+            return f'{_mermaid_id(u)}[["{_mermaid_label(feature)} ({len(members[feature])} stories)"]]'
+        return f'{_mermaid_id(u)}["{_mermaid_label(u)}"]'
+
+    for i, (feature, units) in enumerate(clusters.items()):
+        if feature is None:
+            continue  # archived or unknown ids stay outside any cluster
+        if len(units) == 1 and units[0].startswith("feature:"):
+            lines.append(f"    {node_def(units[0])}")
+            continue
+        lines.append(f'    subgraph F{i}["{_mermaid_label(feature)}"]')
+        lines.extend(f"        {node_def(u)}" for u in units)
+        lines.append("    end")
+    lines.extend(f"    {node_def(u)}" for u in clusters.get(None, []))
+    lines.extend(f"    {_mermaid_id(u)} --> {_mermaid_id(v)}" for u, v in reduced)
+    lines.append("```")
+    return lines, stats
+
+
 def cmd_render(args):
     data = load_backlog(args.backlog_path)
     stories = data["stories"]
@@ -386,6 +1887,9 @@ def cmd_render(args):
         if st in status_counts:
             lines.append(f"| {st} | {status_counts[st]} |")
     lines.append(f"| **Total** | **{len(stories)}** |")
+    archived_count = data["metadata"].get("archive", {}).get("count", 0)
+    if archived_count:
+        lines.append(f"| *Archived* | *{archived_count}* |")
     lines.append("")
 
     # Stories by feature
@@ -425,17 +1929,19 @@ def cmd_render(args):
             lines.append("")
 
     # Dependency map
-    deps = [(s["id"], d) for s in stories for d in s.get("dependencies", [])]
-    if deps:
+    map_lines, map_stats = render_dependency_map(stories, args.max_nodes)
+    if map_lines:
         lines.append("## Story Dependency Map")
         lines.append("")
-        lines.append("```mermaid")
-        lines.append("graph LR")
-        for src, dst in deps:
-            src_label = src.replace("-", "")
-            dst_label = dst.replace("-", "")
-            lines.append(f'    {src_label}["{src}"] --> {dst_label}["{dst}"]')
-        lines.append("```")
+        note = (
+            f"> {map_stats['nodes_before']} stories, {map_stats['edges_before']} dependencies; "
+            f"showing {map_stats['nodes_after']} nodes, {map_stats['edges_after']} edges after transitive reduction"
+        )
+        if map_stats["collapsed_features"]:
+            note += f" (collapsed: {', '.join(map_stats['collapsed_features'])})"
+        lines.append(note + ".")
+        lines.append("")
+        lines.extend(map_lines)
         lines.append("")
 
     # Open questions
@@ -455,7 +1961,7 @@ def cmd_render(args):
     output_path.parent.mkdir(parents=True, exist_ok=True)
     with open(output_path, "w", encoding="utf-8") as f:
         f.write(md_content)
-    print(json.dumps({"success": True, "path": str(output_path), "stories": len(stories)}))
+    print(json.dumps({"success": True, "path": str(output_path), "stories": len(stories), "dependency_map": map_stats}))
 
 
 def cmd_question(args):
@@ -463,55 +1969,51 @@ def cmd_question(args):
         print(json.dumps({"error": f"Permission denied."}))
         sys.exit(1)
 
-    data = load_backlog(args.backlog_path)
-    questions = data.setdefault("questions", [])
-
-    if args.resolve and args.id:
-        q = next((q for q in questions if q["id"] == args.id), None)
-        if not q:
-            print(json.dumps({"error": f"Question {args.id} not found"}))
-            sys.exit(1)
-        q["resolved"] = True
-        if args.answer:
-            q["answer"] = args.answer
-        q["resolved_by"] = args.caller
-        q["resolved_at"] = datetime.now(timezone.utc).isoformat()
-        save_backlog(args.backlog_path, data)
-        print(json.dumps({"success": True, "question": q}))
-        return
+    def mutate(data):
+        questions = data.setdefault("questions", [])
+
+        if args.resolve and args.id:
+            q = next((q for q in questions if q["id"] == args.id), None)
+            if not q:
+                print(json.dumps({"error": f"Question {args.id} not found"}))
+                sys.exit(1)
+            q["resolved"] = True
+            if args.answer:
+                q["answer"] = args.answer
+            q["resolved_by"] = args.caller
+            q["resolved_at"] = datetime.now(timezone.utc).isoformat()
+            return q
+
+        # Create new question
+        q_id = args.id
+        if not q_id:
+            existing_ids = [int(q["id"].replace("Q-", "")) for q in questions if q["id"].startswith("Q-")]
+            next_num = max(existing_ids, default=0) + 1
+            q_id = f"Q-{next_num:03d}"
+
+        question = {
+            "id": q_id,
+            "text": args.text,
+            "asked_by": args.caller,
+            "asked_at": datetime.now(timezone.utc).isoformat(),
+            "resolved": False,
+            "answer": args.answer or "",
+        }
+        questions.append(question)
+        return question
 
-    # Create new question
-    q_id = args.id
-    if not q_id:
-        existing_ids = [int(q["id"].replace("Q-", "")) for q in questions if q["id"].startswith("Q-")]
-        next_num = max(existing_ids, default=0) + 1
-        q_id = f"Q-{next_num:03d}"
-
-    question = {
-        "id": q_id,
-        "text": args.text,
-        "asked_by": args.caller,
-        "asked_at": datetime.now(timezone.utc).isoformat(),
-        "resolved": False,
-        "answer": args.answer or "",
-    }
-    questions.append(question)
-    save_backlog(args.backlog_path, data)
+    question = transact(args.backlog_path, mutate)
     print(json.dumps({"success": True, "question": question}))
 
 
 def cmd_next_id(args):
-    data = load_backlog(args.backlog_path)
-    existing_ids = []
-    for s in data["stories"]:
-        sid = s["id"]
-        if sid.startswith("US-"):
-            try:
-                existing_ids.append(int(sid.replace("US-", "")))
-            except ValueError:
-                pass
-    next_num = max(existing_ids, default=0) + 1
-    print(json.dumps({"next_id": f"US-{next_num:03d}"}))
+    # Peek only: use reserve-ids when several writers allocate at once
+    meta = load_metadata(args.backlog_path)
+    if "id_high_water" in meta:
+        high_water = max(meta["id_high_water"], meta.get("archive", {}).get("high_water", 0))
+    else:
+        high_water = _high_water(load_backlog(args.backlog_path))
+    print(json.dumps({"next_id": _format_id(high_water + 1)}))
 
 
 # --- CLI ---
@@ -568,14 +2070,50 @@ def main():
     p_list.add_argument("--status")
     p_list.add_argument("--feature")
     p_list.add_argument("--priority")
-    p_list.add_argument("--format", choices=["json", "table", "summary"], default="summary")
+    p_list.add_argument("--format", choices=["json", "table", "summary", "ndjson"], default="summary")
     p_list.add_argument("--fields", default=None, help="Comma-separated field names to return")
     p_list.add_argument("--limit", type=int, default=None, help="Max stories to return")
     p_list.add_argument("--offset", type=int, default=None, help="Skip first N stories")
+    p_list.add_argument("--include-archived", action="store_true", help="Also read the story archive")
+    p_list.add_argument("--after", default=None,
+                        help="Cursor: only stories with a higher US number than this id "
+                             "(with --limit, pages are taken in US-number order)")
 
     # stats
     p_stats = subparsers.add_parser("stats")
     p_stats.add_argument("backlog_path")
+    p_stats.add_argument("--all", action="store_true", help="Include archived stories in the counts")
+    p_stats.add_argument("--verify", action="store_true", help="Check the stored counters against a full recount")
+    p_stats.add_argument("--repair", action="store_true", help="With --verify, rewrite counters that do not match")
+
+    # archive
+    p_archive = subparsers.add_parser("archive")
+    p_archive.add_argument("backlog_path")
+    p_archive.add_argument("--caller", required=True)
+    p_archive.add_argument("--older-than-days", type=int, default=ARCHIVE_DEFAULT_DAYS,
+                           help=f"Archive terminal stories untouched for N days (default: {ARCHIVE_DEFAULT_DAYS})")
+    p_archive.add_argument("--before", default=None,
+                           help="Archive terminal stories last updated before this ISO-8601 time (e.g. the current run's start)")
+    p_archive.add_argument("--dry-run", action="store_true")
+
+    # search
+    p_search = subparsers.add_parser("search")
+    p_search.add_argument("backlog_path")
+    p_search.add_argument("--query", required=True)
+    p_search.add_argument("--in", dest="in_fields", default=None,
+                          help=f"Comma-separated fields to search (default: all of {','.join(SEARCH_FIELDS)})")
+    p_search.add_argument("--status")
+    p_search.add_argument("--feature")
+    p_search.add_argument("--priority")
+    p_search.add_argument("--limit", type=int, default=10, help="Top-k results (default: 10)")
+    p_search.add_argument("--rebuild", action="store_true", help="Rebuild the index from scratch")
+
+    # changes
+    p_changes = subparsers.add_parser("changes")
+    p_changes.add_argument("backlog_path")
+    p_changes.add_argument("--since", type=int, default=0, help="Return revisions after this sequence number")
+    p_changes.add_argument("--limit", type=int, default=None, help="Max revisions to return")
+    p_changes.add_argument("--fields", default=None, help="Comma-separated story snapshot fields to return")
 
     # get
     p_get = subparsers.add_parser("get")
@@ -592,6 +2130,8 @@ def main():
     p_render = subparsers.add_parser("render")
     p_render.add_argument("backlog_path")
     p_render.add_argument("--output", required=True)
+    p_render.add_argument("--max-nodes", type=int, default=RENDER_MAX_NODES,
+                          help=f"Node budget for the dependency map; larger features are collapsed (default: {RENDER_MAX_NODES})")
 
     # question
     p_question = subparsers.add_parser("question")
@@ -606,6 +2146,42 @@ def main():
     p_nextid = subparsers.add_parser("next-id")
     p_nextid.add_argument("backlog_path")
 
+    # reserve-ids
+    p_reserve = subparsers.add_parser("reserve-ids")
+    p_reserve.add_argument("backlog_path")
+    p_reserve.add_argument("--count", type=int, required=True)
+    p_reserve.add_argument("--caller", required=True)
+
+    # import
+    p_import = subparsers.add_parser("import")
+    p_import.add_argument("backlog_path")
+    p_import.add_argument("--input", required=True, help="JSON Lines or CSV file (or - for stdin)")
+    p_import.add_argument("--format", choices=["jsonl", "csv"], default=None,
+                          help="Input format (default: from the file extension, else jsonl)")
+    p_import.add_argument("--caller", required=True)
+    p_import.add_argument("--mode", choices=["upsert", "create"], default="upsert",
+                          help="upsert updates stories whose id exists; create rejects those rows")
+    p_import.add_argument("--dry-run", action="store_true", help="Validate and report without writing")
+
+    # export
+    p_export = subparsers.add_parser("export")
+    p_export.add_argument("backlog_path")
+    p_export.add_argument("--output", default=None, help="Output file (default: stdout)")
+    p_export.add_argument("--format", choices=["jsonl", "csv"], default=None,
+                          help="Output format (default: from the file extension, else jsonl)")
+    p_export.add_argument("--fields", default=None, help="Comma-separated field names to export")
+    p_export.add_argument("--status")
+    p_export.add_argument("--feature")
+    p_export.add_argument("--priority")
+    p_export.add_argument("--include-archived", action="store_true", help="Also export archived stories")
+    p_export.set_defaults(after=None)
+
+    # batch-create
+    p_batch = subparsers.add_parser("batch-create")
+    p_batch.add_argument("backlog_path")
+    p_batch.add_argument("--input", required=True, help="JSON array of stories (file path, or - for stdin)")
+    p_batch.add_argument("--caller", required=True)
+
     args = parser.parse_args()
 
     commands = {
@@ -615,11 +2191,18 @@ def main():
         "status": cmd_status,
         "list": cmd_list,
         "stats": cmd_stats,
+        "archive": cmd_archive,
+        "search": cmd_search,
+        "changes": cmd_changes,
         "get": cmd_get,
         "delete": cmd_delete,
         "render": cmd_render,
         "question": cmd_question,
         "next-id": cmd_next_id,
+        "reserve-ids": cmd_reserve_ids,
+        "batch-create": cmd_batch_create,
+        "import": cmd_import,
+        "export": cmd_export,
     }
 
     commands[args.command](args)
@@ -6,7 +6,8 @@ Eliminates LLM token consumption for operations that follow fixed rules:
 path resolution, phase sequencing, model lookup, gate parsing, token analysis, etc.
 
 Usage:
-    python agency_cli.py <command> <subcommand> [options]
+    python agency_cli.py <command> <subcommand> [options] [--compact] [--select <fields>] [--max-bytes <N>]
+    python agency_cli.py --cursor <token> [--max-bytes <N>]   (next page of a truncated result)
 
 Commands:
     init        Resolve project paths and initialize environment
@@ -24,6 +25,11 @@ Commands:
     metrics     Workflow observability (dashboard, stories, phase, export)
     notify      Windows toast notifications (send, phase-complete, sdlc-complete, input-needed)
     setup       Full project setup (CLAUDE.md, directories, hooks) — one-shot configuration
+
+Output options (any command, anywhere on the command line):
+    --compact            One-line JSON instead of indent=2
+    --select <fields>    Comma-separated field paths to keep, e.g. "waves[].agents[].name,total_agents"
+    --max-bytes <N>      Cap output size; oversized results are paged with a continuation cursor
 """
 
 import sys
@@ -39,6 +45,7 @@ if sys.stderr.encoding and sys.stderr.encoding.lower() not in ('utf-8', 'utf8'):
 # Add commands directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "commands"))
 
+import cli_output
 from commands.init_cmd import handle_init
 from commands.phase import handle_phase
 from commands.gate import handle_gate
@@ -75,26 +82,36 @@ COMMANDS = {
 
 
 def main():
-    if len(sys.argv) < 2 or sys.argv[1] in ("-h", "--help"):
+    try:
+        output, argv = cli_output.parse_output_options(sys.argv[1:])
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if output.cursor:
+        try:
+            print(cli_output.next_page(output))
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(0)
+
+    if not argv or argv[0] in ("-h", "--help"):
         print(__doc__.strip())
         print("\nCommands:")
         for cmd in COMMANDS:
             print(f"  {cmd}")
         sys.exit(0)
 
-    command = sys.argv[1]
+    command = argv[0]
     if command not in COMMANDS:
         print(f"Error: Unknown command '{command}'. Available: {', '.join(COMMANDS)}", file=sys.stderr)
         sys.exit(1)
 
     try:
-        result = COMMANDS[command](sys.argv[2:])
+        result = COMMANDS[command](argv[1:])
         if result is not None:
-            if isinstance(result, str):
-                print(result)
-            else:
-                import json
-                print(json.dumps(result, indent=2, ensure_ascii=False))
+            print(cli_output.render(result, output))
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,171 @@
+"""
+casfile -- Compare-and-swap commits for JSON documents written by parallel agents.
+
+Shared by backlog_manager (backlog.json) and agency_cli state (STATE.json and
+the pipeline shards). Every commit bumps a revision counter stored in the
+document and only lands if the on-disk revision is still the one the writer
+loaded. A short-lived ``<file>.commit`` marker makes check-and-replace atomic
+across processes; a marker older than COMMIT_MARKER_STALE_SECONDS was left by
+a crashed writer and is broken.
+
+transact() re-applies a mutation to a fresh copy on conflict (rebase), which
+is safe for the commutative operations agents run in parallel. Advisory fcntl
+locks on ``<file>.lock`` are only taken after CAS_MAX_RETRIES conflicts; lock
+holders then retry until they commit, which guarantees progress under heavy
+contention. Without fcntl (Windows) transact() gives up with ConflictError.
+
+The revision lives at the top level of the document, or inside the object
+named by ``meta_key`` (backlog.json keeps it in "metadata").
+"""
+
+import itertools
+import os
+import random
+import re
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import jsoncodec
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, CAS retries only
+    fcntl = None
+
+CAS_MAX_RETRIES = 20
+COMMIT_MARKER_STALE_SECONDS = 10
+COMMIT_MARKER_WAIT_SECONDS = 0.5
+_REVISION_RE = re.compile(rb'(?<!\\)"revision":\s*(\d+)')
+
+
+class ConflictError(Exception):
+    """The document changed on disk after it was loaded."""
+
+
+def read_revision(path, meta_key: str = None) -> int:
+    """Read the on-disk revision, scanning only the file header when possible."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(4096)
+    except FileNotFoundError:
+        return 0
+    match = _REVISION_RE.search(head)
+    if match:
+        return int(match.group(1))
+    with open(path, "rb") as f:
+        doc = jsoncodec.load(f)
+    return (doc.get(meta_key, {}) if meta_key else doc).get("revision", 0)
+
+
+def _try_commit_marker(marker: Path) -> bool:
+    """Exclusively create the commit marker; breaks markers left by crashed writers."""
+    try:
+        os.close(os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        try:
+            if time.time() - marker.stat().st_mtime > COMMIT_MARKER_STALE_SECONDS:
+                marker.unlink()
+        except FileNotFoundError:
+            pass
+        return False
+
+
+def _acquire_commit_marker(marker: Path) -> bool:
+    """Wait briefly for a concurrent commit to finish; commits take milliseconds."""
+    deadline = time.monotonic() + COMMIT_MARKER_WAIT_SECONDS
+    while not _try_commit_marker(marker):
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+def target_mode(path) -> int:
+    """Mode for a file replacing ``path``: keep the existing one, else honour the umask."""
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def save(path, doc: dict, meta_key: str = None, on_commit=None, prepare=None) -> None:
+    """Write ``doc`` atomically if nobody else committed since it was loaded.
+
+    Bumps the revision and updated_at, and raises ConflictError when the
+    on-disk revision no longer matches. ``on_commit()`` runs after the replace
+    while the commit marker is still held, so side files written there (the
+    backlog change feed) stay in revision order. ``prepare()`` runs under the
+    marker before the replace, for side files that must exist before the
+    document points past them (the backlog archive). It may return a callable
+    that undoes its work if the replace fails.
+    """
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    header = doc[meta_key] if meta_key else doc
+    marker = p.with_name(p.name + ".commit")
+    if not _acquire_commit_marker(marker):
+        raise ConflictError("commit in progress")
+    try:
+        expected = header.get("revision", 0)
+        if read_revision(p, meta_key) != expected:
+            raise ConflictError(f"revision {expected} is stale")
+        header["revision"] = expected + 1
+        header["updated_at"] = datetime.now(timezone.utc).isoformat()
+        undo = None
+        fd, tmp = tempfile.mkstemp(dir=p.parent, prefix=".tmp_", suffix=".json")
+        try:
+            if prepare:
+                undo = prepare()
+            os.chmod(tmp, target_mode(p))  # mkstemp creates 0600
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                jsoncodec.dump(doc, f)
+            try:
+                os.replace(tmp, p)
+            except PermissionError as e:  # Windows: target held open by a reader
+                raise ConflictError(str(e))
+        except BaseException:
+            header["revision"] = expected
+            if undo:
+                undo()
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        if on_commit:
+            on_commit()
+    finally:
+        marker.unlink(missing_ok=True)
+
+
+def transact(path, load, mutate, commit):
+    """Load, mutate and commit a document, rebasing the mutation on conflict.
+
+    ``load(path)`` returns a fresh copy, ``mutate(doc)`` must derive everything
+    it writes from ``doc`` so it can be re-applied, and ``commit(path, doc,
+    result)`` saves it (raising ConflictError when it lost the race). The
+    return value of ``mutate`` is passed through.
+    """
+    lock_file = None
+    try:
+        for attempt in itertools.count():
+            if attempt == CAS_MAX_RETRIES:
+                if fcntl is None:
+                    raise ConflictError(f"Gave up after {attempt} attempts: {path}")
+                p = Path(path)
+                p.parent.mkdir(parents=True, exist_ok=True)
+                lock_file = open(p.with_name(p.name + ".lock"), "a")
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            doc = load(path)
+            result = mutate(doc)
+            try:
+                commit(path, doc, result)
+                return result
+            except ConflictError:
+                time.sleep(random.uniform(0, 0.001 * min(attempt + 1, CAS_MAX_RETRIES)))
+    finally:
+        if lock_file is not None:
+            lock_file.close()
@@ -0,0 +1,251 @@
+"""
+cli_output -- Output shaping that agency_cli.main applies to every command's result.
+
+Global options (accepted anywhere on the command line):
+    --compact            Print one-line JSON instead of indent=2
+    --select <paths>     Keep only these comma-separated fields, e.g.
+                         "waves[].agents[].name,total_agents". Lists are mapped
+                         implicitly, so "waves.agents.name" is equivalent; [N]
+                         or .N picks one element.
+    --max-bytes <N>      Cap the printed output at N bytes (UTF-8). An oversized
+                         result is paged: its largest list is cut and a
+                         "truncated" block carries a cursor for the rest.
+    --cursor <token>     Print the next page of a truncated result; no command
+                         is needed and the command is not re-run.
+
+Pages are served from a spool file in the temp directory written when the
+result was first truncated. Spool files expire after PAGE_TTL_SECONDS.
+"""
+
+import argparse
+import os
+import re
+import secrets
+import tempfile
+import time
+
+import jsoncodec
+
+PAGE_TTL_SECONDS = 6 * 3600
+SPOOL_DIR = os.path.join(tempfile.gettempdir(), "agency_cli_pages")
+_PATH_TOKEN_RE = re.compile(r"\[\*?\]|\[(\d+)\]|([^.\[\]]+)")
+_CURSOR_RE = re.compile(r"^([0-9a-f]{16}):(\d+)$")
+
+
+def parse_output_options(argv: list[str]) -> tuple:
+    """Split global output options out of argv. Returns (options, remaining argv)."""
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--select")
+    parser.add_argument("--max-bytes", type=int)
+    parser.add_argument("--cursor")
+    opts, rest = parser.parse_known_args(argv)
+    if opts.max_bytes is not None and opts.max_bytes < 256:
+        raise ValueError("--max-bytes must be at least 256")
+    return opts, rest
+
+
+def render(result, opts) -> str:
+    """Apply --select, --compact and --max-bytes to a command result."""
+    if opts.select and not isinstance(result, str):
+        result = project(result, parse_select(opts.select))
+    text = _serialize(result, opts.compact)
+    if not opts.max_bytes or _size(text) <= opts.max_bytes:
+        return text
+    return _first_page(result, text, opts)
+
+
+def next_page(opts) -> str:
+    """Render the page a --cursor token points at."""
+    match = _CURSOR_RE.match(opts.cursor or "")
+    spool = os.path.join(SPOOL_DIR, f"{match.group(1)}.json") if match else None
+    try:
+        with open(spool, "rb") as f:
+            state = jsoncodec.load(f)
+    except (TypeError, OSError, jsoncodec.JSONDecodeError):
+        raise ValueError(f"Unknown or expired cursor: {opts.cursor}")
+    max_bytes = opts.max_bytes or state["max_bytes"]
+    compact = opts.compact or state["compact"]
+    offset = int(match.group(2))
+    if state["mode"] == "text":
+        return _text_page(state["text"], offset, match.group(1), max_bytes, compact)
+    return _items_page(state, offset, match.group(1), max_bytes, compact)
+
+
+# --- Field selection ---
+
+def parse_select(spec: str) -> dict:
+    """Build a selection trie from comma-separated paths. A None leaf keeps the whole value."""
+    trie = {}
+    for path in spec.split(","):
+        path = path.strip()
+        if path.startswith("$"):
+            path = path[1:].lstrip(".")
+        keys = [index or key for index, key in _PATH_TOKEN_RE.findall(path) if index or key]
+        node = trie
+        for i, key in enumerate(keys):
+            if key in node and node[key] is None:
+                break  # a shorter path already selects this subtree
+            if i == len(keys) - 1:
+                node[key] = None
+            else:
+                node = node.setdefault(key, {})
+    return trie
+
+
+def project(value, trie):
+    """Keep the parts of value that the selection trie names, preserving structure."""
+    if trie is None:
+        return value
+    if isinstance(value, list):
+        picks = [int(k) for k in trie if k.isdigit()]
+        if picks:
+            return [project(value[i], trie[str(i)]) for i in picks if i < len(value)]
+        return [project(v, trie) for v in value]
+    if isinstance(value, dict):
+        return {k: project(v, trie[k]) for k, v in value.items() if k in trie}
+    return value
+
+
+# --- Paging ---
+#
+# The first page is the result with one list cut short: the largest list (by
+# compact size) whose items each fit in half the budget and without which the
+# rest of the result fits. Later pages carry the next items of that list. A
+# result with no such list (one huge string, oversized items, several large
+# lists) is paged as raw JSON text instead.
+
+def _serialize(value, compact: bool) -> str:
+    if isinstance(value, str):
+        return value
+    return jsoncodec.dumps(value, pretty=not compact)
+
+
+def _size(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def _pageable_lists(result, budget: int) -> list:
+    """Paths of lists whose items each fit in budget and whose removal brings the
+    result under budget, largest first (sizes are compact-encoding bytes)."""
+    found = []
+
+    def walk(node, path):
+        if isinstance(node, dict):
+            sizes = [_size(jsoncodec.dumps(k)) + 1 + walk(v, path + [k]) for k, v in node.items()]
+        elif isinstance(node, list):
+            sizes = [walk(v, path + [i]) for i, v in enumerate(node)]
+        else:
+            return _size(jsoncodec.dumps(node))
+        total = 2 + sum(sizes) + max(len(sizes) - 1, 0)
+        if isinstance(node, list) and len(node) > 1 and max(sizes) <= budget // 2:
+            found.append((total, path))
+        return total
+
+    root = walk(result, [])
+    return [path for size, path in sorted(found, key=lambda f: -f[0]) if root - size < budget]
+
+
+def _get(value, path: list):
+    for key in path:
+        value = value[key]
+    return value
+
+
+def _with_slice(result, path: list, items: list):
+    """Copy of result with the list at path replaced by items (containers on the path are copied)."""
+    if not path:
+        return items
+    head = list(result) if isinstance(result, list) else dict(result)
+    head[path[0]] = _with_slice(result[path[0]], path[1:], items)
+    return head
+
+
+def _spool(spool_id: str, state: dict):
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    now = time.time()
+    for name in os.listdir(SPOOL_DIR):
+        try:
+            if now - os.path.getmtime(os.path.join(SPOOL_DIR, name)) > PAGE_TTL_SECONDS:
+                os.unlink(os.path.join(SPOOL_DIR, name))
+        except OSError:
+            pass
+    with open(os.path.join(SPOOL_DIR, f"{spool_id}.json"), "w", encoding="utf-8") as f:
+        jsoncodec.dump(state, f)
+
+
+def _fit(count: int, build, max_bytes: int) -> int:
+    """Largest n in [1, count] with _size(build(n)) <= max_bytes, or 0 if none fits."""
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if _size(build(mid)) <= max_bytes:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _first_page(result, text: str, opts) -> str:
+    max_bytes, compact = opts.max_bytes, opts.compact
+    spool_id = secrets.token_hex(8)
+    for path in [] if isinstance(result, str) else _pageable_lists(result, max_bytes):
+        items = _get(result, path)
+        dotted = ".".join(str(k) for k in path)
+
+        def build(n):
+            page = _with_slice(result, path, items[:n])
+            marker = {"path": dotted, "returned": n, "total": len(items), "cursor": f"{spool_id}:{n}"}
+            if isinstance(page, dict):
+                page = {**page, "truncated": marker}
+            else:
+                page = {"items": page, "truncated": marker}
+            return _serialize(page, compact)
+
+        n = _fit(len(items), build, max_bytes)
+        if n:
+            _spool(spool_id, {"mode": "items", "path": path, "items": items,
+                              "max_bytes": max_bytes, "compact": compact})
+            return build(n)
+    _spool(spool_id, {"mode": "text", "text": text, "max_bytes": max_bytes, "compact": compact})
+    return _text_page(text, 0, spool_id, max_bytes, compact)
+
+
+def _items_page(state: dict, offset: int, spool_id: str, max_bytes: int, compact: bool) -> str:
+    items = state["items"]
+    dotted = ".".join(str(k) for k in state["path"])
+
+    def build(n):
+        end = offset + n
+        page = {
+            "path": dotted,
+            "offset": offset,
+            "items": items[offset:end],
+            "total": len(items),
+            "cursor": f"{spool_id}:{end}" if end < len(items) else None,
+        }
+        return _serialize(page, compact)
+
+    # Always make progress, even if a single item overshoots a smaller --max-bytes
+    return build(max(_fit(len(items) - offset, build, max_bytes), 1))
+
+
+def _text_page(text: str, offset: int, spool_id: str, max_bytes: int, compact: bool) -> str:
+    raw = text.encode("utf-8")
+
+    def build(n):
+        chunk = raw[offset:offset + n].decode("utf-8", errors="ignore")
+        end = offset + _size(chunk)
+        page = {
+            "truncated": {
+                "mode": "text",
+                "offset": offset,
+                "returned": end - offset,
+                "total": len(raw),
+                "cursor": f"{spool_id}:{end}" if end < len(raw) else None,
+            },
+            "text": chunk,
+        }
+        return _serialize(page, compact)
+
+    return build(max(_fit(len(raw) - offset, build, max_bytes), 1))
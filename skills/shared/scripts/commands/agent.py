@@ -2,20 +2,32 @@
 agency_cli agent -- Agent configuration: model lookup, naming, prompt generation, ordering.
 
 Usage:
-    agency_cli agent model --role <role> --phase <phase>
+    agency_cli agent model --role <role> --phase <phase> [--project-root <path>]
     agency_cli agent name --role <role> --phase <phase> --type <lead|assist>
     agency_cli agent list --phase <phase>
     agency_cli agent prompt --role <role> --phase <phase> --project-root <path> ...
+    agency_cli agent prompt --hash <sha> --project-root <path>   # fetch a stored prompt
     agency_cli agent order --phase <phase>
+    agency_cli agent route --project-root <path> --history <STATE.json|dir>[,...] [--target <rate>] [--min-samples <n>] [--apply]
+        # Recommend (or apply) the fastest model per (phase, role) meeting a first-try gate pass rate
+    agency_cli agent assists --state-path <path> [--phase <phase>] [--threshold <rate>] [--min-samples <n>]
+        # Measured contribution of each assist and the time auto-prune would save per phase
+    agency_cli agent prompt-stats --phase <phase|all> --project-root <path> --script-path <path> --backlog-path <path> --objective <text>
 """
 
 import argparse
-import json
+import hashlib
 import os
+import tempfile
 
 VALID_ROLES = {"pm", "po", "tl", "dev", "qa"}
 VALID_PHASES = {"plan", "design", "validate", "implement", "review", "test", "document"}
 
+# Generated prompts are content-addressed: phase prepare and pipeline agents
+# return a hash per agent instead of the full text (see pack_prompts)
+PROMPT_STORE_DIR = os.path.join("agent_docs", "agency", "prompts")
+PROMPT_HASH_LENGTH = 16
+
 
 def validate_role(role: str) -> str:
     """Validate and normalize role name."""
@@ -77,6 +89,21 @@ PHASE_ORDER = {
     "document": [["pm", "tl"], ["po", "dev", "qa"]],    # PM+TL parallel, rest after
 }
 
+# Prompts are laid out from most-shared to least-shared so that the agents of a
+# phase (and of consecutive phases) share one long prefix, which provider-side
+# prompt caching can reuse: static instructions, project paths, objective,
+# phase, then the role-specific part.
+PROMPT_SEGMENTS = ("instructions", "paths", "objective", "phase", "role")
+PROMPT_INSTRUCTIONS = (
+    "Use the resolved paths below directly, do NOT re-resolve via Glob. "
+    "Read CLAUDE.md in the PROJECT_ROOT directory for context. "
+    "Do NOT use AskUserQuestion -- return questions to me. "
+    "When done, mark your task as completed via TaskUpdate."
+)
+# Smallest prefix providers will cache; shorter shared prefixes are reported
+# but will not produce cache hits on their own
+PROMPT_CACHE_MIN_TOKENS = 1024
+
 # Gate verdict suffixes for lead prompts
 GATE_SUFFIXES = {
     "validate": 'End output with [VERDICT:APPROVED] or [VERDICT:REPROVED].',
@@ -137,11 +164,11 @@ def _bash_path(path: str) -> str:
     return path.replace("\\", "/").rstrip("/")
 
 
-def generate_prompt(role: str, phase: str, project_root: str, script_path: str,
+def prompt_segments(role: str, phase: str, project_root: str, script_path: str,
                     backlog_path: str, objective: str, agent_type: str = None,
                     cli_path: str = None, state_path: str = None,
-                    docs_path: str = None) -> str:
-    """Generate the full agent spawn prompt.
+                    docs_path: str = None) -> list[tuple[str, str]]:
+    """Return the prompt as (segment, text) pairs in PROMPT_SEGMENTS order.
 
     All paths are normalized to forward slashes for bash compatibility on Windows.
     """
@@ -178,31 +205,147 @@ def generate_prompt(role: str, phase: str, project_root: str, script_path: str,
     env_block = " | ".join(env_lines)
 
     if atype == "lead":
-        prompt = (
+        role_text = (
             f"You are the {role.upper()}. Invoke the `{skill_cmd}` skill. "
-            f"The project objective is: {objective}. "
-            f"Resolved paths (use these directly, do NOT re-resolve via Glob): {env_block}. "
-            f"Read CLAUDE.md at {project_root}/CLAUDE.md for context. "
-            f"If you need clarification, list all questions prefixed with [QUESTIONS]. "
-            f"Do NOT use AskUserQuestion -- return questions to me. "
-            f"When done, mark your task as completed via TaskUpdate."
+            f"If you need clarification, list all questions prefixed with [QUESTIONS]."
         )
         # Add gate suffix if applicable
-        gate_suffix = GATE_SUFFIXES.get(phase.lower())
+        gate_suffix = GATE_SUFFIXES.get(phase)
         if gate_suffix:
-            prompt += f" {gate_suffix}"
+            role_text += f" {gate_suffix}"
     else:
-        prompt = (
+        role_text = (
             f"You are the {role.upper()} assist. Invoke the `{skill_cmd}` skill. "
-            f"The project objective is: {objective}. "
-            f"Resolved paths (use these directly, do NOT re-resolve via Glob): {env_block}. "
-            f"Read CLAUDE.md at {project_root}/CLAUDE.md for context. "
-            f"Provide your [NOTES] and review findings. "
-            f"Do NOT use AskUserQuestion -- return questions to me. "
-            f"When done, mark your task as completed via TaskUpdate."
+            f"Provide your [NOTES] and review findings."
         )
 
-    return prompt
+    return [
+        ("instructions", PROMPT_INSTRUCTIONS),
+        ("paths", f"Resolved paths: {env_block}."),
+        ("objective", f"The project objective is: {objective}."),
+        ("phase", f"Current phase: {phase}."),
+        ("role", role_text),
+    ]
+
+
+def generate_prompt(role: str, phase: str, project_root: str, script_path: str,
+                    backlog_path: str, objective: str, agent_type: str = None,
+                    cli_path: str = None, state_path: str = None,
+                    docs_path: str = None) -> str:
+    """Generate the full agent spawn prompt (see prompt_segments for the layout)."""
+    segments = prompt_segments(role, phase, project_root, script_path, backlog_path, objective,
+                               agent_type, cli_path=cli_path, state_path=state_path,
+                               docs_path=docs_path)
+    return " ".join(text for _, text in segments)
+
+
+def prompt_stats(phase: str, project_root: str, script_path: str, backlog_path: str,
+                 objective: str, skip_assists: bool = False, cli_path: str = None,
+                 state_path: str = None, docs_path: str = None) -> dict:
+    """Measure how much of a phase's agent prompts a prefix cache can reuse.
+
+    The first agent spawned writes the shared prefix to the cache; every later
+    agent reads it, so cached tokens = shared prefix tokens * (agents - 1).
+    """
+    from tokens import estimate_tokens
+
+    agents = []
+    for wave_roles in PHASE_ORDER[validate_phase(phase)]:
+        for role in wave_roles:
+            info = AGENT_MATRIX.get((phase, role))
+            if not info or (skip_assists and info["type"] == "assist"):
+                continue
+            segments = prompt_segments(role, phase, project_root, script_path, backlog_path,
+                                       objective, info["type"], cli_path=cli_path,
+                                       state_path=state_path, docs_path=docs_path)
+            agents.append((get_agent_name(role, phase, info["type"]), segments))
+
+    prompts = [" ".join(text for _, text in segments) for _, segments in agents]
+    prefix = os.path.commonprefix(prompts) if len(prompts) > 1 else ""
+    # Name the segment each prompt first diverges in
+    diverges_at = None
+    if len(prompts) > 1:
+        offset = 0
+        for name, text in agents[0][1]:
+            offset += len(text) + 1
+            if offset > len(prefix):
+                diverges_at = name
+                break
+
+    prefix_tokens = estimate_tokens(prefix)
+    total_tokens = sum(estimate_tokens(p) for p in prompts)
+    cached_tokens = prefix_tokens * max(len(prompts) - 1, 0)
+    return {
+        "phase": phase,
+        "agents": len(prompts),
+        "shared_prefix_chars": len(prefix),
+        "shared_prefix_tokens": prefix_tokens,
+        "diverges_at": diverges_at,
+        "total_prompt_tokens": total_tokens,
+        "estimated_cached_tokens": cached_tokens,
+        "cache_hit_ratio": round(cached_tokens / total_tokens, 3) if total_tokens else 0.0,
+        "meets_cache_minimum": prefix_tokens >= PROMPT_CACHE_MIN_TOKENS,
+        "per_agent": [
+            {"name": name, "tokens": estimate_tokens(p), "unique_tokens": estimate_tokens(p[len(prefix):])}
+            for (name, _), p in zip(agents, prompts)
+        ],
+    }
+
+
+def prompt_store_path(project_root: str) -> str:
+    return os.path.join(project_root, PROMPT_STORE_DIR)
+
+
+def store_prompt(prompt: str, project_root: str) -> str:
+    """Write prompt to the store (once per distinct text) and return its hash."""
+    sha = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:PROMPT_HASH_LENGTH]
+    store = prompt_store_path(project_root)
+    target = os.path.join(store, f"{sha}.txt")
+    if not os.path.exists(target):
+        os.makedirs(store, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=store, prefix=".tmp_", suffix=".txt")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                f.write(prompt)
+            os.replace(tmp, target)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+    return sha
+
+
+def load_prompt(sha: str, project_root: str) -> str:
+    """Read a stored prompt by hash or unique hash prefix."""
+    store = prompt_store_path(project_root)
+    sha = sha.strip().lower()
+    if len(sha) < 6 or not all(c in "0123456789abcdef" for c in sha):
+        raise ValueError(f"Invalid prompt hash: {sha}")
+    try:
+        matches = [n for n in os.listdir(store) if n.startswith(sha) and n.endswith(".txt")]
+    except FileNotFoundError:
+        matches = []
+    if not matches:
+        raise ValueError(f"Prompt {sha} not found in {store}")
+    if len(matches) > 1:
+        raise ValueError(f"Prompt hash prefix {sha} is ambiguous")
+    with open(os.path.join(store, matches[0]), "r", encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def pack_prompts(agents: list[dict], project_root: str) -> dict:
+    """Move each agent's "prompt" into the store, in place.
+
+    Each agent keeps "prompt_hash" and "prompt_suffix"; the returned dict holds
+    the "prompt_prefix" shared by all of them and the store directory, so
+    prompt == prompt_prefix + prompt_suffix.
+    """
+    prefix = os.path.commonprefix([a["prompt"] for a in agents]) if agents else ""
+    for agent in agents:
+        prompt = agent.pop("prompt")
+        agent["prompt_hash"] = store_prompt(prompt, project_root)
+        agent["prompt_suffix"] = prompt[len(prefix):]
+    return {"prompt_prefix": prefix, "prompt_store": _bash_path(prompt_store_path(project_root))}
 
 
 def get_order(phase: str, skip_assists: bool = False) -> list[dict]:
@@ -245,7 +388,7 @@ def get_order(phase: str, skip_assists: bool = False) -> list[dict]:
 
 def handle_agent(args: list[str]) -> dict | list | str:
     if not args:
-        raise ValueError("Subcommand required: model, name, list, prompt, order")
+        raise ValueError("Subcommand required: model, name, list, prompt, prompt-stats, order, route, assists")
 
     subcmd = args[0]
 
@@ -253,8 +396,16 @@ def handle_agent(args: list[str]) -> dict | list | str:
         parser = argparse.ArgumentParser(prog="agency_cli agent model")
         parser.add_argument("--role", required=True)
         parser.add_argument("--phase", required=True)
+        parser.add_argument("--project-root", default=None,
+                            help="Apply routing.json / routing-overrides.json from this project")
         opts = parser.parse_args(args[1:])
-        return {"model": get_model(opts.role, opts.phase)}
+        if not opts.project_root:
+            return {"model": get_model(opts.role, opts.phase)}
+        from routing import load_routes, resolve_model
+        get_model(opts.role, opts.phase)  # validates role/phase
+        model, source = resolve_model(validate_role(opts.role), validate_phase(opts.phase),
+                                      load_routes(opts.project_root))
+        return {"model": model, "source": source}
 
     elif subcmd == "name":
         parser = argparse.ArgumentParser(prog="agency_cli agent name")
@@ -274,11 +425,13 @@ def handle_agent(args: list[str]) -> dict | list | str:
 
     elif subcmd == "prompt":
         parser = argparse.ArgumentParser(prog="agency_cli agent prompt")
-        parser.add_argument("--role", required=True)
-        parser.add_argument("--phase", required=True)
+        parser.add_argument("--hash", default=None,
+                            help="Return the stored prompt with this hash (needs only --project-root)")
+        parser.add_argument("--role")
+        parser.add_argument("--phase")
         parser.add_argument("--project-root", required=True)
-        parser.add_argument("--script-path", required=True)
-        parser.add_argument("--backlog-path", required=True)
+        parser.add_argument("--script-path")
+        parser.add_argument("--backlog-path")
         parser.add_argument("--objective", required=False, default=None)
         parser.add_argument("--objective-stdin", action="store_true",
                             help="Read objective from stdin (avoids shell escaping issues)")
@@ -288,6 +441,14 @@ def handle_agent(args: list[str]) -> dict | list | str:
         parser.add_argument("--state-path", required=False, default=None,
                             help="Path to STATE.json")
         opts = parser.parse_args(args[1:])
+        if opts.hash:
+            prompt = load_prompt(opts.hash, opts.project_root)
+            sha = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:PROMPT_HASH_LENGTH]
+            return {"hash": sha, "prompt": prompt}
+        missing = [f"--{n.replace('_', '-')}" for n in ("role", "phase", "script_path", "backlog_path")
+                   if not getattr(opts, n)]
+        if missing:
+            parser.error(f"the following arguments are required: {', '.join(missing)}")
         if opts.objective_stdin:
             import sys as _sys
             objective = _sys.stdin.read().strip()
@@ -308,6 +469,35 @@ def handle_agent(args: list[str]) -> dict | list | str:
                 "name": get_agent_name(opts.role, opts.phase,
                     opts.type or AGENT_MATRIX[(opts.phase.lower(), opts.role.lower())]["type"])}
 
+    elif subcmd == "prompt-stats":
+        parser = argparse.ArgumentParser(prog="agency_cli agent prompt-stats")
+        parser.add_argument("--phase", required=True, help="Phase name, or 'all'")
+        parser.add_argument("--project-root", required=True)
+        parser.add_argument("--script-path", required=True)
+        parser.add_argument("--backlog-path", required=True)
+        parser.add_argument("--objective", required=True)
+        parser.add_argument("--state-path", default=None)
+        parser.add_argument("--docs-path", default=None)
+        parser.add_argument("--skip-assists", action="store_true")
+        opts = parser.parse_args(args[1:])
+        cli_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "agency_cli.py"))
+        phases = list(PHASE_ORDER) if opts.phase.lower() == "all" else [validate_phase(opts.phase)]
+        reports = [
+            prompt_stats(p, opts.project_root, opts.script_path, opts.backlog_path, opts.objective,
+                         skip_assists=opts.skip_assists, cli_path=cli_path,
+                         state_path=opts.state_path, docs_path=opts.docs_path)
+            for p in phases
+        ]
+        return reports[0] if len(reports) == 1 else {"phases": reports}
+
+    elif subcmd == "assists":
+        from assists import assists_report
+        return assists_report(args[1:])
+
+    elif subcmd == "route":
+        from routing import route
+        return route(args[1:])
+
     elif subcmd == "order":
         parser = argparse.ArgumentParser(prog="agency_cli agent order")
         parser.add_argument("--phase", required=True)
@@ -0,0 +1,211 @@
+"""
+agency_cli agent assists -- Measured contribution of assist agents and auto-prune.
+
+Assists are optional by design. This module records what each one actually
+contributed so that `phase prepare --auto-prune` can drop those that never
+change anything. Evidence is appended to a ledger next to STATE.json
+(assists.jsonl), which outlives STATE.json across runs:
+
+    {"kind": "assist", "run": ..., "phase": "plan", "role": "dev", "notes": 4, "cited": 0, "referenced": false, "seconds": 95}
+        written by `state assist-record` once the lead has used (or ignored) the assist's [NOTES]
+    {"kind": "gate", "run": ..., "gate": "validate", "verdict": {...}, "assists": {"plan": ["tl", "qa"], ...}}
+        written by `state gate-record` on a gate's first iteration, with the assists that ran
+        in the phases the gate judges (from phases.<phase>.models)
+
+An assist's contribution is the larger of its reference rate (share of runs in
+which the lead cited its notes) and its gate lift (first-try pass rate of the
+judging gate with the assist minus without it). Assists with at least
+min_samples recorded runs and a contribution below the threshold are pruned.
+
+Usage:
+    agency_cli agent assists --state-path <path> [--phase <phase>] [--threshold 0.2] [--min-samples 3]
+"""
+
+import argparse
+import os
+import re
+
+import jsoncodec
+from agent import AGENT_MATRIX, PHASE_ORDER, validate_phase
+from routing import GATE_JUDGE, PASSING
+
+LEDGER_FILE = "assists.jsonl"
+
+DEFAULT_PRUNE_THRESHOLD = 0.2
+DEFAULT_MIN_SAMPLES = 3
+
+# A note item counts as cited when this share of its distinctive words
+# appears in the lead's artifact
+CITATION_OVERLAP = 0.6
+_WORD_RE = re.compile(r"[a-z][a-z0-9_]{4,}")
+_STOPWORDS = frozenset(
+    "about above after again against being below between could doing during "
+    "further having other should their there these those through under until "
+    "where which while would notes should shall might".split()
+)
+
+
+def ledger_path(state_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(state_path)), LEDGER_FILE)
+
+
+def append_ledger(state_path: str, entry: dict) -> None:
+    """Append one evidence line; a single short write keeps concurrent appends whole."""
+    with open(ledger_path(state_path), "a", encoding="utf-8") as f:
+        f.write(jsoncodec.dumps(entry) + "\n")
+
+
+def read_ledger(state_path: str) -> list[dict]:
+    path = ledger_path(state_path)
+    if not os.path.exists(path):
+        return []
+    entries = []
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                entries.append(jsoncodec.loads(line))
+            except (ValueError, jsoncodec.JSONDecodeError):
+                continue  # torn line from an interrupted append
+    return entries
+
+
+def is_assist(phase: str, role: str) -> bool:
+    info = AGENT_MATRIX.get((phase, role))
+    return bool(info) and info["type"] == "assist"
+
+
+def gate_assists(gate: str, phases: dict) -> dict:
+    """Assists that ran in the phases judged by a gate, from phases.<phase>.models."""
+    ran = {}
+    for phase, (gate_phase, _) in GATE_JUDGE.items():
+        if gate_phase == gate:
+            models = phases.get(phase, {}).get("models", {})
+            ran[phase] = sorted(r for r in models if is_assist(phase, r))
+    return ran
+
+
+def count_citations(notes: str, lead_text: str) -> tuple[int, int]:
+    """Return (note items, items cited by the lead text).
+
+    Note items are the non-empty lines of the assist's output (bullets,
+    numbered findings); an item is cited when most of its distinctive words
+    appear in the lead's artifact.
+    """
+    lead_words = set(_WORD_RE.findall(lead_text.lower()))
+    items = cited = 0
+    for line in notes.splitlines():
+        line = line.strip().lstrip("-*#0123456789.) ").strip()
+        if not line or line.upper().startswith("[NOTES]"):
+            continue
+        words = set(_WORD_RE.findall(line.lower())) - _STOPWORDS
+        if len(words) < 2:
+            continue
+        items += 1
+        if len(words & lead_words) >= CITATION_OVERLAP * len(words):
+            cited += 1
+    return items, cited
+
+
+def _passed(verdict: dict, voter: str):
+    value = verdict.get(voter) if voter else (verdict.get("combined") or verdict.get("verdict"))
+    return value in PASSING if value else None
+
+
+def contributions(entries: list[dict], min_samples: int = DEFAULT_MIN_SAMPLES) -> dict:
+    """Return {(phase, role): stats} for every assist in AGENT_MATRIX."""
+    result = {}
+    for (phase, role), info in AGENT_MATRIX.items():
+        if info["type"] != "assist":
+            continue
+        records = [e for e in entries if e.get("kind") == "assist"
+                   and e.get("phase") == phase and e.get("role") == role]
+        referenced = [bool(e.get("referenced")) for e in records]
+        seconds = [e["seconds"] for e in records if isinstance(e.get("seconds"), (int, float))]
+
+        gate_phase, voter = GATE_JUDGE.get(phase, (None, None))
+        with_, without = [], []
+        for e in entries:
+            if e.get("kind") != "gate" or e.get("gate") != gate_phase or phase not in e.get("assists", {}):
+                continue
+            ok = _passed(e.get("verdict", {}), voter)
+            if ok is not None:
+                (with_ if role in e["assists"][phase] else without).append(ok)
+
+        reference_rate = round(sum(referenced) / len(referenced), 3) if referenced else None
+        gate_lift = None
+        if with_ and without:
+            gate_lift = round(sum(with_) / len(with_) - sum(without) / len(without), 3)
+        measured = [v for v in (reference_rate, gate_lift) if v is not None]
+        result[(phase, role)] = {
+            "phase": phase,
+            "role": role,
+            "samples": len(records),
+            "reference_rate": reference_rate,
+            "gate_lift": gate_lift,
+            "gate_runs": {"with": len(with_), "without": len(without)},
+            "contribution": max(measured) if measured else None,
+            "mean_seconds": round(sum(seconds) / len(seconds)) if seconds else None,
+            "enough_data": len(records) >= min_samples,
+        }
+    return result
+
+
+def prune_set(stats: dict, threshold: float) -> set:
+    """(phase, role) pairs whose measured contribution is below threshold."""
+    return {key for key, s in stats.items()
+            if s["enough_data"] and s["contribution"] is not None and s["contribution"] < threshold}
+
+
+def time_saved(phase: str, pruned: set, stats: dict) -> dict:
+    """Expected wall-clock saving for a phase from its PHASE_ORDER waves.
+
+    Agents in a wave run in parallel, so a wave lasts as long as its slowest
+    agent. Pruning an assist that shares a wave with a lead saves a spawn but
+    no time (the lead's duration is not recorded, so it is assumed to
+    dominate); an assist-only wave shrinks to its slowest remaining agent and
+    disappears once every assist in it is pruned.
+    """
+    seconds_saved = 0
+    unknown = False
+    waves_removed = 0
+    for wave in PHASE_ORDER.get(phase, []):
+        roles = [r for r in wave if (phase, r) in AGENT_MATRIX]
+        dropped = [r for r in roles if (phase, r) in pruned]
+        if not dropped or any(not is_assist(phase, r) for r in roles):
+            continue
+        kept = [r for r in roles if r not in dropped]
+        waves_removed += not kept
+        before = [stats[(phase, r)]["mean_seconds"] for r in roles]
+        after = [stats[(phase, r)]["mean_seconds"] for r in kept]
+        if None in before:
+            unknown = True
+            continue
+        seconds_saved += max(before) - max(after, default=0)
+    return {
+        "assists_pruned": sorted(r for p, r in pruned if p == phase),
+        "waves_removed": waves_removed,
+        "expected_seconds_saved": None if unknown and not seconds_saved else seconds_saved,
+    }
+
+
+def assists_report(args: list[str]) -> dict:
+    """Handle 'agent assists'."""
+    parser = argparse.ArgumentParser(prog="agency_cli agent assists")
+    parser.add_argument("--state-path", required=True, help="Path to STATE.json (the ledger lives next to it)")
+    parser.add_argument("--phase", help="Only report this phase")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_PRUNE_THRESHOLD,
+                        help=f"Contribution below which an assist is pruned (default: {DEFAULT_PRUNE_THRESHOLD})")
+    parser.add_argument("--min-samples", type=int, default=DEFAULT_MIN_SAMPLES,
+                        help=f"Recorded runs needed before an assist can be pruned (default: {DEFAULT_MIN_SAMPLES})")
+    opts = parser.parse_args(args)
+
+    phases = [validate_phase(opts.phase)] if opts.phase else list(PHASE_ORDER)
+    stats = contributions(read_ledger(opts.state_path), opts.min_samples)
+    pruned = prune_set(stats, opts.threshold)
+    return {
+        "ledger": ledger_path(opts.state_path).replace("\\", "/"),
+        "threshold": opts.threshold,
+        "min_samples": opts.min_samples,
+        "assists": [s for (p, _), s in stats.items() if p in phases],
+        "phases": {p: time_saved(p, pruned, stats) for p in phases},
+    }
@@ -14,6 +14,8 @@ import os
 import subprocess
 import sys
 
+import jsoncodec
+
 # Valid statuses
 STATUSES = [
     "Draft", "Ready", "In Design", "Validated",
@@ -86,8 +88,12 @@ def run_backlog_cmd(script_path: str, backlog_path: str, cmd_args: list[str]) ->
     try:
         result = subprocess.run(full_cmd, capture_output=True, text=True, timeout=30)
         if result.returncode != 0:
-            return {"success": False, "error": result.stderr.strip()}
-        return json.loads(result.stdout) if result.stdout.strip() else {"success": True}
+            # backlog_manager reports validation errors as JSON on stdout
+            try:
+                return {"success": False, **json.loads(result.stdout)}
+            except (json.JSONDecodeError, TypeError):
+                return {"success": False, "error": result.stderr.strip() or result.stdout.strip()}
+        return jsoncodec.loads(result.stdout) if result.stdout.strip() else {"success": True}
     except json.JSONDecodeError:
         return {"success": True, "output": result.stdout.strip()}
     except subprocess.TimeoutExpired:
@@ -96,6 +102,38 @@ def run_backlog_cmd(script_path: str, backlog_path: str, cmd_args: list[str]) ->
         return {"success": False, "error": str(e)}
 
 
+def iter_backlog_stories(script_path: str, backlog_path: str, list_args: list[str]):
+    """Stream stories from `backlog_manager.py list --format ndjson` as they are printed.
+
+    Yields one story dict per line and stops at the trailer line, so callers can
+    process large backlogs incrementally instead of waiting for one payload.
+    Raises RuntimeError if the stream ends before the trailer (the script
+    failed or was killed), so a truncated list never passes for a complete one.
+    """
+    full_cmd = [sys.executable, script_path, "list", backlog_path] + list_args + ["--format", "ndjson"]
+    proc = subprocess.Popen(full_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True, encoding="utf-8")
+    try:
+        for line in proc.stdout:
+            if not line.strip():
+                continue
+            item = jsoncodec.loads(line)
+            if item.get("end") is True and "count" in item:
+                break
+            yield item
+        else:
+            stderr = proc.stderr.read().strip()
+            raise RuntimeError(stderr or f"{os.path.basename(script_path)} exited before the end of its story stream")
+    finally:
+        proc.stdout.close()
+        proc.stderr.close()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
 def phase_transition(phase: str, caller: str, backlog_path: str, script_path: str) -> dict:
     """Transition all stories from phase-start status to phase-end status, render once."""
     phase = phase.lower()
@@ -146,38 +184,23 @@ def phase_transition(phase: str, caller: str, backlog_path: str, script_path: st
 
 
 def batch_create(backlog_path: str, script_path: str, caller: str, input_file: str) -> dict:
-    """Create multiple stories from a JSON file, render once at end."""
-    with open(input_file, 'r', encoding='utf-8') as f:
-        stories = json.load(f)
+    """Create multiple stories in one backlog transaction, render once at end.
 
-    if not isinstance(stories, list):
-        raise ValueError("Input JSON must be an array of story objects")
-
-    results = []
-    for story in stories:
-        # Get next ID
-        next_id_result = run_backlog_cmd(script_path, backlog_path, ["next-id"])
-        story_id = next_id_result.get("id", next_id_result.get("next_id"))
-
-        cmd = ["create", "--id", str(story_id), "--caller", caller]
-        for field in ["title", "role", "want", "benefit", "feature", "priority"]:
-            if field in story:
-                cmd.extend([f"--{field}", str(story[field])])
-        if "ac" in story:
-            cmd.extend(["--ac", json.dumps(story["ac"])])
-        if "depends" in story:
-            cmd.extend(["--depends", story["depends"]])
-
-        r = run_backlog_cmd(script_path, backlog_path, cmd)
-        results.append({"id": story_id, "result": r})
+    backlog_manager validates the whole batch (fields, AC JSON, dependencies)
+    and allocates IDs atomically, so either every story is created or none is.
+    """
+    r = run_backlog_cmd(script_path, backlog_path,
+        ["batch-create", "--caller", caller, "--input", input_file])
+    if not r.get("success"):
+        return {"created": 0, "error": r.get("error"), "errors": r.get("errors", []), "rendered": False}
 
     # Render once
     render_output = os.path.join(os.path.dirname(backlog_path), "BACKLOG.md")
     run_backlog_cmd(script_path, backlog_path, ["render", "--output", render_output])
 
     return {
-        "created": len(results),
-        "results": results,
+        "created": r["created"],
+        "ids": r["ids"],
         "rendered": True,
     }
 
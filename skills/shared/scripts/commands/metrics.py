@@ -4,7 +4,7 @@ agency_cli metrics -- SDLC workflow observability and reporting.
 Provides comprehensive metrics on phase timing, gate iterations, and story progress.
 
 Usage:
-    agency_cli metrics dashboard --state-path <path>
+    agency_cli metrics dashboard --state-path <path> [--pipelines]
     agency_cli metrics stories --backlog-path <path> --script-path <path>
     agency_cli metrics phase --state-path <path> --phase <phase>
     agency_cli metrics export --state-path <path> [--backlog-path <path>] [--script-path <path>] --format <json|markdown>
@@ -17,6 +17,9 @@ import subprocess
 import sys
 from datetime import datetime, timezone
 
+import jsoncodec
+from state import load_pipeline_shards
+
 # Canonical phase sequence (must match state.py)
 PHASES = ["plan", "design", "validate", "implement", "review", "test", "document"]
 GATE_PHASES = ["validate", "review", "test"]
@@ -27,8 +30,8 @@ def _load_state(state_path: str) -> dict:
     if not os.path.exists(state_path):
         raise FileNotFoundError(f"State file not found: {state_path}")
 
-    with open(state_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    with open(state_path, 'rb') as f:
+        return jsoncodec.load(f)
 
 
 def _format_duration(seconds: int) -> str:
@@ -58,7 +61,7 @@ def _run_backlog_cmd(script_path: str, backlog_path: str, cmd_args: list[str]) -
         result = subprocess.run(full_cmd, capture_output=True, text=True, timeout=30)
         if result.returncode != 0:
             return {"success": False, "error": result.stderr.strip()}
-        return json.loads(result.stdout) if result.stdout.strip() else {"success": True}
+        return jsoncodec.loads(result.stdout) if result.stdout.strip() else {"success": True}
     except json.JSONDecodeError:
         return {"success": True, "output": result.stdout.strip()}
     except subprocess.TimeoutExpired:
@@ -68,11 +71,10 @@ def _run_backlog_cmd(script_path: str, backlog_path: str, cmd_args: list[str]) -
 
 
 def _get_story_metrics(backlog_path: str, script_path: str) -> dict:
-    """Get story metrics by querying the backlog."""
+    """Get story metrics from the backlog's maintained aggregate counters, archive included."""
     try:
-        # List all stories
-        result = _run_backlog_cmd(script_path, backlog_path,
-            ["list", "--fields", "id,title,status,priority", "--format", "json"])
+        # stats reads the counters from the backlog metadata, not the stories
+        result = _run_backlog_cmd(script_path, backlog_path, ["stats"])
 
         if isinstance(result, dict) and result.get("error"):
             return {
@@ -85,27 +87,18 @@ def _get_story_metrics(backlog_path: str, script_path: str) -> dict:
                 "blocked": 0,
             }
 
-        stories = result if isinstance(result, list) else result.get("stories", [])
-
-        # Count by status
-        by_status = {}
-        by_priority = {}
-        in_flight = 0
-        blocked = 0
-
-        for story in stories:
-            status = story.get("status", "Unknown")
-            priority = story.get("priority", "Unknown")
-
-            by_status[status] = by_status.get(status, 0) + 1
-            by_priority[priority] = by_priority.get(priority, 0) + 1
-
-            if status in ("In Progress", "In Review", "In Testing"):
-                in_flight += 1
-            if status == "Blocked":
-                blocked += 1
-
-        total = len(stories)
+        if result.get("archived") and "archived_by_status" not in result:
+            # Archive predates its counters: recount active and archived stories
+            result = _run_backlog_cmd(script_path, backlog_path, ["stats", "--all"])
+
+        # Archived stories are finished work and still count towards completion
+        by_status = dict(result.get("by_status", {}))
+        for status, n in result.get("archived_by_status", {}).items():
+            by_status[status] = by_status.get(status, 0) + n
+        by_priority = dict(result.get("by_priority", {}))
+        for priority, n in result.get("archived_by_priority", {}).items():
+            by_priority[priority] = by_priority.get(priority, 0) + n
+        total = sum(by_status.values())
         done_count = by_status.get("Done", 0)
         completion_rate = (done_count / total * 100) if total > 0 else 0.0
 
@@ -114,8 +107,8 @@ def _get_story_metrics(backlog_path: str, script_path: str) -> dict:
             "by_status": by_status,
             "by_priority": by_priority,
             "completion_rate": round(completion_rate, 1),
-            "in_flight": in_flight,
-            "blocked": blocked,
+            "in_flight": result.get("in_flight", 0),
+            "blocked": result.get("blocked", 0),
         }
     except Exception as e:
         return {
@@ -129,8 +122,42 @@ def _get_story_metrics(backlog_path: str, script_path: str) -> dict:
         }
 
 
-def dashboard(state_path: str) -> dict:
-    """Generate comprehensive dashboard from STATE.json."""
+def _get_pipeline_metrics(state_path: str) -> dict:
+    """Merge per-pipeline shards into progress and gate figures."""
+    shards = load_pipeline_shards(state_path)
+    by_status = {}
+    by_phase = {}
+    gate_iterations = 0
+    first_try = 0
+    gated = 0
+    for shard in shards:
+        st = shard.get("status", "unknown")
+        by_status[st] = by_status.get(st, 0) + 1
+        ph = shard.get("phase", "implement")
+        by_phase[ph] = by_phase.get(ph, 0) + 1
+        for gate in shard.get("gates", {}).values():
+            iterations = gate.get("iterations", 0)
+            if iterations > 0:
+                gate_iterations += iterations
+                gated += 1
+                if iterations == 1:
+                    first_try += 1
+    return {
+        "total": len(shards),
+        "by_status": by_status,
+        "by_phase": by_phase,
+        "completed": by_status.get("completed", 0),
+        "gate_iterations": gate_iterations,
+        "first_try_pass_rate": round(first_try / gated * 100, 1) if gated else 0.0,
+    }
+
+
+def dashboard(state_path: str, include_pipelines: bool = False) -> dict:
+    """Generate comprehensive dashboard from STATE.json.
+
+    Pipeline figures come from the aggregate counters in STATE.json; the
+    per-pipeline shards are only merged when include_pipelines is set.
+    """
     state = _load_state(state_path)
 
     # Basic project info
@@ -203,7 +230,7 @@ def dashboard(state_path: str) -> dict:
                 "formatted": _format_duration(int(seconds)),
             }
 
-    return {
+    result = {
         "project": project,
         "status": status,
         "progress": {
@@ -229,6 +256,14 @@ def dashboard(state_path: str) -> dict:
         },
     }
 
+    pipeline_counters = state.get("metrics", {}).get("pipelines")
+    if include_pipelines:
+        result["pipelines"] = _get_pipeline_metrics(state_path)
+    elif pipeline_counters:
+        result["pipelines"] = pipeline_counters
+
+    return result
+
 
 def stories(backlog_path: str, script_path: str) -> dict:
     """Generate story-level metrics."""
@@ -401,8 +436,10 @@ def handle_metrics(args: list[str]) -> dict | str:
     if subcmd == "dashboard":
         parser = argparse.ArgumentParser(prog="agency_cli metrics dashboard")
         parser.add_argument("--state-path", required=True, help="Path to STATE.json")
+        parser.add_argument("--pipelines", action="store_true",
+                            help="Merge per-pipeline state shards into the dashboard")
         opts = parser.parse_args(args[1:])
-        return dashboard(os.path.abspath(opts.state_path))
+        return dashboard(os.path.abspath(opts.state_path), include_pipelines=opts.pipelines)
 
     elif subcmd == "stories":
         parser = argparse.ArgumentParser(prog="agency_cli metrics stories")
@@ -6,13 +6,13 @@ Usage:
     agency_cli phase next --current <phase> --verdict <verdict>   # Next phase after gate
     agency_cli phase artifacts --phase <phase> --project-root <path>  # Artifact paths
     agency_cli phase info --phase <phase>         # Phase metadata
-    agency_cli phase prepare --phase <phase> --project-root <path> --state-path <path> --script-path <path> --backlog-path <path> --objective <text> [--skip-assists]
+    agency_cli phase prepare --phase <phase> --project-root <path> --state-path <path> --script-path <path> --backlog-path <path> --objective <text> [--skip-assists | --auto-prune [--prune-threshold 0.2]] [--inline-prompts]
         # Combined: updates state + returns agent order + prompts in ONE call (reduces orchestrator turns)
+        # --auto-prune drops assists whose measured contribution is below the threshold (see agent assists)
 """
 
 import argparse
 import os
-import json
 import sys
 
 # Canonical phase sequence
@@ -215,6 +215,12 @@ def prepare_phase(args: list[str]) -> dict:
                         help="Read objective from stdin")
     parser.add_argument("--skip-assists", action="store_true",
                         help="Exclude assist agents (only spawn leads)")
+    parser.add_argument("--auto-prune", action="store_true",
+                        help="Exclude assists whose measured contribution is below --prune-threshold")
+    parser.add_argument("--prune-threshold", type=float, default=None,
+                        help="Contribution threshold for --auto-prune (default: 0.2)")
+    parser.add_argument("--inline-prompts", action="store_true",
+                        help="Embed full prompts instead of hashes into the prompt store")
     opts = parser.parse_args(args)
 
     if opts.objective_stdin:
@@ -229,9 +235,8 @@ def prepare_phase(args: list[str]) -> dict:
         raise ValueError(f"Unknown phase: {phase}. Valid: {', '.join(PHASES)}")
 
     # --- 1. Check prerequisites via state ---
-    from commands.state import _load_state, _save_state, _get_now_iso, PHASES as STATE_PHASES
+    from commands.state import _mutate_state, _get_now_iso, PHASES as STATE_PHASES
     state_path = os.path.abspath(opts.state_path)
-    state = _load_state(state_path)
 
     # Check can-proceed logic inline (avoid circular import overhead)
     dependencies = {
@@ -239,24 +244,65 @@ def prepare_phase(args: list[str]) -> dict:
         "implement": ["validate"], "review": ["implement"],
         "test": ["review"], "document": ["test"],
     }
-    for required in dependencies.get(phase, []):
-        req_status = state["phases"][required]["status"]
-        if req_status != "completed":
-            return {
-                "ready": False,
-                "blocked_by": required,
-                "reason": f"Phase {required} has status: {req_status}",
-            }
 
-    # --- 2. Mark phase in_progress ---
-    phase_obj = state["phases"][phase]
-    old_status = phase_obj["status"]
-    now = _get_now_iso()
-    if old_status != "in_progress":
-        phase_obj["status"] = "in_progress"
-        phase_obj["started_at"] = now
-        state["current_phase"] = phase
-    _save_state(state_path, state)
+    from commands.agent import (
+        AGENT_MATRIX, PHASE_ORDER, GATE_SUFFIXES,
+        get_agent_name, generate_prompt, pack_prompts, validate_phase as agent_validate_phase
+    )
+    from commands.routing import load_routes, resolve_model
+
+    # Assists that never get cited by the lead nor move the gate are dropped
+    pruned, auto_prune = set(), None
+    if opts.auto_prune and not opts.skip_assists:
+        from commands.assists import (
+            DEFAULT_PRUNE_THRESHOLD, contributions, prune_set, read_ledger, time_saved
+        )
+        threshold = DEFAULT_PRUNE_THRESHOLD if opts.prune_threshold is None else opts.prune_threshold
+        stats = contributions(read_ledger(state_path))
+        pruned = {key for key in prune_set(stats, threshold) if key[0] == phase}
+        auto_prune = {
+            "threshold": threshold,
+            "pruned": [stats[key] for key in sorted(pruned)],
+            **time_saved(phase, pruned, stats),
+        }
+
+    # Models come from the routing files when present; the choice is recorded
+    # in STATE.json so `agent route` can learn from this run later
+    routes = load_routes(opts.project_root)
+    models = {}
+    for wave_roles in PHASE_ORDER.get(phase, []):
+        for role in wave_roles:
+            info = AGENT_MATRIX.get((phase, role))
+            if info and not (opts.skip_assists and info["type"] == "assist") and (phase, role) not in pruned:
+                models[role] = resolve_model(role, phase, routes)
+
+    class _Blocked(Exception):
+        pass
+
+    def mutate(state):
+        for required in dependencies.get(phase, []):
+            req_status = state["phases"][required]["status"]
+            if req_status != "completed":
+                raise _Blocked(required, req_status)
+
+        # --- 2. Mark phase in_progress ---
+        phase_obj = state["phases"][phase]
+        if phase_obj["status"] != "in_progress":
+            phase_obj["status"] = "in_progress"
+            phase_obj["started_at"] = _get_now_iso()
+            state["current_phase"] = phase
+        phase_obj["models"] = {role: model for role, (model, _) in models.items()}
+        return state
+
+    try:
+        state = _mutate_state(state_path, mutate)
+    except _Blocked as blocked:
+        required, req_status = blocked.args
+        return {
+            "ready": False,
+            "blocked_by": required,
+            "reason": f"Phase {required} has status: {req_status}",
+        }
 
     # --- 3. Read docs_path from state ---
     docs_path = state.get("docs_path")
@@ -264,11 +310,6 @@ def prepare_phase(args: list[str]) -> dict:
         docs_path = os.path.join(opts.project_root, "docs").replace("\\", "/")
 
     # --- 4. Get agent order + prompts ---
-    from commands.agent import (
-        AGENT_MATRIX, PHASE_ORDER, GATE_SUFFIXES,
-        get_agent_name, generate_prompt, validate_phase as agent_validate_phase
-    )
-
     # Derive CLI path from this script's own location
     cli_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "agency_cli.py"))
 
@@ -276,14 +317,10 @@ def prepare_phase(args: list[str]) -> dict:
     for i, wave_roles in enumerate(PHASE_ORDER.get(phase, [])):
         wave_agents = []
         for role in wave_roles:
-            key = (phase, role)
-            if key not in AGENT_MATRIX:
-                continue
-            info = AGENT_MATRIX[key]
-
-            # Skip assists if --skip-assists
-            if opts.skip_assists and info["type"] == "assist":
+            if role not in models:
                 continue
+            info = AGENT_MATRIX[(phase, role)]
+            model, model_source = models[role]
 
             agent_name = get_agent_name(role, phase, info["type"])
             prompt = generate_prompt(
@@ -296,7 +333,8 @@ def prepare_phase(args: list[str]) -> dict:
             wave_agents.append({
                 "role": role,
                 "name": agent_name,
-                "model": info["model"],
+                "model": model,
+                "model_source": model_source,
                 "type": info["type"],
                 "prompt": prompt,
                 "skill_command": info["skill"],
@@ -309,6 +347,10 @@ def prepare_phase(args: list[str]) -> dict:
                 "agents": wave_agents,
             })
 
+    prompts = {}
+    if not opts.inline_prompts:
+        prompts = pack_prompts([a for w in waves for a in w["agents"]], opts.project_root)
+
     # --- 5. Get phase artifacts (resolved through docs_path) ---
     info = PHASE_INFO[phase]
     artifacts = []
@@ -329,6 +371,8 @@ def prepare_phase(args: list[str]) -> dict:
         "docs_path": docs_path,
         "state_updated": True,
         "skip_assists": opts.skip_assists,
+        **({"auto_prune": auto_prune} if auto_prune else {}),
+        **prompts,
         "waves": waves,
         "total_agents": sum(len(w["agents"]) for w in waves),
         "artifacts": artifacts,
@@ -6,20 +6,22 @@ in parallel, respecting inter-feature dependencies.
 
 Usage:
     agency_cli pipeline group --backlog-path <path> --script-path <path> [--status <status>]
-    agency_cli pipeline agents --phase <phase> --feature <feature> --project-root <path> --script-path <path> --backlog-path <path> --objective <text>
+    agency_cli pipeline agents --phase <phase> --feature <feature> --project-root <path> --script-path <path> --backlog-path <path> --objective <text> [--inline-prompts]
     agency_cli pipeline status --state-path <path>
     agency_cli pipeline ready-for --backlog-path <path> --script-path <path> --phase <review|test>
 """
 
 import argparse
-import json
 import os
 import sys
 
-from backlog_cmd import run_backlog_cmd, PHASE_STATUS_MAP
+import jsoncodec
+from backlog_cmd import iter_backlog_stories, PHASE_STATUS_MAP
+from state import load_pipeline_shards
+from routing import load_routes, resolve_model
 from agent import (
     AGENT_MATRIX, PHASE_ORDER, validate_phase, validate_role,
-    get_agent_name, get_model, generate_prompt
+    get_agent_name, get_model, generate_prompt, pack_prompts
 )
 
 
@@ -27,8 +29,8 @@ def _load_json_file(filepath: str) -> dict:
     """Load and parse a JSON file."""
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"File not found: {filepath}")
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    with open(filepath, 'rb') as f:
+        return jsoncodec.load(f)
 
 
 def _get_feature_branch_name(feature_area: str) -> str:
@@ -57,12 +59,18 @@ def pipeline_group(backlog_path: str, script_path: str, status: str = "Validated
     3. For each group, check if any story has dependencies on stories in OTHER groups
     4. Dependent groups go to wave 2, independent groups to wave 1
     """
-    # Query stories with the given status
-    result = run_backlog_cmd(script_path, backlog_path,
-        ["list", "--status", status, "--fields", "id,title,feature_area,dependencies,status", "--format", "json"])
+    # Stream stories with the given status, building the story map and feature groups as they arrive
+    story_map = {}
+    groups_by_feature = {}
+    for story in iter_backlog_stories(script_path, backlog_path,
+            ["--status", status, "--fields", "id,title,feature_area,dependencies,status"]):
+        story_map[story.get("id", "")] = story
+        feature = story.get("feature_area", "unclassified")
+        if feature not in groups_by_feature:
+            groups_by_feature[feature] = []
+        groups_by_feature[feature].append(story)
 
-    stories = result if isinstance(result, list) else result.get("stories", [])
-    if not stories:
+    if not story_map:
         return {
             "waves": [],
             "total_groups": 0,
@@ -71,20 +79,6 @@ def pipeline_group(backlog_path: str, script_path: str, status: str = "Validated
             "message": f"No stories found with status '{status}'"
         }
 
-    # Build story map and dependency graph
-    story_map = {}
-    for story in stories:
-        story_id = story.get("id", "")
-        story_map[story_id] = story
-
-    # Group stories by feature_area
-    groups_by_feature = {}
-    for story in stories:
-        feature = story.get("feature_area", "unclassified")
-        if feature not in groups_by_feature:
-            groups_by_feature[feature] = []
-        groups_by_feature[feature].append(story)
-
     # Build dependency relationships
     feature_deps = {}  # feature -> set of features it depends on
     for feature, feature_stories in groups_by_feature.items():
@@ -161,18 +155,19 @@ def pipeline_group(backlog_path: str, script_path: str, status: str = "Validated
     return {
         "waves": waves,
         "total_groups": len(groups_by_feature),
-        "total_stories": len(stories),
+        "total_stories": len(story_map),
         "parallelizable_groups": parallelizable,
     }
 
 
 def pipeline_agents(phase: str, feature_area: str, project_root: str, script_path: str,
-                   backlog_path: str, objective: str) -> dict:
+                   backlog_path: str, objective: str, inline_prompts: bool = False) -> dict:
     """
     Return agent configuration for a single feature pipeline phase.
 
     Gets agents for the phase, filters to those relevant for this feature,
-    and generates feature-scoped prompts.
+    and generates feature-scoped prompts. Prompts go to the prompt store
+    unless inline_prompts is set.
     """
     phase = validate_phase(phase)
 
@@ -181,11 +176,9 @@ def pipeline_agents(phase: str, feature_area: str, project_root: str, script_pat
 
     stories_result = []
     if from_status:
-        result = run_backlog_cmd(script_path, backlog_path,
-            ["list", "--status", from_status, "--fields", "id,title,feature_area", "--format", "json"])
-        all_stories = result if isinstance(result, list) else result.get("stories", [])
-        # Filter to just this feature
-        stories_result = [s for s in all_stories if s.get("feature_area", "") == feature_area]
+        # Filter to just this feature inside backlog_manager, streaming the matches
+        stories_result = list(iter_backlog_stories(script_path, backlog_path,
+            ["--status", from_status, "--feature", feature_area, "--fields", "id,title,feature_area"]))
 
     story_ids = [s.get("id", "") for s in stories_result]
 
@@ -205,6 +198,7 @@ def pipeline_agents(phase: str, feature_area: str, project_root: str, script_pat
             phase_roles.add(role)
 
     # Build agents for each role in this phase
+    routes = load_routes(project_root)
     for role in sorted(phase_roles):
         key = (phase, role)
         if key not in AGENT_MATRIX:
@@ -225,40 +219,61 @@ def pipeline_agents(phase: str, feature_area: str, project_root: str, script_pat
             feature_objective, agent_type
         )
 
+        model, model_source = resolve_model(role, phase, routes)
         agents.append({
             "name": agent_name,
             "role": role,
-            "model": info["model"],
+            "model": model,
+            "model_source": model_source,
             "type": agent_type,
             "prompt": prompt,
             "stories": story_ids,
         })
 
+    prompts = {} if inline_prompts else pack_prompts(agents, project_root)
     return {
         "feature": feature_area,
         "phase": phase,
+        **prompts,
         "agents": agents,
     }
 
 
 def pipeline_status(state_path: str) -> dict:
     """
-    Return status of all active pipelines from STATE.json.
+    Return status of all active pipelines.
 
-    Checks if 'pipelines' key exists in the implement phase and returns
-    status of each pipeline.
+    Each pipeline keeps its own shard under pipelines/ next to STATE.json
+    (written by 'state pipeline-update'); shards are merged here on demand.
+    Legacy pipelines recorded in phases.implement.pipelines are still reported
+    when no shard exists for the same feature.
     """
     state = _load_json_file(state_path)
 
     pipelines = []
+    seen = set()
+
+    for shard in load_pipeline_shards(state_path):
+        phase = shard.get("phase", "implement")
+        gate = shard.get("gates", {}).get(phase)
+        pipelines.append({
+            "feature": shard.get("feature", ""),
+            "phase": phase,
+            "status": shard.get("status", "unknown"),
+            "stories": shard.get("stories", []),
+            "agents": shard.get("agents", {}).get(phase, {}),
+            "gate_iterations": gate["iterations"] if gate else 0,
+            "updated_at": shard.get("updated_at"),
+        })
+        seen.add(shard.get("feature", ""))
 
-    # Check implement phase for pipelines
+    # Check implement phase for legacy pipelines
     implement_phase = state.get("phases", {}).get("implement", {})
     phase_pipelines = implement_phase.get("pipelines", [])
 
     if isinstance(phase_pipelines, list):
         for pipeline in phase_pipelines:
-            if isinstance(pipeline, dict):
+            if isinstance(pipeline, dict) and pipeline.get("feature", "") not in seen:
                 pipelines.append({
                     "feature": pipeline.get("feature", ""),
                     "phase": pipeline.get("phase", "implement"),
@@ -271,6 +286,7 @@ def pipeline_status(state_path: str) -> dict:
     return {
         "pipelines": pipelines,
         "all_completed": all_completed,
+        "aggregate": state.get("metrics", {}).get("pipelines"),
     }
 
 
@@ -293,17 +309,12 @@ def pipeline_ready_for(backlog_path: str, script_path: str, phase: str) -> dict:
     else:
         raise ValueError(f"Unsupported phase: {phase}. Valid: review, test")
 
-    # Query stories with ready status
-    result = run_backlog_cmd(script_path, backlog_path,
-        ["list", "--status", ready_status, "--fields", "id,title,feature_area,status", "--format", "json"])
-
-    stories = result if isinstance(result, list) else result.get("stories", [])
-
-    # Group by feature area
+    # Stream stories with ready status and group by feature area as they arrive
     by_feature = {}
     ready_stories = []
 
-    for story in stories:
+    for story in iter_backlog_stories(script_path, backlog_path,
+            ["--status", ready_status, "--fields", "id,title,feature_area,status"]):
         story_id = story.get("id", "")
         title = story.get("title", "")
         feature = story.get("feature_area", "unclassified")
@@ -349,9 +360,12 @@ def handle_pipeline(args: list[str]) -> dict:
         parser.add_argument("--script-path", required=True)
         parser.add_argument("--backlog-path", required=True)
         parser.add_argument("--objective", required=True)
+        parser.add_argument("--inline-prompts", action="store_true",
+                            help="Embed full prompts instead of hashes into the prompt store")
         opts = parser.parse_args(args[1:])
         return pipeline_agents(opts.phase, opts.feature, opts.project_root,
-                             opts.script_path, opts.backlog_path, opts.objective)
+                             opts.script_path, opts.backlog_path, opts.objective,
+                             inline_prompts=opts.inline_prompts)
 
     elif subcmd == "status":
         parser = argparse.ArgumentParser(prog="agency_cli pipeline status")
@@ -0,0 +1,232 @@
+"""
+agency_cli agent route -- Model routing per (phase, role) from past gate outcomes.
+
+Reads STATE.json files from past runs, measures how often each (phase, role)
+passed its gate on the first try with each model, and recommends the fastest
+model that meets a target first-try pass rate. Recommendations are a dry-run
+report unless --apply writes them to the routing file.
+
+Model resolution for phase prepare / pipeline agents / agent model:
+    routing-overrides.json (hand-written)  >  routing.json (applied)  >  AGENT_MATRIX
+
+Both files live in {project_root}/agent_docs/agency/ and map phase -> role -> model:
+    {"plan": {"pm": "sonnet"}, "document": {"qa": "haiku"}}
+
+Usage:
+    agency_cli agent route --project-root <path> --history <STATE.json|dir>[,...] [--target 0.8] [--min-samples 3] [--apply]
+"""
+
+import argparse
+import glob
+import os
+from datetime import datetime, timezone
+
+import jsoncodec
+from agent import AGENT_MATRIX
+
+# Fastest first
+MODEL_TIERS = ["haiku", "sonnet", "opus"]
+
+ROUTING_FILE = os.path.join("agent_docs", "agency", "routing.json")
+OVERRIDES_FILE = os.path.join("agent_docs", "agency", "routing-overrides.json")
+
+DEFAULT_TARGET_PASS_RATE = 0.8
+DEFAULT_MIN_SAMPLES = 3
+
+# Which first-try gate verdict judges a phase's output, and which voter in it
+# (None = the gate's overall verdict). Document has no gate and is never rerouted.
+GATE_JUDGE = {
+    "plan": ("validate", "pm"),
+    "design": ("validate", "tl"),
+    "validate": ("validate", None),
+    "implement": ("review", None),
+    "review": ("review", None),
+    "test": ("test", None),
+}
+PASSING = ("APPROVED", "PASS")
+
+
+def _read_routes(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "rb") as f:
+        data = jsoncodec.load(f)
+    routes = data.get("routes", data)
+    for phase, roles in routes.items():
+        for role, model in roles.items():
+            if model not in MODEL_TIERS:
+                raise ValueError(f"{path}: invalid model '{model}' for {phase}/{role}. Valid: {', '.join(MODEL_TIERS)}")
+    return routes
+
+
+def load_routes(project_root: str = None) -> dict:
+    """Return {(phase, role): (model, source)} for every routed or overridden agent."""
+    if not project_root:
+        return {}
+    resolved = {}
+    for source, rel in (("routed", ROUTING_FILE), ("override", OVERRIDES_FILE)):
+        for phase, roles in _read_routes(os.path.join(project_root, rel)).items():
+            for role, model in roles.items():
+                resolved[(phase, role)] = (model, source)
+    return resolved
+
+
+def resolve_model(role: str, phase: str, routes: dict) -> tuple[str, str]:
+    """Return (model, source) for an agent, source being override, routed or default."""
+    return routes.get((phase, role)) or (AGENT_MATRIX[(phase, role)]["model"], "default")
+
+
+def _state_files(history: list[str]) -> list[str]:
+    files = []
+    for entry in history:
+        if os.path.isdir(entry):
+            files.extend(glob.glob(os.path.join(entry, "**", "STATE.json"), recursive=True))
+        else:
+            files.extend(glob.glob(entry) or [entry])
+    return sorted(set(os.path.abspath(f) for f in files if os.path.isfile(f)))
+
+
+def _first_try(state: dict, phase: str, role: str):
+    """True/False for the first verdict of the gate judging (phase, role); None without one."""
+    judge = GATE_JUDGE.get(phase)
+    if not judge:
+        return None
+    gate_phase, voter = judge
+    verdicts = state.get("phases", {}).get(gate_phase, {}).get("gate", {}).get("verdicts", [])
+    if not verdicts:
+        return None
+    first = verdicts[0]
+    if phase == "validate" and role in ("pm", "tl"):
+        voter = role
+    verdict = first.get(voter) if voter else (first.get("combined") or first.get("verdict"))
+    return verdict in PASSING if verdict else None
+
+
+def collect_samples(history: list[str]) -> tuple[dict, list[str]]:
+    """Return ({(phase, role): {model: [outcome, seconds]...}}, files read).
+
+    Runs before model routing existed carry no "models" per phase; they ran
+    the AGENT_MATRIX defaults.
+    """
+    samples = {}
+    files = []
+    for path in _state_files(history):
+        try:
+            with open(path, "rb") as f:
+                state = jsoncodec.load(f)
+        except (OSError, jsoncodec.JSONDecodeError):
+            continue
+        files.append(path)
+        durations = state.get("metrics", {}).get("phase_durations", {})
+        for (phase, role), info in AGENT_MATRIX.items():
+            phase_obj = state.get("phases", {}).get(phase, {})
+            if phase_obj.get("status") != "completed":
+                continue
+            model = phase_obj.get("models", {}).get(role, info["model"])
+            samples.setdefault((phase, role), {}).setdefault(model, []).append(
+                (_first_try(state, phase, role), durations.get(phase)))
+    return samples, files
+
+
+def recommend(samples: dict, routes: dict, target: float, min_samples: int) -> list[dict]:
+    """Pick, per (phase, role), the fastest model with enough runs meeting the target."""
+    min_samples = max(1, min_samples)  # a rate needs at least one judged run
+    report = []
+    for (phase, role), info in AGENT_MATRIX.items():
+        current, source = resolve_model(role, phase, routes)
+        stats = {}
+        for model, runs in samples.get((phase, role), {}).items():
+            judged = [ok for ok, _ in runs if ok is not None]
+            seconds = [s for _, s in runs if s is not None]
+            stats[model] = {
+                "runs": len(runs),
+                "judged": len(judged),
+                "first_try_pass_rate": round(sum(judged) / len(judged), 3) if judged else None,
+                "mean_phase_seconds": round(sum(seconds) / len(seconds)) if seconds else None,
+            }
+
+        qualified = [m for m in MODEL_TIERS
+                     if stats.get(m, {}).get("judged", 0) >= min_samples
+                     and stats[m]["first_try_pass_rate"] >= target]
+        cur = stats.get(current, {})
+        if source == "override":
+            recommended, reason = current, "override"
+        elif qualified:
+            recommended = qualified[0]
+            reason = "fastest model meeting target" if recommended != current else "current model is the fastest meeting target"
+        elif cur.get("judged", 0) >= min_samples and MODEL_TIERS.index(current) < len(MODEL_TIERS) - 1:
+            recommended = MODEL_TIERS[MODEL_TIERS.index(current) + 1]
+            reason = f"current model below target ({cur['first_try_pass_rate']}); escalate one tier"
+        else:
+            recommended, reason = current, "not enough judged runs"
+
+        entry = {
+            "phase": phase,
+            "role": role,
+            "default": info["model"],
+            "current": current,
+            "source": source,
+            "recommended": recommended,
+            "reason": reason,
+            "models": stats,
+        }
+        # A faster tier with no history can never qualify; suggest a trial run
+        idx = MODEL_TIERS.index(recommended)
+        if recommended in qualified and idx > 0 and MODEL_TIERS[idx - 1] not in stats:
+            entry["trial"] = MODEL_TIERS[idx - 1]
+        report.append(entry)
+    return report
+
+
+def route(args: list[str]) -> dict:
+    """Handle 'agent route'."""
+    parser = argparse.ArgumentParser(prog="agency_cli agent route")
+    parser.add_argument("--project-root", required=True)
+    parser.add_argument("--history", required=True, action="append",
+                        help="STATE.json files, directories searched recursively, or globs (comma-separated, repeatable)")
+    parser.add_argument("--target", type=float, default=DEFAULT_TARGET_PASS_RATE,
+                        help=f"Required first-try gate pass rate (default: {DEFAULT_TARGET_PASS_RATE})")
+    parser.add_argument("--min-samples", type=int, default=DEFAULT_MIN_SAMPLES,
+                        help=f"Judged runs a model needs before it can be chosen (default: {DEFAULT_MIN_SAMPLES})")
+    parser.add_argument("--apply", action="store_true",
+                        help="Write recommendations that differ from the defaults to routing.json")
+    opts = parser.parse_args(args)
+    if not 0 < opts.target <= 1:
+        raise ValueError("--target must be in (0, 1]")
+    if opts.min_samples < 1:
+        raise ValueError("--min-samples must be at least 1")
+
+    history = [h.strip() for entry in opts.history for h in entry.split(",") if h.strip()]
+    samples, files = collect_samples(history)
+    routes = load_routes(opts.project_root)
+    report = recommend(samples, routes, opts.target, opts.min_samples)
+    changes = [
+        {"phase": e["phase"], "role": e["role"], "from": e["current"], "to": e["recommended"], "reason": e["reason"]}
+        for e in report if e["recommended"] != e["current"]
+    ]
+
+    result = {
+        "dry_run": not opts.apply,
+        "runs_analyzed": len(files),
+        "target": opts.target,
+        "min_samples": opts.min_samples,
+        "changes": changes,
+        "report": report,
+    }
+    if opts.apply:
+        table = {}
+        for e in report:
+            if e["source"] != "override" and e["recommended"] != e["default"]:
+                table.setdefault(e["phase"], {})[e["role"]] = e["recommended"]
+        path = os.path.join(opts.project_root, ROUTING_FILE)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(jsoncodec.dumps({
+                "generated_at": datetime.now(timezone.utc).isoformat(),
+                "target": opts.target,
+                "min_samples": opts.min_samples,
+                "runs_analyzed": len(files),
+                "routes": table,
+            }, pretty=True))
+        result["routing_file"] = path.replace("\\", "/")
+    return result
@@ -7,6 +7,8 @@ Usage:
     agency_cli state init --project <name> --objective <text> --state-path <path> [--short-description <text>] [--project-root <path>]
     agency_cli state update --state-path <path> --phase <phase> --status <status> [--agent <name> --agent-status <status>] [--notes <text>]
     agency_cli state gate-record --state-path <path> --phase <phase> --verdict <verdict> [--pm <APPROVED|REPROVED>] [--tl <APPROVED|REPROVED>] [--tests-passed <n>] [--tests-failed <n>]
+    agency_cli state assist-record --state-path <path> --phase <phase> --role <role> (--referenced <yes|no> | --notes-file <path> --lead-file <path>) [--seconds <n>]
+        # Record whether the lead used an assist's [NOTES]; feeds phase prepare --auto-prune.
     agency_cli state query --state-path <path> [--phase <phase>] [--field <field>]
     agency_cli state can-proceed --state-path <path> --to-phase <phase>
     agency_cli state summary --state-path <path>
@@ -14,6 +16,9 @@ Usage:
         # Write a compact context checkpoint after phase completion.
         # Produces a file the orchestrator can re-read after context compaction
         # instead of relying on conversation history.
+    agency_cli state pipeline-update --state-path <path> --feature <area> [--phase <implement|review|test>] [--status <status>] [--stories <US-1,US-2>] [--agent <name> --agent-status <status>] [--verdict <verdict>]
+        # Update one feature pipeline's shard under pipelines/ next to STATE.json.
+        # STATE.json itself only receives aggregate counters on status/gate changes.
 """
 
 import argparse
@@ -21,39 +26,30 @@ import json
 import os
 import re
 import sys
-import tempfile
-import shutil
 from datetime import datetime, timezone
 
+import casfile
+import jsoncodec
+from casfile import ConflictError as StateConflictError
+
 # Canonical phase sequence
 PHASES = ["plan", "design", "validate", "implement", "review", "test", "document"]
 GATE_PHASES = ["validate", "review", "test"]
 
+# Optimistic concurrency (see casfile): every save bumps "revision" and only
+# commits if the on-disk revision still matches the one that was loaded.
+# Mutators go through _mutate_state(), which re-applies the change to a fresh
+# copy on conflict.
 
-def _get_now_iso():
-    """Get current UTC time in ISO-8601 format."""
-    return datetime.now(timezone.utc).isoformat()
 
+# Parallel feature pipelines keep their own small state files next to STATE.json
+PIPELINES_DIR = "pipelines"
+PIPELINE_PHASES = ["implement", "review", "test"]
 
-def _atomic_write_json(filepath: str, data: dict) -> None:
-    """Write JSON to file atomically using temp file + rename."""
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
 
-    # Write to temp file in same directory as target
-    temp_fd, temp_path = tempfile.mkstemp(
-        dir=os.path.dirname(filepath),
-        prefix=".tmp_",
-        suffix=".json"
-    )
-    try:
-        with os.fdopen(temp_fd, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        # Atomic rename
-        shutil.move(temp_path, filepath)
-    except Exception as e:
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
-        raise
+def _get_now_iso():
+    """Get current UTC time in ISO-8601 format."""
+    return datetime.now(timezone.utc).isoformat()
 
 
 def _load_state(state_path: str) -> dict:
@@ -61,14 +57,27 @@ def _load_state(state_path: str) -> dict:
     if not os.path.exists(state_path):
         raise FileNotFoundError(f"State file not found: {state_path}")
 
-    with open(state_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    with open(state_path, 'rb') as f:
+        return jsoncodec.load(f)
 
 
 def _save_state(state_path: str, state: dict) -> None:
-    """Save STATE.json file atomically."""
-    state["updated_at"] = _get_now_iso()
-    _atomic_write_json(state_path, state)
+    """Save STATE.json atomically if nobody else committed since it was loaded.
+
+    Raises StateConflictError when the on-disk revision no longer matches.
+    """
+    casfile.save(state_path, state)
+
+
+def _mutate_state(state_path: str, mutate):
+    """Load, mutate and save STATE.json, rebasing the mutation on conflict.
+
+    ``mutate(state)`` must derive its changes from the state it is given so it
+    can be re-applied to a fresher copy. Its return value is passed through.
+    After casfile.CAS_MAX_RETRIES conflicts an advisory fcntl lock serializes
+    writers that fell back, and the lock holder retries until it commits.
+    """
+    return casfile.transact(state_path, _load_state, mutate, lambda p, state, _: _save_state(p, state))
 
 
 def _validate_phase(phase: str) -> str:
@@ -153,6 +162,7 @@ def create_initial_state(project_name: str, objective: str, docs_path: str = Non
 
     state = {
         "version": "1.1",
+        "revision": 0,
         "project": project_name,
         "objective": objective,
         "docs_path": docs_path,
@@ -219,56 +229,56 @@ def update_phase_status(args: list[str]) -> dict:
     opts = parser.parse_args(args)
 
     state_path = os.path.abspath(opts.state_path)
-    state = _load_state(state_path)
-
     phase = _validate_phase(opts.phase)
     new_status = _validate_status(opts.status)
 
-    phase_obj = state["phases"][phase]
-    old_status = phase_obj["status"]
-
-    # Update status
-    phase_obj["status"] = new_status
-
-    # Handle timestamp transitions
-    now = _get_now_iso()
-    if old_status != "in_progress" and new_status == "in_progress":
-        phase_obj["started_at"] = now
-        state["current_phase"] = phase
-
-    if new_status == "completed" and old_status != "completed":
-        phase_obj["completed_at"] = now
-        if phase_obj["started_at"]:
-            # Calculate duration in seconds
-            start = datetime.fromisoformat(phase_obj["started_at"])
-            end = datetime.fromisoformat(now)
-            duration_seconds = int((end - start).total_seconds())
-            state["metrics"]["phase_durations"][phase] = duration_seconds
-
-    # Update agent status if provided
-    if opts.agent:
-        agent_name = opts.agent.strip()
-        agent_status = opts.agent_status.strip() if opts.agent_status else "completed"
-        phase_obj["agents"][agent_name] = agent_status
-
-    # Update notes
-    if opts.notes:
-        phase_obj["notes"] = opts.notes
-
-    # Recalculate completed_phases count
-    completed_count = sum(
-        1 for p in state["phases"].values()
-        if p["status"] == "completed"
-    )
-    state["metrics"]["completed_phases"] = completed_count
-
-    # Update overall status
-    if completed_count == len(PHASES):
-        state["status"] = "completed"
-    elif any(p["status"] == "in_progress" for p in state["phases"].values()):
-        state["status"] = "in_progress"
-
-    _save_state(state_path, state)
+    def mutate(state):
+        phase_obj = state["phases"][phase]
+        old_status = phase_obj["status"]
+
+        # Update status
+        phase_obj["status"] = new_status
+
+        # Handle timestamp transitions
+        now = _get_now_iso()
+        if old_status != "in_progress" and new_status == "in_progress":
+            phase_obj["started_at"] = now
+            state["current_phase"] = phase
+
+        if new_status == "completed" and old_status != "completed":
+            phase_obj["completed_at"] = now
+            if phase_obj["started_at"]:
+                # Calculate duration in seconds
+                start = datetime.fromisoformat(phase_obj["started_at"])
+                end = datetime.fromisoformat(now)
+                duration_seconds = int((end - start).total_seconds())
+                state["metrics"]["phase_durations"][phase] = duration_seconds
+
+        # Update agent status if provided
+        if opts.agent:
+            agent_name = opts.agent.strip()
+            agent_status = opts.agent_status.strip() if opts.agent_status else "completed"
+            phase_obj["agents"][agent_name] = agent_status
+
+        # Update notes
+        if opts.notes:
+            phase_obj["notes"] = opts.notes
+
+        # Recalculate completed_phases count
+        completed_count = sum(
+            1 for p in state["phases"].values()
+            if p["status"] == "completed"
+        )
+        state["metrics"]["completed_phases"] = completed_count
+
+        # Update overall status
+        if completed_count == len(PHASES):
+            state["status"] = "completed"
+        elif any(p["status"] == "in_progress" for p in state["phases"].values()):
+            state["status"] = "in_progress"
+        return state
+
+    state = _mutate_state(state_path, mutate)
 
     return {
         "status": "updated",
@@ -293,28 +303,12 @@ def record_gate_verdict(args: list[str]) -> dict:
     opts = parser.parse_args(args)
 
     state_path = os.path.abspath(opts.state_path)
-    state = _load_state(state_path)
-
     phase = _validate_phase(opts.phase)
     if phase not in GATE_PHASES:
         raise ValueError(f"Phase {phase} is not a gate phase. Gate phases: {', '.join(GATE_PHASES)}")
 
-    phase_obj = state["phases"][phase]
-
-    # Ensure gate object exists
-    if "gate" not in phase_obj:
-        phase_obj["gate"] = {
-            "iterations": 0,
-            "max_iterations": 3,
-            "verdicts": [],
-        }
-
-    gate = phase_obj["gate"]
-    gate["iterations"] += 1
-    iteration_num = gate["iterations"]
-
-    # Create verdict record
-    verdict_record = {"iteration": iteration_num}
+    # Build the verdict record up front; only the iteration number depends on state
+    verdict_record = {}
 
     if phase == "validate":
         # Validate gate expects PM and TL verdicts
@@ -347,19 +341,91 @@ def record_gate_verdict(args: list[str]) -> dict:
         if opts.tests_failed is not None:
             verdict_record["tests_failed"] = opts.tests_failed
 
-    gate["verdicts"].append(verdict_record)
-    state["metrics"]["total_gate_iterations"] += 1
+    def mutate(state):
+        phase_obj = state["phases"][phase]
 
-    _save_state(state_path, state)
+        # Ensure gate object exists
+        if "gate" not in phase_obj:
+            phase_obj["gate"] = {
+                "iterations": 0,
+                "max_iterations": 3,
+                "verdicts": [],
+            }
+
+        gate = phase_obj["gate"]
+        gate["iterations"] += 1
+        record = {"iteration": gate["iterations"], **verdict_record}
+        gate["verdicts"].append(record)
+        state["metrics"]["total_gate_iterations"] += 1
+        return record, state
+
+    record, state = _mutate_state(state_path, mutate)
+
+    # First-try outcomes are the evidence for assist gate lift (see commands.assists)
+    if record["iteration"] == 1:
+        from commands.assists import append_ledger, gate_assists
+        append_ledger(state_path, {
+            "kind": "gate",
+            "run": state["created_at"],
+            "gate": phase,
+            "verdict": verdict_record,
+            "assists": gate_assists(phase, state["phases"]),
+        })
 
     return {
         "status": "recorded",
         "phase": phase,
-        "iteration": iteration_num,
-        "verdict_record": verdict_record,
+        "iteration": record["iteration"],
+        "verdict_record": record,
     }
 
 
+def record_assist(args: list[str]) -> dict:
+    """Handle 'state assist-record' subcommand."""
+    parser = argparse.ArgumentParser(prog="agency_cli state assist-record")
+    parser.add_argument("--state-path", required=True, help="Path to STATE.json")
+    parser.add_argument("--phase", required=True, help="Phase the assist ran in")
+    parser.add_argument("--role", required=True, help="Assist role")
+    parser.add_argument("--referenced", choices=["yes", "no"],
+                        help="Whether the lead used the assist's notes")
+    parser.add_argument("--notes-file", help="Assist output containing its [NOTES]")
+    parser.add_argument("--lead-file", help="Lead artifact to look for the notes in")
+    parser.add_argument("--seconds", type=int, help="Assist wall-clock time")
+    opts = parser.parse_args(args)
+
+    from commands.assists import append_ledger, count_citations, is_assist
+
+    state_path = os.path.abspath(opts.state_path)
+    phase = _validate_phase(opts.phase)
+    role = opts.role.strip().lower()
+    if not is_assist(phase, role):
+        raise ValueError(f"No assist agent for role={role}, phase={phase}")
+
+    if opts.referenced:
+        items = cited = None
+        referenced = opts.referenced == "yes"
+    elif opts.notes_file and opts.lead_file:
+        with open(opts.notes_file, encoding="utf-8") as f:
+            notes = f.read()
+        with open(opts.lead_file, encoding="utf-8") as f:
+            lead_text = f.read()
+        items, cited = count_citations(notes, lead_text)
+        referenced = cited > 0
+    else:
+        raise ValueError("Provide --referenced, or both --notes-file and --lead-file")
+
+    record = {"notes": items, "cited": cited, "referenced": referenced, "seconds": opts.seconds}
+
+    def mutate(state):
+        state["phases"][phase].setdefault("assists", {})[role] = record
+        return state["created_at"]
+
+    run = _mutate_state(state_path, mutate)
+    append_ledger(state_path, {"kind": "assist", "run": run, "phase": phase, "role": role, **record})
+
+    return {"status": "recorded", "phase": phase, "role": role, **record}
+
+
 def query_state(args: list[str]) -> dict | str:
     """Handle 'state query' subcommand."""
     parser = argparse.ArgumentParser(prog="agency_cli state query")
@@ -638,10 +704,168 @@ def checkpoint_state(args: list[str]) -> dict:
     }
 
 
+def _pipeline_slug(feature: str) -> str:
+    """Filesystem-safe slug for a feature area (matches pipeline branch names)."""
+    return re.sub(r'[^a-z0-9]+', '-', feature.lower()).strip('-') or "unclassified"
+
+
+def pipeline_shard_path(state_path: str, feature: str) -> str:
+    """Path of a feature pipeline's shard: {state_dir}/pipelines/{slug}.json."""
+    state_dir = os.path.dirname(os.path.abspath(state_path))
+    return os.path.join(state_dir, PIPELINES_DIR, f"{_pipeline_slug(feature)}.json")
+
+
+def load_pipeline_shards(state_path: str) -> list[dict]:
+    """Read every pipeline shard next to STATE.json, sorted by feature.
+
+    Shards are only read when asked for, so phase-level commands never pay for them.
+    """
+    shard_dir = os.path.join(os.path.dirname(os.path.abspath(state_path)), PIPELINES_DIR)
+    if not os.path.isdir(shard_dir):
+        return []
+    shards = []
+    for name in sorted(os.listdir(shard_dir)):
+        if not name.endswith(".json") or name.startswith("."):
+            continue
+        try:
+            with open(os.path.join(shard_dir, name), 'rb') as f:
+                shards.append(jsoncodec.load(f))
+        except (OSError, json.JSONDecodeError):
+            continue
+    return shards
+
+
+def _create_pipeline_shard(feature: str, phase: str) -> dict:
+    """Create a new pipeline shard structure."""
+    now = _get_now_iso()
+    return {
+        "revision": 0,
+        "feature": feature,
+        "slug": _pipeline_slug(feature),
+        "phase": phase,
+        "status": "pending",
+        "stories": [],
+        "created_at": now,
+        "updated_at": now,
+        "agents": {},
+        "gates": {},
+    }
+
+
+def _roll_up_pipeline(state_path: str, created: bool, old_status, new_status, verdict) -> None:
+    """Apply one pipeline change to the metrics.pipelines counters in STATE.json.
+
+    ``old_status`` is None when the status did not change.
+    """
+    def mutate_global(state):
+        counters = state["metrics"].setdefault(
+            "pipelines", {"total": 0, "by_status": {}, "gate_iterations": 0})
+        by_status = counters["by_status"]
+        if created:
+            by_status["pending"] = by_status.get("pending", 0) + 1
+        if old_status is not None:
+            if by_status.get(old_status, 0) > 1:
+                by_status[old_status] -= 1
+            else:
+                by_status.pop(old_status, None)
+            by_status[new_status] = by_status.get(new_status, 0) + 1
+        counters["total"] = sum(by_status.values())
+        if verdict:
+            counters["gate_iterations"] += 1
+
+    _mutate_state(state_path, mutate_global)
+
+
+def update_pipeline(args: list[str]) -> dict:
+    """Handle 'state pipeline-update' subcommand.
+
+    Agent status updates touch only the pipeline's shard. The global STATE.json
+    is written only when the pipeline status changes or a gate verdict is
+    recorded, to keep metrics.pipelines counters in step.
+    """
+    parser = argparse.ArgumentParser(prog="agency_cli state pipeline-update")
+    parser.add_argument("--state-path", required=True, help="Path to STATE.json")
+    parser.add_argument("--feature", required=True, help="Feature area of the pipeline")
+    parser.add_argument("--phase", default=None, help="Pipeline phase: implement|review|test")
+    parser.add_argument("--status", default=None, help="Status: pending|in_progress|completed|skipped")
+    parser.add_argument("--stories", default=None, help="Comma-separated story IDs in this pipeline")
+    parser.add_argument("--agent", help="Agent name")
+    parser.add_argument("--agent-status", help="Agent status")
+    parser.add_argument("--verdict", help="Gate verdict for the pipeline's current phase (review|test)")
+    opts = parser.parse_args(args)
+
+    state_path = os.path.abspath(opts.state_path)
+    if not os.path.exists(state_path):
+        raise FileNotFoundError(f"State file not found: {state_path}")
+
+    phase = _validate_phase(opts.phase) if opts.phase else None
+    if phase and phase not in PIPELINE_PHASES:
+        raise ValueError(f"Invalid pipeline phase: {phase}. Valid: {', '.join(PIPELINE_PHASES)}")
+    new_status = _validate_status(opts.status) if opts.status else None
+    verdict = _validate_verdict(opts.verdict) if opts.verdict else None
+
+    shard_path = pipeline_shard_path(state_path, opts.feature)
+    created = False
+    if not os.path.exists(shard_path):
+        if verdict and (phase or "implement") not in GATE_PHASES:
+            raise ValueError(f"Phase {phase or 'implement'} has no gate")
+        try:
+            _save_state(shard_path, _create_pipeline_shard(opts.feature, phase or "implement"))
+            created = True
+        except StateConflictError:
+            pass  # Another agent created it first
+
+    def mutate(shard):
+        if shard["feature"] != opts.feature:
+            raise ValueError(f"Pipeline shard {os.path.basename(shard_path)} belongs to feature "
+                             f"'{shard['feature']}', not '{opts.feature}'")
+        old_status = shard["status"]
+        if phase:
+            shard["phase"] = phase
+        if new_status:
+            shard["status"] = new_status
+        if opts.stories is not None:
+            shard["stories"] = [s.strip() for s in opts.stories.split(",") if s.strip()]
+        if opts.agent:
+            agent_status = opts.agent_status.strip() if opts.agent_status else "completed"
+            shard["agents"].setdefault(shard["phase"], {})[opts.agent.strip()] = agent_status
+        if verdict:
+            if shard["phase"] not in GATE_PHASES:
+                raise ValueError(f"Phase {shard['phase']} has no gate")
+            gate = shard["gates"].setdefault(shard["phase"], {"iterations": 0, "verdicts": []})
+            gate["iterations"] += 1
+            gate["verdicts"].append({"iteration": gate["iterations"], "verdict": verdict})
+        return old_status, shard
+
+    try:
+        old_status, shard = _mutate_state(shard_path, mutate)
+    except Exception:
+        if created:  # the new shard stays on disk and must still be counted
+            _roll_up_pipeline(state_path, created, None, None, None)
+        raise
+
+    # Roll the change up into the global aggregate counters only when it matters
+    status_changed = old_status != shard["status"]
+    global_updated = created or status_changed or bool(verdict)
+    if global_updated:
+        _roll_up_pipeline(state_path, created, old_status if status_changed else None, shard["status"], verdict)
+
+    return {
+        "status": "updated",
+        "feature": shard["feature"],
+        "shard_path": _fwd(shard_path),
+        "phase": shard["phase"],
+        "pipeline_status": shard["status"],
+        "agents": shard["agents"].get(shard["phase"], {}),
+        "gate": shard["gates"].get(shard["phase"]),
+        "global_updated": global_updated,
+    }
+
+
 def handle_state(args: list[str]) -> dict | str:
     """Main handler for state subcommands."""
     if not args:
-        raise ValueError("Subcommand required: init, update, gate-record, query, can-proceed, summary, checkpoint")
+        raise ValueError("Subcommand required: init, update, gate-record, assist-record, query, can-proceed, summary, checkpoint, pipeline-update")
 
     subcmd = args[0]
 
@@ -651,6 +875,8 @@ def handle_state(args: list[str]) -> dict | str:
         return update_phase_status(args[1:])
     elif subcmd == "gate-record":
         return record_gate_verdict(args[1:])
+    elif subcmd == "assist-record":
+        return record_assist(args[1:])
     elif subcmd == "query":
         return query_state(args[1:])
     elif subcmd == "can-proceed":
@@ -659,5 +885,7 @@ def handle_state(args: list[str]) -> dict | str:
         return state_summary(args[1:])
     elif subcmd == "checkpoint":
         return checkpoint_state(args[1:])
+    elif subcmd == "pipeline-update":
+        return update_pipeline(args[1:])
     else:
-        raise ValueError(f"Unknown subcommand: {subcmd}. Valid: init, update, gate-record, query, can-proceed, summary, checkpoint")
+        raise ValueError(f"Unknown subcommand: {subcmd}. Valid: init, update, gate-record, assist-record, query, can-proceed, summary, checkpoint, pipeline-update")
@@ -3,60 +3,97 @@ agency_cli tokens -- Token analysis, fragmentation, and deduplication.
 
 Usage:
     agency_cli tokens analyze --root <path>                           # Full token analysis
+    agency_cli tokens analyze --workspace <dir> | --roots <a,b,...> [--jobs <n>] [--cache <path> | --no-cache] [--files]
+        # Many roots at once: cached by (path, size, mtime), uncached files read on a process pool
+    agency_cli tokens watch --root <path> [--budget <n>] [--interval 2] [--duration <s>] [--regression-pct 10]
+        # Poll, re-tokenizing only changed files; alert when startup tokens cross the budget or regress
+    agency_cli tokens watch --root <path> (--files <a,b> | --files-stdin | --once)   # Single update, e.g. from a hook
     agency_cli tokens estimate --file <path>                          # Single file token estimate
     agency_cli tokens fragment --file <path> --threshold <n> --output-dir <dir>  # Fragment a file
     agency_cli tokens fragment-skill --file <path> --threshold <n> --output-dir <dir>  # Fragment SKILL.md
+        # Both accept --dry-run, or --plan to print section offsets and replacements as JSON
     agency_cli tokens deduplicate --root <path>                       # Find duplicates
+    agency_cli tokens deduplicate --root <path> --near [--threshold 0.7] [--num-perm 128] [--bands 32]
+        # Cluster near-duplicate blocks (MinHash + LSH) with similarity scores
     agency_cli tokens report --before <json> --after <json> --output <path>  # Before/after report
+    agency_cli tokens pack (--root <path> | --files <a,b>) --budget <n> [--query <text>] [--granularity section|file] [--weight <glob>=<x>] [--output <path>]
+        # Knapsack-pack the most relevant sections into a token budget; omitted sections are listed
+    agency_cli tokens section --skill <dir> [--heading <text>] [--file <name>]
+        # One section of a skill's references by heading, read at its indexed byte offset
+
+Token counts come from the shared tokenizer module: ceil(chars / 4) by default,
+or exact BPE counts with `--tokenizer bpe --vocab <file.tiktoken>` (accepted by
+every subcommand, or set AGENCY_TOKENIZER / AGENCY_TOKENIZER_VOCAB).
 """
 
 import argparse
+import fnmatch
 import glob
+import hashlib
 import json
 import math
+import operator
 import os
 import re
+import sys
+import tempfile
+import time
+import zlib
+from array import array
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import jsoncodec
+import tokenizer
 
 
 def estimate_tokens(text: str) -> int:
-    """Estimate token count: ceil(chars / 4)."""
-    return math.ceil(len(text) / 4)
+    """Token count under the configured tokenizer (ceil(chars / 4) by default)."""
+    return tokenizer.count(text)
 
 
 def estimate_file_tokens(file_path: str) -> dict:
     """Estimate tokens for a single file."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        chars = len(content)
-        lines = content.count('\n') + 1
-        tokens = estimate_tokens(content)
-        return {
-            "file": file_path,
-            "chars": chars,
-            "lines": lines,
-            "tokens": tokens,
-        }
-    except Exception as e:
-        return {"file": file_path, "error": str(e)}
-
+    return {"file": file_path, **_measure_batch([file_path])[0]}
 
-def analyze_project(root: str) -> dict:
-    """Full token analysis of a project or skill directory."""
-    root = os.path.normpath(os.path.abspath(root))
-    is_skill = os.path.isfile(os.path.join(root, "SKILL.md"))
-    is_project = os.path.isfile(os.path.join(root, "CLAUDE.md"))
-
-    files = {}
-    total_tokens = 0
-    startup_tokens = 0
-    candidates = []
 
-    # Patterns to scan
-    patterns = []
-    if is_project:
-        patterns = [
+def _measure_batch(paths: list[str]) -> list[dict]:
+    """chars/lines/tokens for several files, tokenized in one batch."""
+    infos, texts = [], []
+    for file_path in paths:
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except Exception as e:
+            infos.append({"error": str(e)})
+            continue
+        infos.append({"chars": len(content), "lines": content.count('\n') + 1})
+        texts.append(content)
+    counts = iter(tokenizer.count_batch(texts))
+    for info in infos:
+        if "error" not in info:
+            info["tokens"] = next(counts)
+    return infos
+
+
+# Files above this many tokens are fragmentation candidates
+FRAGMENT_CANDIDATE_TOKENS = 500
+
+# Per-file results keyed by absolute path, valid while (size, mtime, tokenizer) match
+TOKEN_CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "agency", "token-cache.json",
+)
+# Below this many uncached files, reading inline beats starting a process pool
+POOL_MIN_FILES = 64
+# Files per worker task (and per tokenizer batch)
+MEASURE_CHUNK_FILES = 32
+
+
+def _root_patterns(root: str) -> tuple[str, list]:
+    """Return (root type, [(glob pattern, load type)]) for an analysis root."""
+    if os.path.isfile(os.path.join(root, "CLAUDE.md")):
+        return "project", [
             ("CLAUDE.md", "startup"),
             ("CLAUDE.local.md", "startup"),
             (".claude/settings.json", "startup"),
@@ -65,48 +102,60 @@ def analyze_project(root: str) -> dict:
             ("agent_docs/**/*.md", "on-demand"),
             ("docs/**/*.md", "on-demand"),
         ]
-    elif is_skill:
-        patterns = [
+    if os.path.isfile(os.path.join(root, "SKILL.md")):
+        return "skill", [
             ("SKILL.md", "trigger"),
             ("references/*.md", "on-demand"),
             ("scripts/*", "never"),
         ]
-    else:
-        # Scan everything
-        patterns = [("**/*.md", "unknown"), ("**/*.json", "unknown")]
+    # Scan everything
+    return "generic", [("**/*.md", "unknown"), ("**/*.json", "unknown")]
 
-    for pattern, load_type in patterns:
-        full_pattern = os.path.join(root, pattern)
-        for fpath in glob.glob(full_pattern, recursive=True):
-            if not os.path.isfile(fpath):
-                continue
-            info = estimate_file_tokens(fpath)
-            if "error" in info:
-                continue
+
+def _scan_root(root: str) -> list[tuple]:
+    """Return [(relative path, absolute path, load type)] for the files analyzed under root."""
+    found = {}
+    for pattern, load_type in _root_patterns(root)[1]:
+        for fpath in glob.iglob(os.path.join(root, pattern), recursive=True):
             rel_path = os.path.relpath(fpath, root)
-            info["relative_path"] = rel_path
-            info["load_type"] = load_type
-            files[rel_path] = info
-            total_tokens += info["tokens"]
-
-            if load_type in ("startup", "trigger"):
-                startup_tokens += info["tokens"]
-
-            # Fragmentation candidates
-            if info["tokens"] > 500:
-                severity = "mandatory" if info["tokens"] > 2000 else "recommended" if info["tokens"] > 1000 else "candidate"
-                candidates.append({
-                    "file": rel_path,
-                    "tokens": info["tokens"],
-                    "severity": severity,
-                })
+            if rel_path not in found and os.path.isfile(fpath):
+                found[rel_path] = (rel_path, fpath, load_type)
+    return list(found.values())
+
+
+def _build_report(root: str, scanned: list[tuple], infos: dict) -> dict:
+    files = {}
+    total_tokens = 0
+    startup_tokens = 0
+    candidates = []
+
+    for rel_path, fpath, load_type in scanned:
+        info = infos[fpath]
+        if "error" in info:
+            continue
+        info = {"file": fpath, **info, "relative_path": rel_path, "load_type": load_type}
+        files[rel_path] = info
+        total_tokens += info["tokens"]
+
+        if load_type in ("startup", "trigger"):
+            startup_tokens += info["tokens"]
+
+        # Fragmentation candidates
+        if info["tokens"] > FRAGMENT_CANDIDATE_TOKENS:
+            severity = "mandatory" if info["tokens"] > 2000 else "recommended" if info["tokens"] > 1000 else "candidate"
+            candidates.append({
+                "file": rel_path,
+                "tokens": info["tokens"],
+                "severity": severity,
+            })
 
     # Sort candidates by token count desc
     candidates.sort(key=lambda c: c["tokens"], reverse=True)
 
-    result = {
+    return {
         "root": root,
-        "type": "skill" if is_skill else "project" if is_project else "generic",
+        "type": _root_patterns(root)[0],
+        "tokenizer": tokenizer.name(),
         "files": files,
         "total_tokens": total_tokens,
         "startup_tokens": startup_tokens,
@@ -115,176 +164,704 @@ def analyze_project(root: str) -> dict:
         "fragmentation_candidates": candidates,
     }
 
-    return result
 
+def analyze_project(root: str) -> dict:
+    """Full token analysis of a project or skill directory."""
+    root = os.path.normpath(os.path.abspath(root))
+    scanned = _scan_root(root)
+    paths = [fpath for _, fpath, _ in scanned]
+    return _build_report(root, scanned, dict(zip(paths, _measure_batch(paths))))
+
+
+def discover_roots(workspace: str, max_depth: int = 2) -> list[str]:
+    """Project or skill directories (CLAUDE.md / SKILL.md) under a workspace, not nested in one another."""
+    roots = []
+    workspace = os.path.normpath(os.path.abspath(workspace))
+    for dirpath, dirnames, filenames in os.walk(workspace):
+        depth = dirpath[len(workspace):].count(os.sep)
+        if dirpath != workspace and ("CLAUDE.md" in filenames or "SKILL.md" in filenames):
+            roots.append(dirpath)
+            dirnames.clear()
+        elif depth >= max_depth:
+            dirnames.clear()
+        else:
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+    return roots
 
-def find_sections(content: str, min_tokens: int = 300) -> list[dict]:
-    """Find markdown sections that exceed a token threshold."""
-    sections = []
-    current_heading = None
-    current_content = []
-    current_level = 0
-
-    for line in content.splitlines():
-        heading_match = re.match(r'^(#{1,6})\s+(.+)', line)
-        if heading_match:
-            # Save previous section
-            if current_heading and current_content:
-                text = '\n'.join(current_content)
-                tokens = estimate_tokens(text)
-                if tokens >= min_tokens:
-                    slug = re.sub(r'[^a-z0-9]+', '-', current_heading.lower()).strip('-')
-                    sections.append({
-                        "heading": current_heading,
-                        "level": current_level,
-                        "slug": slug,
-                        "tokens": tokens,
-                        "lines": len(current_content),
-                        "content": text,
-                    })
-            current_level = len(heading_match.group(1))
-            current_heading = heading_match.group(2).strip()
-            current_content = [line]
+
+def _load_token_cache(path: str) -> dict:
+    try:
+        with open(path, "rb") as f:
+            return jsoncodec.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_token_cache(path: str, cache: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        jsoncodec.dump(cache, f)
+    os.replace(tmp, path)
+
+
+def analyze_workspace(roots: list[str], jobs: int = None, cache_path: str = TOKEN_CACHE_PATH,
+                      include_files: bool = False) -> dict:
+    """Analyze many roots and merge the reports.
+
+    Files are enumerated and stat()ed in this process. A file whose
+    (size, mtime) matches the cache, for the same tokenizer, is not opened.
+    The remaining files are read and tokenized in batches on a process
+    pool, with the same counting as `tokens analyze --root`, and each
+    root's report is then built exactly as that command would.
+    """
+    started = time.perf_counter()
+    roots = sorted({os.path.normpath(os.path.abspath(r)) for r in roots})
+    cache = _load_token_cache(cache_path) if cache_path else {}
+
+    scanned = {root: _scan_root(root) for root in roots}
+    infos, fresh, misses = {}, {}, []
+    hits = 0
+    for root in roots:
+        for _, fpath, _ in scanned[root]:
+            if fpath in infos:
+                continue
+            try:
+                st = os.stat(fpath)
+            except OSError as e:
+                infos[fpath] = {"error": str(e)}
+                continue
+            key = [st.st_size, st.st_mtime_ns, tokenizer.name()]
+            cached = cache.get(fpath)
+            if cached and cached[:3] == key:
+                infos[fpath] = cached[3]
+                hits += 1
+                fresh[fpath] = cached
+            else:
+                misses.append((fpath, key))
+
+    paths = [fpath for fpath, _ in misses]
+    chunks = [paths[i:i + MEASURE_CHUNK_FILES] for i in range(0, len(paths), MEASURE_CHUNK_FILES)]
+    if len(paths) >= POOL_MIN_FILES and (jobs or os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            measured = [info for batch in pool.map(_measure_batch, chunks) for info in batch]
+    else:
+        measured = [info for chunk in chunks for info in _measure_batch(chunk)]
+    for (fpath, key), info in zip(misses, measured):
+        infos[fpath] = info
+        if "error" not in info:
+            fresh[fpath] = key + [info]
+
+    if cache_path and fresh != {p: cache.get(p) for p in fresh}:
+        # Entries outside the analyzed roots are kept for other workspaces
+        prefixes = tuple(root + os.sep for root in roots)
+        kept = {p: v for p, v in cache.items() if not p.startswith(prefixes)}
+        _save_token_cache(cache_path, {**kept, **fresh})
+
+    reports = []
+    candidates = []
+    for root in roots:
+        report = _build_report(root, scanned[root], infos)
+        for c in report["fragmentation_candidates"]:
+            candidates.append({"root": root, **c})
+        if not include_files:
+            report.pop("files")
+        reports.append(report)
+    candidates.sort(key=lambda c: c["tokens"], reverse=True)
+
+    return {
+        "roots": reports,
+        "root_count": len(reports),
+        "file_count": sum(r["file_count"] for r in reports),
+        "total_tokens": sum(r["total_tokens"] for r in reports),
+        "startup_tokens": sum(r["startup_tokens"] for r in reports),
+        "on_demand_tokens": sum(r["on_demand_tokens"] for r in reports),
+        "fragmentation_candidates": candidates,
+        "tokenizer": tokenizer.name(),
+        "cache": {"path": cache_path, "hits": hits, "read": len(misses)},
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+# tokens watch keeps its per-file counts and rolling history here, per root
+WATCH_STATE_FILE = os.path.join("agent_docs", "agency", "token-watch.json")
+WATCH_INTERVAL = 2.0
+# Samples kept; the oldest one is the baseline regressions are measured against
+WATCH_HISTORY = 50
+WATCH_REGRESSION_PCT = 10.0
+
+
+def _load_watch_state(path: str) -> dict:
+    state = _load_token_cache(path)
+    if state.get("tokenizer") != tokenizer.name():
+        state = {"budget": state.get("budget"), "tokenizer": tokenizer.name()}
+    state.setdefault("files", {})
+    state.setdefault("history", [])
+    return state
+
+
+def _watch_files_from_stdin() -> list[str]:
+    """Paths from stdin: one per line, or a hook payload with tool_input.file_path."""
+    data = sys.stdin.read().strip()
+    if data.startswith("{"):
+        tool_input = jsoncodec.loads(data).get("tool_input", {})
+        return [tool_input["file_path"]] if tool_input.get("file_path") else []
+    return [line.strip() for line in data.splitlines() if line.strip()]
+
+
+def watch_update(root: str, state: dict, only: set = None, state_path: str = None) -> tuple[dict, list]:
+    """Bring state["files"] up to date and return (report, changed relative paths).
+
+    Every analyzed file is stat()ed and only those whose (size, mtime)
+    changed are read and tokenized. With only (absolute paths, e.g. from a
+    hook), files already in the state are trusted unless listed; new and
+    deleted files are still picked up by the scan.
+    """
+    files = state["files"]
+    scanned = [entry for entry in _scan_root(root) if entry[1] != state_path]
+    infos, misses, changed = {}, [], []
+    for rel_path, fpath, _ in scanned:
+        cached = files.get(rel_path)
+        if cached and only is not None and fpath not in only:
+            infos[fpath] = cached[2]
+            continue
+        try:
+            st = os.stat(fpath)
+        except OSError as e:
+            infos[fpath] = {"error": str(e)}
+            continue
+        if cached and cached[:2] == [st.st_size, st.st_mtime_ns]:
+            infos[fpath] = cached[2]
         else:
-            current_content.append(line)
-
-    # Last section
-    if current_heading and current_content:
-        text = '\n'.join(current_content)
-        tokens = estimate_tokens(text)
-        if tokens >= min_tokens:
-            slug = re.sub(r'[^a-z0-9]+', '-', current_heading.lower()).strip('-')
-            sections.append({
-                "heading": current_heading,
-                "level": current_level,
-                "slug": slug,
-                "tokens": tokens,
-                "lines": len(current_content),
-                "content": text,
-            })
+            misses.append((rel_path, fpath, st))
+    for (rel_path, fpath, st), info in zip(misses, _measure_batch([m[1] for m in misses])):
+        infos[fpath] = info
+        if "error" not in info:
+            if files.get(rel_path, [None, None, {}])[2].get("tokens") != info["tokens"]:
+                changed.append(rel_path)
+            files[rel_path] = [st.st_size, st.st_mtime_ns, info]
+
+    present = {rel_path for rel_path, fpath, _ in scanned if "error" not in infos[fpath]}
+    for rel_path in set(files) - present:
+        del files[rel_path]
+        changed.append(rel_path)
+    return _build_report(root, scanned, infos), sorted(changed)
+
+
+def _watch_event(report: dict, changed: list, state: dict, regression_pct: float) -> dict:
+    """Record a sample when the totals moved and return the event with its alerts."""
+    history = state["history"]
+    previous = history[-1] if history else None
+    sample = {
+        "at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "startup_tokens": report["startup_tokens"],
+        "total_tokens": report["total_tokens"],
+    }
+    if previous is None or (previous["startup_tokens"], previous["total_tokens"]) != (
+            sample["startup_tokens"], sample["total_tokens"]):
+        history.append({**sample, "changed": changed[:20]})
+        del history[:-WATCH_HISTORY]
+    baseline = history[0]
+
+    alerts = []
+    budget = state.get("budget")
+    startup = report["startup_tokens"]
+    if budget is not None and startup > budget:
+        alerts.append({
+            "kind": "over_budget",
+            "startup_tokens": startup,
+            "budget": budget,
+            "over_by": startup - budget,
+            "crossed": previous is None or previous["startup_tokens"] <= budget,
+        })
+    growth = startup - baseline["startup_tokens"]
+    if baseline["startup_tokens"] and growth * 100 >= regression_pct * baseline["startup_tokens"]:
+        alerts.append({
+            "kind": "regression",
+            "startup_tokens": startup,
+            "baseline": baseline["startup_tokens"],
+            "baseline_at": baseline["at"],
+            "growth_pct": round(growth * 100 / baseline["startup_tokens"], 1),
+        })
+    grown = sorted(
+        (info for info in report["files"].values()
+         if info["relative_path"] in changed and info["load_type"] in ("startup", "trigger")),
+        key=lambda info: info["tokens"], reverse=True,
+    )
+    return {
+        **sample,
+        "status": "alert" if alerts else "ok",
+        "budget": budget,
+        "baseline_startup_tokens": baseline["startup_tokens"],
+        "delta_startup_tokens": growth,
+        "changed": changed,
+        "startup_files_changed": [{"file": i["relative_path"], "tokens": i["tokens"]} for i in grown],
+        "alerts": alerts,
+    }
 
-    return sections
 
+def watch_tokens(args: list[str]) -> dict:
+    """Handle 'tokens watch'."""
+    parser = argparse.ArgumentParser(prog="agency_cli tokens watch")
+    parser.add_argument("--root", required=True)
+    parser.add_argument("--budget", type=int, help="Startup/trigger token budget (kept in the watch state)")
+    parser.add_argument("--regression-pct", type=float, default=WATCH_REGRESSION_PCT,
+                        help=f"Alert when startup tokens grow this much over the baseline (default: {WATCH_REGRESSION_PCT})")
+    parser.add_argument("--interval", type=float, default=WATCH_INTERVAL,
+                        help=f"Seconds between polls (default: {WATCH_INTERVAL})")
+    parser.add_argument("--duration", type=float, help="Stop polling after this many seconds")
+    parser.add_argument("--once", action="store_true", help="Update once and print the event")
+    parser.add_argument("--files", help="Comma-separated changed files (from a hook); implies --once")
+    parser.add_argument("--files-stdin", action="store_true",
+                        help="Read changed files (or a hook's JSON payload) from stdin; implies --once")
+    parser.add_argument("--rebaseline", action="store_true", help="Drop the history and start from the current totals")
+    opts = parser.parse_args(args)
+
+    root = os.path.normpath(os.path.abspath(opts.root))
+    state_path = os.path.join(root, WATCH_STATE_FILE)
+    state = _load_watch_state(state_path)
+    if opts.budget is not None:
+        state["budget"] = opts.budget
+    if opts.rebaseline:
+        state["history"] = []
+
+    only = None
+    if opts.files or opts.files_stdin:
+        paths = opts.files.split(",") if opts.files else _watch_files_from_stdin()
+        only = {os.path.normpath(os.path.abspath(os.path.join(root, p.strip()))) for p in paths if p.strip()}
+
+    settings_changed = opts.budget is not None or opts.rebaseline
+
+    def poll():
+        nonlocal settings_changed
+        last = state["history"][-1] if state["history"] else None
+        report, changed = watch_update(root, state, only, state_path)
+        event = _watch_event(report, changed, state, opts.regression_pct)
+        if changed or settings_changed or state["history"][-1] is not last:
+            settings_changed = False
+            os.makedirs(os.path.dirname(state_path), exist_ok=True)
+            _atomic_write(state_path, jsoncodec.dumps(state))
+        return event
+
+    if opts.once or only is not None:
+        return {"root": root, "state": state_path, **poll()}
+
+    # Continuous: one JSON line per change; a poll with no change is only stat() calls
+    started = time.monotonic()
+    polls = events = alerts = 0
+    event = None
+    try:
+        while True:
+            event = poll()
+            polls += 1
+            if event["changed"] or polls == 1:
+                events += 1
+                alerts += bool(event["alerts"])
+                print(jsoncodec.dumps(event), flush=True)
+            if opts.duration is not None and time.monotonic() - started + opts.interval > opts.duration:
+                break
+            time.sleep(opts.interval)
+    except KeyboardInterrupt:
+        pass
+    return {
+        "root": root,
+        "state": state_path,
+        "polls": polls,
+        "events": events,
+        "alert_events": alerts,
+        "startup_tokens": event["startup_tokens"] if event else None,
+        "total_tokens": event["total_tokens"] if event else None,
+        "status": event["status"] if event else None,
+    }
 
-def fragment_file(file_path: str, threshold: int, output_dir: str, dry_run: bool = False) -> dict:
-    """Fragment a markdown file by extracting sections above threshold."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
 
-    before_tokens = estimate_tokens(content)
-    sections = find_sections(content, min_tokens=threshold)
+_HEADING_RE = re.compile(r'(#{1,6})\s+(.+)')
+_FENCE_RE = re.compile(r'\s{0,3}(`{3,}|~{3,})')
 
-    if not sections:
-        return {"status": "no_changes", "reason": f"No sections above {threshold} tokens"}
 
-    extracted = []
-    remaining = content
-
-    for section in sections:
-        # Create output file
-        out_path = os.path.join(output_dir, f"{section['slug']}.md")
-        if not dry_run:
-            os.makedirs(output_dir, exist_ok=True)
-            with open(out_path, 'w', encoding='utf-8') as f:
-                f.write(section["content"])
-
-        # Replace in original with reference
-        ref_line = f"See [{section['heading']}]({os.path.relpath(out_path, os.path.dirname(file_path))})"
-        remaining = remaining.replace(section["content"], ref_line)
-
-        extracted.append({
-            "heading": section["heading"],
-            "slug": section["slug"],
-            "tokens": section["tokens"],
-            "output": out_path,
-        })
+def _slugify(heading: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', heading.lower()).strip('-')
 
-    if not dry_run:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(remaining)
 
-    after_tokens = estimate_tokens(remaining)
+def parse_sections(content: str) -> list[dict]:
+    """Split markdown into heading sections in one pass, recording offsets.
 
-    return {
-        "status": "dry_run" if dry_run else "applied",
+    A section runs from its heading line to the line before the next heading
+    of any level; text before the first heading belongs to no section.
+    start/end are character offsets into content and byte_start/byte_end the
+    matching UTF-8 offsets. Trailing blank lines and the final line break are
+    outside the range, so splicing a reference in keeps the spacing around it.
+    Lines inside fenced code blocks are never headings.
+    """
+    sections = []
+    fence = None
+    pos = byte_pos = 0
+    length = len(content)
+    while pos < length:
+        nl = content.find('\n', pos)
+        line_end = length if nl < 0 else nl
+        line = content[pos:line_end]
+        fence_match = _FENCE_RE.match(line)
+        if fence_match:
+            marker = fence_match.group(1)
+            if fence is None:
+                fence = marker
+            elif marker[0] == fence[0] and len(marker) >= len(fence) and not line.strip()[len(marker):]:
+                fence = None
+        elif fence is None:
+            heading_match = _HEADING_RE.match(line)
+            if heading_match:
+                if sections:
+                    sections[-1]["end"], sections[-1]["byte_end"] = prev_end, prev_byte_end
+                sections.append({
+                    "heading": heading_match.group(2).strip(),
+                    "level": len(heading_match.group(1)),
+                    "start": pos,
+                    "byte_start": byte_pos,
+                })
+        line_bytes = len(line.encode('utf-8'))
+        if line.strip() or fence is not None:
+            cr = line.endswith('\r')  # keep CRLF line endings outside the range too
+            prev_end, prev_byte_end = line_end - cr, byte_pos + line_bytes - cr
+        pos, byte_pos = line_end + 1, byte_pos + line_bytes + 1
+    if sections:
+        sections[-1]["end"], sections[-1]["byte_end"] = prev_end, prev_byte_end
+
+    # Slugs name the extracted files, so repeated headings get -2, -3, ...
+    seen = defaultdict(int)
+    texts = [content[sec["start"]:sec["end"]] for sec in sections]
+    for sec, text, tokens in zip(sections, texts, tokenizer.count_batch(texts)):
+        slug = _slugify(sec["heading"])
+        seen[slug] += 1
+        sec["slug"] = slug if seen[slug] == 1 else f"{slug}-{seen[slug]}"
+        sec["tokens"] = tokens
+        sec["lines"] = text.count('\n') + 1
+    return sections
+
+
+def find_sections(content: str, min_tokens: int = 300) -> list[dict]:
+    """Find markdown sections that exceed a token threshold."""
+    return [
+        {**sec, "content": content[sec["start"]:sec["end"]]}
+        for sec in parse_sections(content) if sec["tokens"] >= min_tokens
+    ]
+
+
+def splice(content: str, replacements: list[tuple]) -> str:
+    """Replace non-overlapping (start, end, text) ranges, sorted by start, in one pass."""
+    parts = []
+    pos = 0
+    for start, end, text in replacements:
+        parts.append(content[pos:start])
+        parts.append(text)
+        pos = end
+    parts.append(content[pos:])
+    return ''.join(parts)
+
+
+def _atomic_write(path: str, text: str) -> None:
+    """Write via a temp file in the same directory and rename over the target."""
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".fragment-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.chmod(tmp, mode)  # mkstemp creates 0600; keep the target's (or the default) mode
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _fragment(file_path: str, content: str, sections: list[dict], output_dir: str,
+              reference, mode: str) -> dict:
+    """Extract sections into output_dir and splice references into file_path.
+
+    mode is "apply", "dry_run" or "plan". Extracted files are written before
+    the source, each atomically, so an interrupted run never leaves the
+    source pointing at a missing file or half written.
+    """
+    entries = []
+    for sec in sections:
+        out_path = os.path.join(output_dir, f"{sec['slug']}.md")
+        entries.append({**sec, "output": out_path, "replacement": reference(sec, out_path)})
+    remaining = splice(content, [(e["start"], e["end"], e["replacement"]) for e in entries])
+
+    if mode == "apply" and entries:
+        os.makedirs(output_dir, exist_ok=True)
+        for e in entries:
+            _atomic_write(e["output"], content[e["start"]:e["end"]])
+        _atomic_write(file_path, remaining)
+
+    before_tokens, after_tokens = tokenizer.count_batch([content, remaining])
+    result = {
+        "status": {"apply": "applied", "dry_run": "dry_run", "plan": "plan"}[mode],
         "file": file_path,
         "before_tokens": before_tokens,
         "after_tokens": after_tokens,
         "savings": before_tokens - after_tokens,
-        "extracted_sections": len(extracted),
-        "extracted": extracted,
+        "extracted_sections": len(entries),
     }
+    if mode == "plan":
+        result["plan"] = [
+            {k: e[k] for k in ("heading", "level", "slug", "start", "end", "byte_start", "byte_end",
+                               "tokens", "output", "replacement")}
+            for e in entries
+        ]
+    else:
+        result["extracted"] = [
+            {"heading": e["heading"], "slug": e["slug"], "tokens": e["tokens"], "output": e["output"]}
+            for e in entries
+        ]
+    return result
+
+
+def fragment_file(file_path: str, threshold: int, output_dir: str, dry_run: bool = False,
+                  plan: bool = False) -> dict:
+    """Fragment a markdown file by extracting sections above threshold."""
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        content = f.read()
+
+    sections = [sec for sec in parse_sections(content) if sec["tokens"] >= threshold]
+    if not sections:
+        return {"status": "no_changes", "reason": f"No sections above {threshold} tokens"}
+
+    def reference(sec, out_path):
+        return f"See [{sec['heading']}]({os.path.relpath(out_path, os.path.dirname(file_path))})"
 
+    return _fragment(file_path, content, sections, output_dir, reference,
+                     "plan" if plan else "dry_run" if dry_run else "apply")
 
-def fragment_skill(skill_path: str, threshold: int, output_dir: str, dry_run: bool = False) -> dict:
+
+def fragment_skill(skill_path: str, threshold: int, output_dir: str, dry_run: bool = False,
+                   plan: bool = False) -> dict:
     """Fragment a SKILL.md file preserving frontmatter."""
-    with open(skill_path, 'r', encoding='utf-8') as f:
+    with open(skill_path, 'r', encoding='utf-8', newline='') as f:
         content = f.read()
 
-    # Separate frontmatter from body
-    frontmatter = ""
-    body = content
+    # Sections are only taken from the body; the frontmatter is copied as is
+    body_start = 0
     if content.startswith('---'):
-        end_idx = content.index('---', 3)
-        frontmatter = content[:end_idx + 3]
-        body = content[end_idx + 3:].lstrip('\n')
-
-    before_tokens = estimate_tokens(body)
-    sections = find_sections(body, min_tokens=threshold)
+        body_start = content.index('---', 3) + 3
 
     # Protected sections (should not be extracted)
     protected_keywords = ["command routing", "variables", "constraints", "hard constraints", "workflow overview"]
+    sections = [
+        sec for sec in parse_sections(content)
+        if sec["start"] >= body_start and sec["tokens"] >= threshold
+        and not any(kw in sec["heading"].lower() for kw in protected_keywords)
+    ]
 
-    extracted = []
-    remaining_body = body
+    def reference(sec, out_path):
+        return f"See [references/{sec['slug']}.md](references/{sec['slug']}.md)"
+
+    mode = "plan" if plan else "dry_run" if dry_run else "apply"
+    result = _fragment(skill_path, content, sections, output_dir, reference, mode)
+    result["frontmatter_preserved"] = body_start > 0
+    if mode == "apply" and sections:
+        index = load_section_index(output_dir)
+        result["section_index"] = {
+            "path": os.path.join(output_dir, SECTION_INDEX_FILE),
+            "files": len(index["files"]),
+            "sections": sum(len(f["sections"]) for f in index["files"].values()),
+        }
+    return result
 
-    for section in sections:
-        # Skip protected sections
-        if any(kw in section["heading"].lower() for kw in protected_keywords):
-            continue
 
-        out_path = os.path.join(output_dir, f"{section['slug']}.md")
-        if not dry_run:
-            os.makedirs(output_dir, exist_ok=True)
-            with open(out_path, 'w', encoding='utf-8') as f:
-                f.write(section["content"])
+# Written next to the reference files by fragment-skill and read by `tokens section`
+SECTION_INDEX_FILE = "sections.json"
+SECTION_INDEX_VERSION = 1
+SECTION_PATH_SEPARATOR = " > "
+
+
+def _content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=12).hexdigest()
+
+
+def index_reference_file(path: str) -> dict:
+    """Section index of one markdown file.
+
+    Each heading gets its heading path (the headings above it), and the byte
+    range, token count and content hash of the heading together with its
+    subsections, so a lookup returns a whole topic with one seek and read.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    stat = os.stat(path)
+    content = data.decode('utf-8')
+    sections = parse_sections(content)
+
+    entries = []
+    stack = []
+    for i, sec in enumerate(sections):
+        while stack and stack[-1]["level"] >= sec["level"]:
+            stack.pop()
+        last = i
+        while last + 1 < len(sections) and sections[last + 1]["level"] > sec["level"]:
+            last += 1
+        entries.append({
+            "heading": sec["heading"],
+            "path": [s["heading"] for s in stack] + [sec["heading"]],
+            "level": sec["level"],
+            "slug": sec["slug"],
+            "start": sec["start"],
+            "end": sections[last]["end"],
+            "byte_start": sec["byte_start"],
+            "byte_end": sections[last]["byte_end"],
+        })
+        stack.append(sec)
 
-        ref_line = f"See [references/{section['slug']}.md](references/{section['slug']}.md)"
-        remaining_body = remaining_body.replace(section["content"], ref_line)
+    texts = [content[e.pop("start"):e.pop("end")] for e in entries]
+    for e, text, tokens in zip(entries, texts, tokenizer.count_batch(texts)):
+        e["tokens"] = tokens
+        e["hash"] = _content_hash(data[e["byte_start"]:e["byte_end"]])
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": _content_hash(data),
+        "tokens": tokenizer.count(content),
+        "sections": entries,
+    }
 
-        extracted.append({
-            "heading": section["heading"],
-            "slug": section["slug"],
-            "tokens": section["tokens"],
-            "output": out_path,
-        })
 
-    if not dry_run:
-        final = frontmatter + "\n\n" + remaining_body if frontmatter else remaining_body
-        with open(skill_path, 'w', encoding='utf-8') as f:
-            f.write(final)
+def load_section_index(ref_dir: str) -> dict:
+    """Read the section index of a references directory, re-indexing stale files.
 
-    after_tokens = estimate_tokens(remaining_body)
+    A file is re-indexed when its size or mtime differs from the index or the
+    tokenizer changed; the index is rewritten only when something did.
+    """
+    path = os.path.join(ref_dir, SECTION_INDEX_FILE)
+    index = None
+    try:
+        with open(path, 'rb') as f:
+            index = jsoncodec.load(f)
+    except (OSError, ValueError):
+        pass
+    if (not isinstance(index, dict) or index.get("version") != SECTION_INDEX_VERSION
+            or index.get("tokenizer") != tokenizer.name()):
+        index = {"version": SECTION_INDEX_VERSION, "tokenizer": tokenizer.name(), "files": {}}
+
+    files = {}
+    changed = False
+    for md in sorted(glob.glob(os.path.join(ref_dir, "*.md"))):
+        name = os.path.basename(md)
+        entry = index["files"].get(name)
+        stat = os.stat(md)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            entry = index_reference_file(md)
+            changed = True
+        files[name] = entry
+    changed = changed or files.keys() != index["files"].keys()
+    index["files"] = files
+    if changed and os.path.isdir(ref_dir):
+        _atomic_write(path, jsoncodec.dumps(index, pretty=True))
+    return index
+
+
+def _match_sections(index: dict, heading: str, file: str = None) -> list[tuple]:
+    """(file name, entry) pairs for a heading query, best tier first.
+
+    Tiers: exact slug or heading, then a heading path ending in the query
+    ("Mode: Optimize > Workflow"), then headings containing the query.
+    """
+    query = heading.strip().lower()
+    query_path = [p.strip() for p in query.split(SECTION_PATH_SEPARATOR.strip())]
+    tiers = ([], [], [])
+    for name, info in index["files"].items():
+        if file and name not in (file, f"{file}.md"):
+            continue
+        for e in info["sections"]:
+            path = [p.lower() for p in e["path"]]
+            if query in (e["slug"], e["heading"].lower()):
+                tiers[0].append((name, e))
+            elif len(query_path) > 1 and path[-len(query_path):] == query_path:
+                tiers[1].append((name, e))
+            elif query in e["heading"].lower():
+                tiers[2].append((name, e))
+    return next((t for t in tiers if t), [])
+
+
+def read_section(skill: str, heading: str = None, file: str = None) -> dict:
+    """Handle 'tokens section': one section of a skill's references, or the index.
+
+    The slice is read with a seek at the indexed byte offset, so a lookup
+    costs the section's size rather than the whole reference file.
+    """
+    skill_dir = os.path.dirname(skill) if os.path.isfile(skill) else skill
+    ref_dir = os.path.join(skill_dir, "references")
+    if not os.path.isdir(ref_dir):
+        raise FileNotFoundError(f"No references directory: {ref_dir}")
+    index = load_section_index(ref_dir)
+
+    if not heading:
+        return {
+            "skill": skill_dir,
+            "index": os.path.join(ref_dir, SECTION_INDEX_FILE),
+            "tokenizer": index["tokenizer"],
+            "files": [
+                {"file": name, "tokens": info["tokens"], "sections": [
+                    {"path": SECTION_PATH_SEPARATOR.join(e["path"]), "tokens": e["tokens"]}
+                    for e in info["sections"]
+                ]}
+                for name, info in index["files"].items() if not file or name in (file, f"{file}.md")
+            ],
+        }
+
+    for attempt in range(2):
+        matches = _match_sections(index, heading, file)
+        if not matches:
+            raise ValueError(f"No section matching '{heading}' in {ref_dir}")
+        if len(matches) > 1:
+            found = ", ".join(f"{n}: {SECTION_PATH_SEPARATOR.join(e['path'])}" for n, e in matches[:10])
+            raise ValueError(f"'{heading}' matches {len(matches)} sections ({found}); "
+                             f"narrow it with --file or a heading path")
+        name, entry = matches[0]
+        with open(os.path.join(ref_dir, name), 'rb') as f:
+            f.seek(entry["byte_start"])
+            data = f.read(entry["byte_end"] - entry["byte_start"])
+        if _content_hash(data) == entry["hash"] or attempt:
+            break
+        # Edited without changing size or mtime: index the file again and retry
+        index["files"][name] = index_reference_file(os.path.join(ref_dir, name))
+        _atomic_write(os.path.join(ref_dir, SECTION_INDEX_FILE), jsoncodec.dumps(index, pretty=True))
 
     return {
-        "status": "dry_run" if dry_run else "applied",
-        "file": skill_path,
-        "before_tokens": before_tokens,
-        "after_tokens": after_tokens,
-        "savings": before_tokens - after_tokens,
-        "frontmatter_preserved": bool(frontmatter),
-        "extracted_sections": len(extracted),
-        "extracted": extracted,
+        "file": os.path.join(ref_dir, name),
+        "heading": entry["heading"],
+        "path": entry["path"],
+        "byte_start": entry["byte_start"],
+        "byte_end": entry["byte_end"],
+        "tokens": entry["tokens"],
+        "file_tokens": index["files"][name]["tokens"],
+        "hash": entry["hash"],
+        "content": data.decode('utf-8'),
     }
 
 
-def find_duplicates(root: str) -> dict:
-    """Find duplicate content across markdown files."""
-    root = os.path.normpath(os.path.abspath(root))
-    # Collect all paragraphs from all md files
-    paragraphs = defaultdict(list)  # text -> list of (file, line)
+# Blocks shorter than this are not checked for duplication
+DEDUP_MIN_BLOCK_CHARS = 100
+
+# Near-duplicate detection: word shingles hashed into a fixed-size
+# one-permutation MinHash signature, then LSH banding to find candidate pairs.
+# With 128 bins in 32 bands of 4, pairs at Jaccard 0.7 collide in some band
+# with probability > 0.99, pairs at 0.3 with about 0.23.
+NEAR_SHINGLE_WORDS = 3
+NEAR_NUM_PERM = 128
+NEAR_BANDS = 32
+NEAR_THRESHOLD = 0.7
+_EMPTY_BIN = 0xFFFFFFFF
 
-    for md_file in glob.glob(os.path.join(root, "**", "*.md"), recursive=True):
+
+def _iter_blocks(root: str):
+    """Yield (relative path, block index, normalized text) for every substantial
+    paragraph of every markdown file under root, one file in memory at a time."""
+    for md_file in glob.iglob(os.path.join(root, "**", "*.md"), recursive=True):
         try:
             with open(md_file, 'r', encoding='utf-8') as f:
                 content = f.read()
@@ -293,37 +870,440 @@ def find_duplicates(root: str) -> dict:
 
         rel_path = os.path.relpath(md_file, root)
         # Split into paragraphs (blocks separated by blank lines)
-        blocks = re.split(r'\n\s*\n', content)
-        for i, block in enumerate(blocks):
+        for i, block in enumerate(re.split(r'\n\s*\n', content)):
             block = block.strip()
-            if len(block) > 100:  # Only check substantial blocks
+            if len(block) > DEDUP_MIN_BLOCK_CHARS:
                 # Normalize whitespace for comparison
-                normalized = re.sub(r'\s+', ' ', block)
-                paragraphs[normalized].append({"file": rel_path, "block_index": i})
+                yield rel_path, i, re.sub(r'\s+', ' ', block)
+
+
+def _preview(text: str) -> str:
+    return text[:200] + "..." if len(text) > 200 else text
+
+
+def _fill_previews(root: str, wanted: dict) -> None:
+    """Set "preview" on each entry of {relative path: {block index: entry}},
+    re-reading only those files."""
+    for rel_path, by_index in wanted.items():
+        with open(os.path.join(root, rel_path), 'r', encoding='utf-8') as f:
+            blocks = re.split(r'\n\s*\n', f.read())
+        for i, entry in by_index.items():
+            entry["preview"] = _preview(re.sub(r'\s+', ' ', blocks[i].strip()))
+
+
+def find_duplicates(root: str) -> dict:
+    """Find duplicate content across markdown files."""
+    root = os.path.normpath(os.path.abspath(root))
+    # Blocks are keyed by a digest of their normalized text, so no block text
+    # is kept; previews are re-read for the duplicates found
+    paragraphs = {}  # digest -> [tokens, [(file, block_index), ...]]
+
+    for rel_path, i, text in _iter_blocks(root):
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+        entry = paragraphs.get(digest)
+        if entry is None:
+            entry = paragraphs[digest] = [estimate_tokens(text), []]
+        entry[1].append((rel_path, i))
 
     # Find duplicates (appear in 2+ files)
     duplicates = []
-    for text, locations in paragraphs.items():
+    wanted = defaultdict(dict)
+    for tokens, locations in paragraphs.values():
         if len(locations) >= 2:
             # Check they're in different files
-            unique_files = set(loc["file"] for loc in locations)
+            unique_files = set(f for f, _ in locations)
             if len(unique_files) >= 2:
-                duplicates.append({
-                    "preview": text[:200] + "..." if len(text) > 200 else text,
-                    "tokens": estimate_tokens(text),
-                    "locations": locations,
+                dup = {
+                    "tokens": tokens,
+                    "locations": [{"file": f, "block_index": i} for f, i in locations],
                     "file_count": len(unique_files),
-                })
+                }
+                wanted[locations[0][0]][locations[0][1]] = dup
+                duplicates.append(dup)
+    _fill_previews(root, wanted)
 
     duplicates.sort(key=lambda d: d["tokens"], reverse=True)
 
     return {
         "root": root,
-        "duplicates": duplicates,
+        "duplicates": [{"preview": d.pop("preview"), **d} for d in duplicates],
         "total_duplicate_tokens": sum(d["tokens"] * (d["file_count"] - 1) for d in duplicates),
     }
 
 
+def minhash_signature(text: str, num_perm: int = NEAR_NUM_PERM, shingle: int = NEAR_SHINGLE_WORDS) -> array:
+    """One-permutation MinHash of the text's word shingles.
+
+    Each shingle is hashed once (CRC-32); the hash picks one of num_perm bins
+    and the bin keeps its minimum. Empty bins borrow from the next non-empty
+    bin to the right (rotation densification), so short blocks still compare
+    position by position. The share of equal positions between two signatures
+    estimates the Jaccard similarity of their shingle sets.
+    """
+    words = text.lower().split()
+    hashes = {zlib.crc32(" ".join(words[i:i + shingle]).encode('utf-8'))
+              for i in range(max(len(words) - shingle + 1, 1))}
+    # Largest first, so each bin ends up holding its smallest value
+    bins = {h % num_perm: h // num_perm for h in sorted(hashes, reverse=True)}
+    sig = array('I', [bins.get(b, _EMPTY_BIN) for b in range(num_perm)])
+    filled = bins.keys()
+    if filled and len(filled) < num_perm:
+        # Walk right to left over two laps so bins near the end wrap around
+        nxt = None
+        for b in range(2 * num_perm - 1, -1, -1):
+            if b % num_perm in filled:
+                nxt = b
+            elif b < num_perm and nxt is not None:
+                sig[b] = (sig[nxt % num_perm] + (nxt - b) * 0x9E3779B1) & 0xFFFFFFFF
+    return sig
+
+
+def _similarity(sigs: array, a: int, b: int, num_perm: int) -> float:
+    sa, sb = a * num_perm, b * num_perm
+    return sum(map(operator.eq, sigs[sa:sa + num_perm], sigs[sb:sb + num_perm])) / num_perm
+
+
+def find_near_duplicates(root: str, threshold: float = NEAR_THRESHOLD,
+                         num_perm: int = NEAR_NUM_PERM, bands: int = NEAR_BANDS,
+                         shingle: int = NEAR_SHINGLE_WORDS) -> dict:
+    """Cluster near-duplicate markdown blocks across files with MinHash + LSH.
+
+    Memory is bounded by the block count, not the corpus: each block keeps its
+    num_perm-entry signature (packed into one array), a file index, its block
+    index and token count. Candidate pairs come from sorting one band at a
+    time; each candidate is checked against its bucket's first member and
+    merged with union-find. Previews are re-read only for reported clusters.
+    """
+    if num_perm % bands:
+        raise ValueError(f"--num-perm ({num_perm}) must be a multiple of --bands ({bands})")
+    root = os.path.normpath(os.path.abspath(root))
+    rows = num_perm // bands
+
+    files, file_index = [], {}
+    block_file, block_index, block_tokens = array('I'), array('I'), array('I')
+    sigs = array('I')
+    for rel_path, i, text in _iter_blocks(root):
+        if rel_path not in file_index:
+            file_index[rel_path] = len(files)
+            files.append(rel_path)
+        block_file.append(file_index[rel_path])
+        block_index.append(i)
+        block_tokens.append(estimate_tokens(text))
+        sigs.extend(minhash_signature(text, num_perm, shingle))
+    count = len(block_file)
+
+    parent = list(range(count))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    best = {}  # block -> highest similarity to a block it was merged with
+    checked = set()  # pairs already below threshold in an earlier band
+    for band in range(bands):
+        lo = band * rows
+        keys = [hash(tuple(sigs[k * num_perm + lo:k * num_perm + lo + rows])) for k in range(count)]
+        order = sorted(range(count), key=keys.__getitem__)
+        head = 0
+        for pos in range(1, count + 1):
+            if pos < count and keys[order[pos]] == keys[order[head]]:
+                continue
+            first = order[head]
+            for k in order[head + 1:pos]:
+                if block_file[k] == block_file[first] or find(k) == find(first) or (first, k) in checked:
+                    continue
+                sim = _similarity(sigs, first, k, num_perm)
+                if sim < threshold:
+                    checked.add((first, k))
+                else:
+                    parent[find(k)] = find(first)
+                    best[k] = max(best.get(k, 0), sim)
+                    best[first] = max(best.get(first, 0), sim)
+            head = pos
+        del keys, order
+
+    groups = defaultdict(list)
+    for k in best:
+        groups[find(k)].append(k)
+
+    clusters = []
+    for members in groups.values():
+        if len({block_file[k] for k in members}) < 2:
+            continue
+        rep = max(members, key=lambda k: block_tokens[k])
+        scores = [_similarity(sigs, rep, k, num_perm) for k in members if k != rep]
+        clusters.append({
+            "representative": rep,
+            "tokens": block_tokens[rep],
+            "min_similarity": round(min(scores), 3),
+            "mean_similarity": round(sum(scores) / len(scores), 3),
+            "locations": [
+                {"file": files[block_file[k]], "block_index": block_index[k],
+                 "tokens": block_tokens[k],
+                 "similarity": 1.0 if k == rep else round(_similarity(sigs, rep, k, num_perm), 3)}
+                for k in sorted(members, key=lambda k: (files[block_file[k]], block_index[k]))
+            ],
+            "redundant_tokens": sum(block_tokens[k] for k in members if k != rep),
+        })
+
+    # Previews are re-read only from the files that hold a representative
+    wanted = defaultdict(dict)
+    for c in clusters:
+        rep = c.pop("representative")
+        wanted[files[block_file[rep]]][block_index[rep]] = c
+    _fill_previews(root, wanted)
+
+    clusters.sort(key=lambda c: c["redundant_tokens"], reverse=True)
+
+    return {
+        "root": root,
+        "mode": "near",
+        "threshold": threshold,
+        "num_perm": num_perm,
+        "bands": bands,
+        "blocks_scanned": count,
+        "files_scanned": len(files),
+        "clusters": [{"preview": c.pop("preview"), **c} for c in clusters],
+        "total_duplicate_tokens": sum(c["redundant_tokens"] for c in clusters),
+    }
+
+
+# Context packing: value of a candidate per load type (0 excludes it). Startup
+# files are in every session already; scripts are never read as context.
+PACK_LOAD_TYPE_WEIGHTS = {"startup": 0.0, "trigger": 1.0, "on-demand": 1.0, "unknown": 1.0, "never": 0.0}
+# Items around the greedy cut solved exactly, and the capacity resolution used
+PACK_CORE_ITEMS = 48
+PACK_DP_RESOLUTION = 1024
+_TERM_RE = re.compile(r"[a-z][a-z0-9_]{2,}")
+_PUNCT_TO_SPACE = bytes.maketrans(b"!\"#$%&'()*+,-./:;<=>?@[\\]^`{|}~\t\r\n", b" " * 34)
+_PACK_STOPWORDS = frozenset(
+    "the and for with that this from are was were will have has not but you your all any can its "
+    "into use using when then than each should must".split()
+)
+
+
+def _terms(text: str) -> list[str]:
+    return [t for t in _TERM_RE.findall(text.lower()) if t not in _PACK_STOPWORDS]
+
+
+def knapsack(weights: list[int], values: list[float], capacity: int,
+             core: int = PACK_CORE_ITEMS, resolution: int = PACK_DP_RESOLUTION) -> list[int]:
+    """Indices of a high-value subset whose weights fit in capacity.
+
+    Items are ranked by value density. Those clearly above the greedy cut are
+    taken and those clearly below it are skipped. The `core` items around the
+    cut are solved exactly by dynamic programming over the remaining
+    capacity, scaled to at most `resolution` units; weights round up, so the
+    result always fits. Leftover room is then filled greedily. The answer is
+    never worse than the single most valuable item that fits. Cost is one
+    sort plus core * resolution steps, independent of the budget.
+    """
+    order = sorted((i for i in range(len(weights)) if values[i] > 0 and weights[i] <= capacity),
+                   key=lambda i: values[i] / max(weights[i], 1), reverse=True)
+    used, cut = 0, len(order)
+    for pos, i in enumerate(order):
+        if used + weights[i] > capacity:
+            cut = pos
+            break
+        used += weights[i]
+    if cut == len(order):
+        return order
+
+    lo, hi = max(0, cut - core // 2), min(len(order), cut + core // 2)
+    chosen = order[:lo]
+    residual = capacity - sum(weights[i] for i in chosen)
+    scale = max(1, math.ceil(residual / resolution))
+    units = residual // scale
+
+    # best[c]: best value within c units; keep[k][c]: item k taken at c
+    best = [0.0] * (units + 1)
+    keep = []
+    core_items = order[lo:hi]
+    for i in core_items:
+        w, v = math.ceil(weights[i] / scale), values[i]
+        taken = bytearray(units + 1)
+        if w <= units:
+            for c in range(units, w - 1, -1):
+                if best[c - w] + v > best[c]:
+                    best[c] = best[c - w] + v
+                    taken[c] = 1
+        keep.append(taken)
+    c = units
+    for k in range(len(core_items) - 1, -1, -1):
+        if keep[k][c]:
+            chosen.append(core_items[k])
+            c -= math.ceil(weights[core_items[k]] / scale)
+
+    room = capacity - sum(weights[i] for i in chosen)
+    for i in order[hi:]:
+        if weights[i] <= room:
+            chosen.append(i)
+            room -= weights[i]
+
+    top = max(order, key=values.__getitem__)
+    if values[top] > sum(values[i] for i in chosen):
+        return [top]
+    return chosen
+
+
+def pack_context(candidates: list[dict], budget: int, query: str = "", weights: dict = None) -> dict:
+    """Choose the candidates (files or sections) that best fill a token budget.
+
+    Each candidate needs "id", "tokens", "text" and "load_type"; its value is
+    the query relevance (sum over query terms present, matched as word
+    prefixes, of idf * (1 + log tf),
+    idf taken over the candidates) times its load-type weight and any
+    matching --weight glob. Without a query every candidate is worth 1, so
+    the pack maximizes the number of sections. Returns the selected and
+    omitted candidates with their scores, in the input order.
+    """
+    weights = weights or {}
+    query_terms = set(_terms(query))
+    # Only query terms are counted, as word prefixes ("gate" also counts
+    # "gates"), with bytes.count over text whose punctuation became spaces
+    needles = {t: b" " + t.encode('utf-8') for t in query_terms}
+    term_counts = []
+    df = defaultdict(int)
+    for c in candidates:
+        counts = {}
+        if query_terms:
+            text = b" " + c["text"].lower().encode('utf-8').translate(_PUNCT_TO_SPACE)
+            for t, needle in needles.items():
+                k = text.count(needle)
+                if k:
+                    counts[t] = k
+                    df[t] += 1
+        term_counts.append(counts)
+
+    n = len(candidates)
+    values, sizes, reasons = [], [], []
+    for c, counts in zip(candidates, term_counts):
+        factor = PACK_LOAD_TYPE_WEIGHTS.get(c["load_type"], 1.0)
+        for pattern, w in weights.items():
+            if fnmatch.fnmatch(c["id"], pattern):
+                factor = w
+        if query_terms:
+            relevance = sum(math.log(1 + n / df[t]) * (1 + math.log(k)) for t, k in counts.items())
+        else:
+            relevance = 1.0
+        values.append(round(relevance * factor, 4))
+        sizes.append(c["tokens"])
+        reasons.append("excluded" if factor <= 0 else "irrelevant" if relevance <= 0
+                       else "too_large" if c["tokens"] > budget else "budget")
+
+    picked = set(knapsack(sizes, values, budget))
+    selected, omitted = [], []
+    for k, c in enumerate(candidates):
+        entry = {key: v for key, v in c.items() if key != "text"}
+        entry["score"] = values[k]
+        if k in picked:
+            selected.append(entry)
+        else:
+            omitted.append({**entry, "reason": reasons[k]})
+    return {
+        "budget": budget,
+        "used_tokens": sum(sizes[k] for k in picked),
+        "value": round(sum(values[k] for k in picked), 4),
+        "selected": selected,
+        "omitted": omitted,
+    }
+
+
+def collect_pack_candidates(root: str = None, files: list[str] = None, granularity: str = "section") -> list[dict]:
+    """Files (with analyze_project load types) or their sections as pack candidates.
+
+    A section's tokens include the header line the bundle adds in front of it.
+    """
+    if root:
+        root = os.path.normpath(os.path.abspath(root))
+        scanned = _scan_root(root)
+    else:
+        root = os.getcwd()
+        scanned = [(os.path.relpath(os.path.abspath(f), root), os.path.abspath(f), "on-demand") for f in files]
+
+    candidates = []
+    for rel_path, fpath, load_type in scanned:
+        if not fpath.endswith(".md") and load_type != "startup":
+            continue
+        try:
+            with open(fpath, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except (OSError, UnicodeDecodeError):
+            continue
+        rel_path = rel_path.replace("\\", "/")
+        pieces = []
+        sections = parse_sections(content) if granularity == "section" else []
+        if sections and content[:sections[0]["start"]].strip():
+            pieces.append(("(preamble)", "preamble", 0, sections[0]["start"]))
+        for sec in sections:
+            pieces.append((sec["heading"], sec["slug"], sec["start"], sec["end"]))
+        if not sections:
+            pieces.append((None, "", 0, len(content)))
+        for heading, slug, start, end in pieces:
+            cid = f"{rel_path}#{slug}" if slug else rel_path
+            candidates.append({
+                "id": cid,
+                "file": rel_path,
+                "heading": heading,
+                "load_type": load_type,
+                "start": start,
+                "end": end,
+                "text": content[start:end].strip(),
+            })
+    headers = [f"<!-- {c['id']} -->" for c in candidates]
+    counts = tokenizer.count_batch([c["text"] for c in candidates] + headers)
+    for k, c in enumerate(candidates):
+        c["tokens"] = counts[k] + counts[len(candidates) + k]
+    return candidates
+
+
+def pack_bundle(args: list[str]) -> dict:
+    """Handle 'tokens pack'."""
+    parser = argparse.ArgumentParser(prog="agency_cli tokens pack")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--root", help="Project or skill root; candidates follow analyze's load types")
+    source.add_argument("--files", help="Comma-separated markdown files")
+    parser.add_argument("--budget", type=int, required=True, help="Token budget for the bundle")
+    parser.add_argument("--query", default="", help="Text to rank by, e.g. the phase objective")
+    parser.add_argument("--query-stdin", action="store_true", help="Read the query from stdin")
+    parser.add_argument("--granularity", choices=["section", "file"], default="section")
+    parser.add_argument("--weight", action="append", default=[],
+                        help="<glob>=<factor> on candidate ids (path#slug), repeatable; 0 excludes")
+    parser.add_argument("--output", help="Write the bundle here instead of returning it inline")
+    opts = parser.parse_args(args)
+    if opts.budget <= 0:
+        raise ValueError("--budget must be positive")
+
+    weights = {}
+    for spec in opts.weight:
+        pattern, _, factor = spec.rpartition("=")
+        if not pattern:
+            raise ValueError(f"--weight expects <glob>=<factor>, got '{spec}'")
+        weights[pattern] = float(factor)
+    query = sys.stdin.read() if opts.query_stdin else opts.query
+
+    started = time.perf_counter()
+    files = [f.strip() for f in opts.files.split(",") if f.strip()] if opts.files else None
+    candidates = collect_pack_candidates(opts.root, files, opts.granularity)
+    collected = time.perf_counter()
+    result = pack_context(candidates, opts.budget, query, weights)
+    solved = time.perf_counter()
+
+    texts = {c["id"]: c["text"] for c in candidates}
+    bundle = "\n\n".join(f"<!-- {e['id']} -->\n{texts[e['id']]}" for e in result["selected"]) + "\n"
+    if opts.output:
+        _atomic_write(opts.output, bundle)
+        result["bundle_path"] = opts.output
+    else:
+        result["bundle"] = bundle
+    result["candidates"] = len(candidates)
+    result["timing_ms"] = {"collect": round((collected - started) * 1000, 1),
+                           "solve": round((solved - collected) * 1000, 1)}
+    return result
+
+
 def generate_report(before_file: str, after_file: str, output_path: str) -> dict:
     """Generate before/after comparison report."""
     with open(before_file, 'r', encoding='utf-8') as f:
@@ -408,15 +1388,38 @@ def generate_report(before_file: str, after_file: str, output_path: str) -> dict
 
 def handle_tokens(args: list[str]) -> dict:
     if not args:
-        raise ValueError("Subcommand required: analyze, estimate, fragment, fragment-skill, deduplicate, report")
+        raise ValueError("Subcommand required: analyze, estimate, fragment, fragment-skill, deduplicate, report, pack, section, watch")
+
+    # Tokenizer options are shared by every subcommand
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument("--tokenizer", choices=tokenizer.BACKENDS)
+    parser.add_argument("--vocab")
+    opts, rest = parser.parse_known_args(args[1:])
+    tokenizer.configure(opts.tokenizer, opts.vocab)
+    try:
+        return _handle_tokens([args[0]] + rest)
+    finally:
+        tokenizer.save_counts()
+
 
+def _handle_tokens(args: list[str]) -> dict:
     subcmd = args[0]
 
     if subcmd == "analyze":
         parser = argparse.ArgumentParser(prog="agency_cli tokens analyze")
-        parser.add_argument("--root", required=True)
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument("--root")
+        target.add_argument("--workspace", help="Analyze every project/skill directory under this one")
+        target.add_argument("--roots", help="Comma-separated roots to analyze together")
+        parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+        parser.add_argument("--cache", default=TOKEN_CACHE_PATH, help=f"Per-file cache (default: {TOKEN_CACHE_PATH})")
+        parser.add_argument("--no-cache", action="store_true")
+        parser.add_argument("--files", action="store_true", help="Include per-file details in each root's report")
         opts = parser.parse_args(args[1:])
-        return analyze_project(opts.root)
+        if opts.root:
+            return analyze_project(opts.root)
+        roots = discover_roots(opts.workspace) if opts.workspace else [r for r in opts.roots.split(",") if r.strip()]
+        return analyze_workspace(roots, opts.jobs, None if opts.no_cache else opts.cache, opts.files)
 
     elif subcmd == "estimate":
         parser = argparse.ArgumentParser(prog="agency_cli tokens estimate")
@@ -430,8 +1433,10 @@ def handle_tokens(args: list[str]) -> dict:
         parser.add_argument("--threshold", type=int, default=300)
         parser.add_argument("--output-dir", required=True)
         parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument("--plan", action="store_true",
+                            help="Print the section offsets and replacements without writing anything")
         opts = parser.parse_args(args[1:])
-        return fragment_file(opts.file, opts.threshold, opts.output_dir, opts.dry_run)
+        return fragment_file(opts.file, opts.threshold, opts.output_dir, opts.dry_run, opts.plan)
 
     elif subcmd == "fragment-skill":
         parser = argparse.ArgumentParser(prog="agency_cli tokens fragment-skill")
@@ -439,14 +1444,42 @@ def handle_tokens(args: list[str]) -> dict:
         parser.add_argument("--threshold", type=int, default=300)
         parser.add_argument("--output-dir", required=True)
         parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument("--plan", action="store_true",
+                            help="Print the section offsets and replacements without writing anything")
         opts = parser.parse_args(args[1:])
-        return fragment_skill(opts.file, opts.threshold, opts.output_dir, opts.dry_run)
+        return fragment_skill(opts.file, opts.threshold, opts.output_dir, opts.dry_run, opts.plan)
 
     elif subcmd == "deduplicate":
         parser = argparse.ArgumentParser(prog="agency_cli tokens deduplicate")
         parser.add_argument("--root", required=True)
+        parser.add_argument("--near", action="store_true",
+                            help="Also catch edited copies (MinHash + LSH) instead of exact matches only")
+        parser.add_argument("--threshold", type=float, default=NEAR_THRESHOLD,
+                            help=f"Estimated Jaccard similarity for --near (default: {NEAR_THRESHOLD})")
+        parser.add_argument("--num-perm", type=int, default=NEAR_NUM_PERM,
+                            help=f"Signature size for --near (default: {NEAR_NUM_PERM})")
+        parser.add_argument("--bands", type=int, default=NEAR_BANDS,
+                            help=f"LSH bands for --near (default: {NEAR_BANDS})")
+        opts = parser.parse_args(args[1:])
+        if not opts.near:
+            return find_duplicates(opts.root)
+        if not 0 < opts.threshold <= 1:
+            raise ValueError("--threshold must be in (0, 1]")
+        return find_near_duplicates(opts.root, opts.threshold, opts.num_perm, opts.bands)
+
+    elif subcmd == "pack":
+        return pack_bundle(args[1:])
+
+    elif subcmd == "watch":
+        return watch_tokens(args[1:])
+
+    elif subcmd == "section":
+        parser = argparse.ArgumentParser(prog="agency_cli tokens section")
+        parser.add_argument("--skill", required=True, help="Skill directory or its SKILL.md")
+        parser.add_argument("--heading", help="Heading, slug or heading path (A > B); omit to list the index")
+        parser.add_argument("--file", help="Only look in this reference file")
         opts = parser.parse_args(args[1:])
-        return find_duplicates(opts.root)
+        return read_section(opts.skill, opts.heading, opts.file)
 
     elif subcmd == "report":
         parser = argparse.ArgumentParser(prog="agency_cli tokens report")
@@ -0,0 +1,98 @@
+"""
+jsoncodec -- JSON encoding and decoding shared by agency_cli, backlog_manager and the hooks.
+
+Uses orjson or msgspec when one is installed and falls back to the stdlib json
+module otherwise. The calls mirror the stdlib (loads/load/dumps/dump), so
+scripts that may run without skills/shared can fall back to
+``import json as jsoncodec``.
+
+Machine-only files (backlog.json, STATE.json, pipeline shards, the search
+index) are written with dump(), which uses compact separators. Set
+AGENCY_JSON_PRETTY=1 to write them indented while debugging. Output meant for
+people (hooks.json, agency_cli responses) passes pretty=True to dumps().
+
+Environment:
+    AGENCY_JSON_BACKEND   Force a backend: orjson, msgspec or json
+    AGENCY_JSON_PRETTY    1 to indent machine-only files
+"""
+
+import json
+import os
+
+JSONDecodeError = json.JSONDecodeError
+
+BACKENDS = ("orjson", "msgspec", "json")
+
+PRETTY_FILES = os.environ.get("AGENCY_JSON_PRETTY", "").lower() in ("1", "true", "yes")
+
+
+def _select_backend(forced: str = None):
+    """Return (name, encode, decode) for the first importable backend.
+
+    encode(obj, pretty) returns UTF-8 bytes; decode(str | bytes) returns the object.
+    Both are None for the stdlib backend.
+    """
+    for name in ([forced] if forced in BACKENDS else BACKENDS):
+        if name == "orjson":
+            try:
+                import orjson
+            except ImportError:
+                continue
+            opts = orjson.OPT_NON_STR_KEYS
+            pretty_opts = opts | orjson.OPT_INDENT_2
+
+            def encode(obj, pretty, _dumps=orjson.dumps):
+                return _dumps(obj, option=pretty_opts if pretty else opts)
+
+            return name, encode, orjson.loads
+        if name == "msgspec":
+            try:
+                import msgspec
+            except ImportError:
+                continue
+            encoder, decoder = msgspec.json.Encoder(), msgspec.json.Decoder()
+
+            def encode(obj, pretty):
+                buf = encoder.encode(obj)
+                return msgspec.json.format(buf, indent=2) if pretty else buf
+
+            def decode(data):
+                try:
+                    return decoder.decode(data)
+                except msgspec.DecodeError as e:
+                    raise JSONDecodeError(str(e), data if isinstance(data, str) else "", 0) from None
+
+            return name, encode, decode
+    return "json", None, None
+
+
+BACKEND, _encode, _decode = _select_backend(os.environ.get("AGENCY_JSON_BACKEND", "").lower() or None)
+
+
+def loads(data):
+    """Decode a JSON document from str or bytes."""
+    if _decode is None:
+        return json.loads(data)
+    return _decode(data)
+
+
+def load(fp):
+    """Decode a JSON document from a text or binary file object."""
+    return loads(fp.read())
+
+
+def dumps(obj, pretty: bool = False) -> str:
+    """Encode obj as a single compact line, or indented by two spaces if pretty."""
+    if _encode is not None:
+        try:
+            return _encode(obj, pretty).decode("utf-8")
+        except (TypeError, ValueError, OverflowError):
+            pass  # e.g. integers beyond 64 bits or lone surrogates; the stdlib copes
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def dump(obj, fp):
+    """Write a machine-only file: compact unless AGENCY_JSON_PRETTY is set."""
+    fp.write(dumps(obj, pretty=PRETTY_FILES))